@@ -1,228 +1,689 @@
-from flask import app, jsonify
-from urllib3 import request
-from cloudinary_config import upload_file_to_cloudinary
+from flask import Flask, request, jsonify, Response, stream_with_context
+from flask_cors import CORS
+from werkzeug.utils import secure_filename
 import os
-from video_processor import extract_frames_from_video, get_video_info, cleanup_frames
-from file_validator import is_video
-from url_handler import download_image_from_url, validate_url
+import cv2
+from app.models.inference import get_engine
+from app.models.preprocess import FRAME_POOL
+from app.utils.metrics import stage, set_current_endpoint, observe_request, render_prometheus, PROMETHEUS_CONTENT_TYPE
+from video_analyzer import analyze_video_file, iter_video_analysis
+from face_detector import crop_primary_face, pipeline_version
+from result_cache import save_and_hash, make_key, get_cached, set_cached, get_cache_stats
+from phash_index import phash, find_near_duplicate, add_to_index
+from job_queue import submit_job, get_job, QueueFullError, STATUS_DONE, STATUS_FAILED
+from upload_queue import enqueue_upload, get_upload, get_upload_url, start_workers as start_upload_workers
+from file_validator import validate_file, is_video
+from url_handler import validate_url, describe_error
+from remote_video import RemoteVideoStream, REMOTE_VIDEO_MAX_SECONDS
+from url_cache import download_cached, get_url_cache_stats
+from url_batch import run_url_batch, BULK_URL_MAX, BULK_URL_TIMEOUT
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from request_logger import log_request
+from request_logger import log_request, get_request_stats, get_dropped_count
+import json
 import time
+import uuid
+
+TEMP_DIR = 'temp'
+os.makedirs(TEMP_DIR, exist_ok=True)
+
+app = Flask(__name__)
+CORS(app)
+
+# Add rate limiting
+limiter = Limiter(
+    app=app,
+    key_func=get_remote_address,  # Use IP address as key
+    default_limits=["100 per day", "20 per hour"],  # Default limits
+    storage_uri="memory://"  # Store in memory
+)
+
+
+def _temp_path(filename):
+    """Unique path in TEMP_DIR for an upload (client filenames can clash or hold ../)"""
+    return os.path.join(TEMP_DIR, f"{uuid.uuid4().hex}_{secure_filename(filename)}")
+
+
+def _model_version():
+    """Version that cached results are keyed by (the model plus face cropping)"""
+    return pipeline_version(get_engine().model_version)
+
+
+def _find_similar(image, kind):
+    """
+    Look for a stored result of a near-duplicate image (resized, re-encoded...)
+
+    Returns:
+        (image_hash, cache key of the match, cached result), the last two
+        None without a match; image_hash is None if the file couldn't be
+        decoded as an image
+    """
+
+    if image is None:
+        return None, None, None
+
+    image_hash = phash(image)
+    match = find_near_duplicate(image_hash, f"{kind}:{_model_version()}")
+
+    if match is None:
+        return image_hash, None, None
+
+    return image_hash, match[1], get_cached(match[1])
+
+
+def _remember_similar(image_hash, kind, cache_key):
+    """Point the image's pHash at its cached result"""
+
+    if image_hash is not None:
+        add_to_index(image_hash, f"{kind}:{_model_version()}", cache_key)
+
+
+def _with_upload_url(result, url_field, cache_key):
+    """
+    Fill in the Cloudinary URL of a cached result once its background upload is done
+
+    The URL is written back to the cache, since upload rows are purged
+    after UPLOAD_TTL_SECONDS while cached results can outlive them
+    """
+    if result.get(url_field) or not result.get('upload_id'):
+        return result
+
+    url = get_upload_url(result['upload_id'])
+    if url is None:
+        return result
+
+    result = {**result, url_field: url}
+    set_cached(cache_key, result)
+    return result
 
 
 @app.route('/api/predict', methods=['POST'])
+@limiter.limit("10 per minute")  # Max 10 uploads per minute
 def predict():
     if 'file' not in request.files:
         return jsonify({'error': 'No file uploaded'}), 400
-    
+
     file = request.files['file']
-    
+
     # Validate file
     is_valid, message = validate_file(file)
     if not is_valid:
         return jsonify({'error': message}), 400
-    
+
     try:
-        # Save file temporarily
-        temp_path = os.path.join('temp', file.filename)
-        file.save(temp_path)
-        
-        # Upload to Cloudinary
-        cloudinary_url = upload_file_to_cloudinary(temp_path, folder='deepfake-uploads')
-        
-        if cloudinary_url:
-            print(f"✅ File uploaded to Cloudinary: {cloudinary_url}")
-        
-        # Run ML prediction (your existing code)
-        # prediction = model.predict(temp_path)
-        
-        # Delete local temp file
-        os.remove(temp_path)
-        
-        return jsonify({
-            'success': True,
-            'file_url': cloudinary_url,
-            'prediction': 'Real',  # Replace with actual prediction
-            'confidence': 85.5
-        })
-    
+        # Save file temporarily, hashing it on the way to disk
+        temp_path = _temp_path(file.filename)
+        with stage('save'):
+            content_hash = save_and_hash(file, temp_path)
+
+        # Same file already analyzed by this model? Reuse the result and URL
+        cache_key = make_key(content_hash, _model_version(), 'predict')
+        cached = get_cached(cache_key)
+
+        if cached:
+            os.remove(temp_path)
+            return jsonify({'success': True, **_with_upload_url(cached, 'file_url', cache_key), 'cached': True})
+
+        # Videos pass validate_file too, and truncated images don't decode
+        image = cv2.imread(temp_path)
+        if image is None:
+            os.remove(temp_path)
+            return jsonify({'error': 'Could not read image file'}), 400
+
+        # Re-encoded or resized copy of something we've seen?
+        image_hash, similar_key, cached = _find_similar(image, 'predict')
+
+        if cached:
+            os.remove(temp_path)
+            return jsonify({'success': True, **_with_upload_url(cached, 'file_url', similar_key), 'cached': True, 'near_duplicate': True})
+
+        # Run ML prediction (batched with other requests by the engine)
+        with stage('face_detect'):
+            face = crop_primary_face(image)
+
+        with stage('inference'):
+            prediction = get_engine().predict(image if face is None else face)
+
+        # Upload to Cloudinary in the background (takes ownership of the temp file);
+        # file_url is filled in from /api/uploads/<upload_id> or later cache hits
+        upload_id = enqueue_upload(temp_path, folder='deepfake-uploads')
+
+        result = {
+            'file_url': None,
+            'upload_id': upload_id,
+            'prediction': prediction['prediction'],
+            'confidence': prediction['confidence'],
+            'face_detected': face is not None
+        }
+
+        set_cached(cache_key, result)
+        _remember_similar(image_hash, 'predict', cache_key)
+
+        return jsonify({'success': True, **result, 'cached': False})
+
     except Exception as e:
         print(f"Error: {e}")
         return jsonify({'error': str(e)}), 500
-    @app.route('/api/analyze-video', methods=['POST'])
-    def analyze_video():
-       """Analyze video frame by frame"""
-    
+
+
+@app.route('/api/analyze-video', methods=['POST'])
+@limiter.limit("5 per minute")  # Videos take longer, so limit to 5
+def analyze_video():
+    """Analyze video frame by frame"""
+
     if 'file' not in request.files:
         return jsonify({'error': 'No file uploaded'}), 400
-    
+
     file = request.files['file']
-    
+
     # Validate
     is_valid, message = validate_file(file)
     if not is_valid:
         return jsonify({'error': message}), 400
-    
+
     # Check if it's a video
     if not is_video(file.filename):
         return jsonify({'error': 'Please upload a video file'}), 400
-    
+
     try:
         # Save video temporarily
-        temp_video_path = os.path.join('temp', file.filename)
-        file.save(temp_video_path)
-        
+        temp_video_path = _temp_path(file.filename)
+        with stage('save'):
+            content_hash = save_and_hash(file, temp_video_path)
+
+        cache_key = make_key(content_hash, _model_version(), 'analyze-video')
+        cached = get_cached(cache_key)
+
+        if cached:
+            os.remove(temp_video_path)
+            return jsonify({'success': True, **_with_upload_url(cached, 'video_url', cache_key), 'cached': True})
+
         print(f"📹 Processing video: {file.filename}")
-        
-        # Get video info
-        video_info = get_video_info(temp_video_path)
-        
-        # Extract frames
-        frames = extract_frames_from_video(temp_video_path, max_frames=20)
-        
-        # Analyze each frame (you'll integrate with ML model later)
-        frame_results = []
-        
-        for i, frame_path in enumerate(frames):
-            # TODO: Replace with actual ML prediction
-            # prediction = model.predict(frame_path)
-            
-            frame_results.append({
-                'frame_number': i + 1,
-                'prediction': 'Real',  # Placeholder
-                'confidence': 85.5 + (i % 10)  # Placeholder
-            })
-        
-        # Calculate overall result
-        avg_confidence = sum([r['confidence'] for r in frame_results]) / len(frame_results)
-        
-        # Upload to Cloudinary (optional)
-        cloudinary_url = None
-        if 'cloudinary_config' in dir():
-            cloudinary_url = upload_file_to_cloudinary(temp_video_path, folder='deepfake-videos')
-        
-        # Cleanup
-        os.remove(temp_video_path)
-        cleanup_frames()
-        
+
+        result = analyze_video_file(temp_video_path, max_frames=20, content_hash=content_hash)
+
+        if result is None:
+            os.remove(temp_video_path)
+            return jsonify({'error': 'Could not read frames from video'}), 400
+
+        # Upload to Cloudinary in the background (takes ownership of the temp file)
+        result['video_url'] = None
+        result['upload_id'] = enqueue_upload(temp_video_path, folder='deepfake-videos')
+        set_cached(cache_key, result)
+
         return jsonify({
             'success': True,
-            'video_info': video_info,
-            'frames_analyzed': len(frames),
-            'frame_results': frame_results,
-            'overall_prediction': 'Real' if avg_confidence > 50 else 'Fake',
-            'overall_confidence': round(avg_confidence, 2),
-            'video_url': cloudinary_url
+            **result,
+            'cached': False
         })
-    
+
     except Exception as e:
         print(f"❌ Error: {e}")
         return jsonify({'error': str(e)}), 500
-    @app.route('/api/analyze-url', methods=['POST'])
-    def analyze_url():
-        """Analyze image from URL"""
-    
-    data = request.get_json()
-    
-    if not data or 'url' not in data:
-        return jsonify({'error': 'No URL provided'}), 400
-    
-    url = data['url']
-    
+
+
+def _sse(event, data):
+    """One Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.route('/api/analyze-video/stream', methods=['POST'])
+@limiter.limit("5 per minute")
+def analyze_video_stream():
+    """
+    Analyze video frame by frame, streaming results as Server-Sent Events
+
+    Sends a "frame" event as each frame's result is ready ({"frame",
+    "frames_done", "frames_total", "aggregate"}: the running verdict),
+    then a "result" event with the same body as /api/analyze-video, or
+    an "error" event
+    """
+
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file uploaded'}), 400
+
+    file = request.files['file']
+
+    # Validate
+    is_valid, message = validate_file(file)
+    if not is_valid:
+        return jsonify({'error': message}), 400
+
+    if not is_video(file.filename):
+        return jsonify({'error': 'Please upload a video file'}), 400
+
+    temp_video_path = _temp_path(file.filename)
+
+    try:
+        with stage('save'):
+            content_hash = save_and_hash(file, temp_video_path)
+
+        cache_key = make_key(content_hash, _model_version(), 'analyze-video')
+
+    except Exception as e:
+        # Nothing streamed yet, so a plain JSON error like the other routes
+        print(f"❌ Error: {e}")
+        if os.path.exists(temp_video_path):
+            os.remove(temp_video_path)
+        return jsonify({'error': str(e)}), 500
+
+    def events():
+        try:
+            cached = get_cached(cache_key)
+
+            if cached:
+                yield _sse('result', {'success': True, **_with_upload_url(cached, 'video_url', cache_key), 'cached': True})
+                return
+
+            print(f"📹 Streaming analysis of video: {file.filename}")
+
+            result = None
+            for kind, payload in iter_video_analysis(temp_video_path, max_frames=20, content_hash=content_hash):
+                if kind == 'frame':
+                    yield _sse('frame', payload)
+                else:
+                    result = payload
+
+            if result is None:
+                yield _sse('error', {'error': 'Could not read frames from video'})
+                return
+
+            # Upload to Cloudinary in the background (takes ownership of the temp file)
+            result['video_url'] = None
+            result['upload_id'] = enqueue_upload(temp_video_path, folder='deepfake-videos')
+            set_cached(cache_key, result)
+
+            yield _sse('result', {'success': True, **result, 'cached': False})
+
+        except Exception as e:
+            print(f"❌ Error: {e}")
+            yield _sse('error', {'error': str(e)})
+
+        finally:
+            # Still here if the analysis failed or the client went away
+            if os.path.exists(temp_video_path):
+                os.remove(temp_video_path)
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}  # Don't let proxies buffer the events
+    )
+
+
+def _run_video_job(temp_video_path, content_hash, progress=None):
+    """Background job body for /api/jobs/analyze-video"""
+
+    set_current_endpoint('job:analyze-video')
+
+    try:
+        cache_key = make_key(content_hash, _model_version(), 'analyze-video')
+        cached = get_cached(cache_key)
+
+        if cached:
+            return {**_with_upload_url(cached, 'video_url', cache_key), 'cached': True}
+
+        result = analyze_video_file(temp_video_path, max_frames=20, progress=progress, content_hash=content_hash)
+
+        if result is None:
+            raise ValueError('Could not read frames from video')
+
+        # Upload to Cloudinary in the background (takes ownership of the temp file)
+        result['video_url'] = None
+        result['upload_id'] = enqueue_upload(temp_video_path, folder='deepfake-videos')
+        set_cached(cache_key, result)
+
+        return {**result, 'cached': False}
+
+    finally:
+        # Still here if it was a cache hit or the analysis failed
+        if os.path.exists(temp_video_path):
+            os.remove(temp_video_path)
+
+
+@app.route('/api/jobs/analyze-video', methods=['POST'])
+@limiter.limit("5 per minute")
+def submit_video_job():
+    """Queue a video for analysis and return a job id right away"""
+
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file uploaded'}), 400
+
+    file = request.files['file']
+
+    # Validate
+    is_valid, message = validate_file(file)
+    if not is_valid:
+        return jsonify({'error': message}), 400
+
+    if not is_video(file.filename):
+        return jsonify({'error': 'Please upload a video file'}), 400
+
+    try:
+        # Unique name so concurrent jobs with the same filename don't collide
+        temp_video_path = _temp_path(file.filename)
+        with stage('save'):
+            content_hash = save_and_hash(file, temp_video_path)
+
+        job_id = submit_job('analyze-video', _run_video_job, temp_video_path, content_hash)
+
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status_url': f"/api/jobs/{job_id}",
+            'result_url': f"/api/jobs/{job_id}/result"
+        }), 202
+
+    except QueueFullError as e:
+        os.remove(temp_video_path)
+        return jsonify({'error': str(e)}), 503
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+@limiter.exempt
+def job_status(job_id):
+    """Get job status and progress (frames done, ETA)"""
+
+    job = get_job(job_id)
+
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    job.pop('result')
+
+    return jsonify({
+        'success': True,
+        'job': job
+    })
+
+
+@app.route('/api/jobs/<job_id>/result', methods=['GET'])
+@limiter.exempt
+def job_result(job_id):
+    """Get the result of a finished job"""
+
+    job = get_job(job_id)
+
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    if job['status'] == STATUS_FAILED:
+        return jsonify({'success': False, 'status': job['status'], 'error': job['error']}), 500
+
+    if job['status'] != STATUS_DONE:
+        return jsonify({'success': False, 'status': job['status'], 'progress': job['progress']}), 202
+
+    return jsonify({
+        'success': True,
+        **job['result']
+    })
+
+
+@app.route('/api/uploads/<upload_id>', methods=['GET'])
+@limiter.exempt
+def upload_status(upload_id):
+    """Get the status (and, once done, the URL) of a background Cloudinary upload"""
+
+    upload = get_upload(upload_id)
+
+    if upload is None:
+        return jsonify({'error': 'Upload not found'}), 404
+
+    return jsonify({
+        'success': True,
+        'upload': upload
+    })
+
+
+def _analyze_image_url(url, max_seconds=None):
+    """
+    Download and analyze one image URL
+
+    Returns:
+        (response body, status code)
+    """
+
     # Validate URL
     is_valid, message = validate_url(url)
     if not is_valid:
-        return jsonify({'error': message}), 400
-    
+        return {'error': message}, 400
+
+    image_path = None
+
     try:
-        # Download image
-        image_path, error = download_image_from_url(url)
-        
-        if error:
-            return jsonify({'error': error}), 400
-        
+        # Download image (a conditional request if we've fetched this URL before)
+        try:
+            with stage('download'):
+                image_path, content_hash = download_cached(url, max_seconds=max_seconds)
+        except Exception as e:
+            return {'error': describe_error(e)}, 400
+
         print(f"🔍 Analyzing image from URL: {url}")
-        
-        # Analyze image (TODO: integrate with ML model)
-        # prediction = model.predict(image_path)
-        
-        # Upload to Cloudinary (optional)
-        cloudinary_url = None
-        if 'cloudinary_config' in dir():
-            cloudinary_url = upload_file_to_cloudinary(image_path, folder='deepfake-url-images')
-        
-        # Cleanup
-        if os.path.exists(image_path):
-            os.remove(image_path)
-        
-        return jsonify({
+
+        # Unchanged body (304) -> known hash -> cached prediction, no decode needed
+        cache_key = make_key(content_hash, _model_version(), 'analyze-url')
+        cached = get_cached(cache_key)
+
+        if cached:
+            return {'success': True, 'source_url': url, **_with_upload_url(cached, 'analyzed_image_url', cache_key), 'cached': True}, 200
+
+        image = cv2.imread(image_path)
+        if image is None:
+            return {'error': 'Could not read image file'}, 400
+
+        image_hash, similar_key, cached = _find_similar(image, 'analyze-url')
+
+        if cached:
+            return {
+                'success': True,
+                'source_url': url,
+                **_with_upload_url(cached, 'analyzed_image_url', similar_key),
+                'cached': True,
+                'near_duplicate': True
+            }, 200
+
+        # Analyze image
+        with stage('face_detect'):
+            face = crop_primary_face(image)
+
+        with stage('inference'):
+            prediction = get_engine().predict(image if face is None else face)
+
+        # Upload to Cloudinary in the background (takes ownership of the downloaded file)
+        upload_id = enqueue_upload(image_path, folder='deepfake-url-images')
+        image_path = None
+
+        result = {
+            'prediction': prediction['prediction'],
+            'confidence': prediction['confidence'],
+            'face_detected': face is not None,
+            'analyzed_image_url': None,
+            'upload_id': upload_id
+        }
+        set_cached(cache_key, result)
+        _remember_similar(image_hash, 'analyze-url', cache_key)
+
+        return {
             'success': True,
             'source_url': url,
-            'prediction': 'Real',  # Placeholder
-            'confidence': 87.5,  # Placeholder
-            'analyzed_image_url': cloudinary_url
-        })
-    
+            **result,
+            'cached': False
+        }, 200
+
     except Exception as e:
         print(f"❌ Error: {e}")
-        return jsonify({'error': str(e)}), 500
-    app = Flask(__name__)
-    CORS(app)
+        return {'error': str(e)}, 500
 
-# Add rate limiting
-limiter = Limiter(
-    app=app,
-    key_func=get_remote_address,  # Use IP address as key
-    default_limits=["100 per day", "20 per hour"],  # Default limits
-    storage_uri="memory://"  # Store in memory
-)
+    finally:
+        # Anything not handed to the upload queue (cache hit, bad image, error)
+        if image_path and os.path.exists(image_path):
+            os.remove(image_path)
 
-@app.route('/api/predict', methods=['POST'])
-@limiter.limit("10 per minute")  # Max 10 uploads per minute
-def predict():
-    # Your existing code...
-    pass
 
-@app.route('/api/analyze-video', methods=['POST'])
-@limiter.limit("5 per minute")  # Videos take longer, so limit to 5
-def analyze_video():
-    # Your existing code...
-    pass
+def _analyze_video_url(url, max_frames=20):
+    """
+    Analyze a video URL without downloading it first
+
+    Frames are sampled straight from the remote stream (Range requests
+    when the host supports them), and reading stops at the last sampled
+    frame or the byte budget, whichever comes first
+
+    Returns:
+        (response body, status code)
+    """
+
+    is_valid, message = validate_url(url)
+    if not is_valid:
+        return {'error': message}, 400
+
+    try:
+        try:
+            with stage('download'):
+                stream = RemoteVideoStream(url, max_seconds=REMOTE_VIDEO_MAX_SECONDS)
+        except Exception as e:
+            return {'error': describe_error(e)}, 400
+
+        print(f"📹 Processing video from URL: {url}")
+
+        try:
+            result = analyze_video_file(stream, max_frames=max_frames)
+        finally:
+            stream.close()
+
+        if result is None:
+            return {'error': stream.stopped_reason or 'Could not read frames from video'}, 400
+
+        return {
+            'success': True,
+            'source_url': url,
+            **result,
+            'bytes_fetched': stream.bytes_fetched,
+            # Set when the budget or deadline cut the sampling short
+            'truncated': stream.stopped_reason is not None,
+            'cached': False
+        }, 200
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return {'error': str(e)}, 500
+
 
 @app.route('/api/analyze-url', methods=['POST'])
 @limiter.limit("15 per minute")  # URLs are faster
 def analyze_url():
-    # Your existing code...
-    pass
+    """
+    Analyze image or video from URL
+
+    Send {"type": "video"} for video URLs without a video extension
+    """
+
+    data = request.get_json()
+
+    if not data or 'url' not in data:
+        return jsonify({'error': 'No URL provided'}), 400
+
+    url_type = data.get('type') or ('video' if is_video(data['url'].split('?')[0]) else 'image')
+
+    if url_type == 'video':
+        body, status = _analyze_video_url(data['url'])
+    else:
+        body, status = _analyze_image_url(data['url'])
+    return jsonify(body), status
+
+
+@app.route('/api/analyze-urls', methods=['POST'])
+@limiter.limit("5 per minute")
+def analyze_urls():
+    """
+    Analyze many image URLs at once
+
+    Body: {"urls": [...]}. URLs are fetched concurrently (with per-host and
+    overall limits) and the response is NDJSON: one line per URL as soon
+    as it finishes, {"index", "url", "status", ...analyze-url fields},
+    then a summary line.
+    """
+
+    data = request.get_json(silent=True)
+
+    if not data or not isinstance(data.get('urls'), list) or not data['urls']:
+        return jsonify({'error': 'Provide a non-empty "urls" list'}), 400
+
+    urls = data['urls']
+
+    if len(urls) > BULK_URL_MAX:
+        return jsonify({'error': f'Too many URLs (max {BULK_URL_MAX})'}), 400
+
+    if not all(isinstance(url, str) for url in urls):
+        return jsonify({'error': 'Every URL must be a string'}), 400
+
+    def analyze(url):
+        return _analyze_image_url(url, max_seconds=BULK_URL_TIMEOUT)
+
+    def result_lines():
+        succeeded = 0
+
+        for index, url, outcome, error in run_url_batch(urls, analyze, timeout=BULK_URL_TIMEOUT):
+            if error is None:
+                body, status = outcome
+            else:
+                body, status = {'error': str(error)}, 504 if isinstance(error, TimeoutError) else 500
+
+            succeeded += status == 200
+            yield json.dumps({'index': index, 'url': url, 'status': status, **body}) + '\n'
+
+        yield json.dumps({'summary': {'total': len(urls), 'succeeded': succeeded, 'failed': len(urls) - succeeded}}) + '\n'
+
+    return Response(stream_with_context(result_lines()), mimetype='application/x-ndjson')
+
 
 @app.route('/api/health', methods=['GET'])
 @limiter.exempt  # No limit on health check
 def health():
     return jsonify({'status': 'healthy'})
-    @app.errorhandler(429)
-    def ratelimit_handler(e):
-       """Handle rate limit exceeded"""
+
+
+@app.errorhandler(429)
+def ratelimit_handler(e):
+    """Handle rate limit exceeded"""
     return jsonify({
         'error': 'Rate limit exceeded',
         'message': 'Too many requests. Please try again later.',
         'retry_after': e.description
     }), 429
-    @app.before_request
-    def before_request():
-       """Log request start time"""
+
+
+@app.before_request
+def before_request():
+    """Log request start time"""
     request.start_time = time.time()
+    start_upload_workers()  # Resume uploads left pending by a restart
+    set_current_endpoint(request.url_rule.rule if request.url_rule else request.path)
+
 
 @app.after_request
 def after_request(response):
     """Log request details after processing"""
-    
+
     # Calculate response time
     if hasattr(request, 'start_time'):
         response_time = (time.time() - request.start_time) * 1000  # Convert to ms
     else:
         response_time = None
-    
+
+    # Record latency metrics
+    if response_time is not None:
+        observe_request(
+            'flask',
+            request.url_rule.rule if request.url_rule else 'unmatched',
+            request.method,
+            response.status_code,
+            response_time / 1000
+        )
+
     # Log the request
     log_request(
         endpoint=request.path,
@@ -230,18 +691,36 @@ def after_request(response):
         ip_address=request.remote_addr,
         user_agent=request.headers.get('User-Agent', 'Unknown'),
         status_code=response.status_code,
-        response_time=response_time
+        response_time=response_time,
+        route=request.url_rule.rule if request.url_rule else None
     )
-    
-    return response  
-    @app.route('/api/stats', methods=['GET'])
-    @limiter.exempt
-    def stats():
-       """Get API statistics"""
-    
+
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+@limiter.exempt
+def metrics():
+    """Request and per-stage latency histograms (Prometheus text format)"""
+    return Response(render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@app.route('/api/stats', methods=['GET'])
+@limiter.exempt
+def stats():
+    """Get API statistics"""
+
     stats = get_request_stats()
-    
+
     return jsonify({
         'success': True,
-        'statistics': stats
-    })
\ No newline at end of file
+        'statistics': stats,
+        'cache': get_cache_stats(),
+        'url_cache': get_url_cache_stats(),
+        'frame_pool': FRAME_POOL.stats(),
+        'log_entries_dropped': get_dropped_count()
+    })
+
+
+if __name__ == '__main__':
+    app.run(debug=True)
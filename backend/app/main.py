@@ -1,6 +1,16 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from app.routes import upload
+from app.utils import upload_index
+from app.utils.file_handler import MAX_FILE_SIZE
+from app.utils.logger import logger
+from app.utils.metrics import set_current_endpoint, observe_request, render_prometheus, PROMETHEUS_CONTENT_TYPE
+import time
+
+# Room for multipart boundaries and headers around a single file
+MULTIPART_OVERHEAD = 64 * 1024
+SINGLE_FILE_UPLOAD_PATHS = {"/api/upload", "/api/upload/temp"}
 
 # Create FastAPI app
 app = FastAPI(
@@ -18,9 +28,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Reject oversized single-file uploads from Content-Length, before the body is read
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    if request.method == "POST" and request.url.path in SINGLE_FILE_UPLOAD_PATHS:
+        content_length = request.headers.get("content-length")
+        
+        if content_length and content_length.isdigit() and int(content_length) > MAX_FILE_SIZE + MULTIPART_OVERHEAD:
+            max_mb = MAX_FILE_SIZE / (1024 * 1024)
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"File too large. Maximum size: {max_mb}MB"}
+            )
+    
+    return await call_next(request)
+
+# Record request latency for /metrics (added last, so it also times rejected uploads)
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    set_current_endpoint(request.url.path)
+    
+    response = await call_next(request)
+    
+    # Route template (e.g. /api/upload/{filename}) keeps the label count bounded
+    route = request.scope.get("route")
+    endpoint = route.path if route else "unmatched"
+    observe_request("fastapi", endpoint, request.method, response.status_code, time.perf_counter() - start)
+    
+    return response
+
 # Include routers
 app.include_router(upload.router)
 
+# Sync the upload catalogue with the uploads folder (files added/removed while we were down)
+@app.on_event("startup")
+def reconcile_upload_index():
+    changes = upload_index.reconcile()
+    logger.info(f"Upload index reconciled: {changes}")
+
 # Root endpoint
 @app.get("/")
 def read_root():
@@ -38,3 +84,9 @@ def health_check():
         "status": "healthy",
         "service": "deepfake-detector-api"
     }
+
+
+# Metrics endpoint (Prometheus text format)
+@app.get("/metrics")
+def metrics():
+    return Response(render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
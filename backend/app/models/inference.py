@@ -0,0 +1,191 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from app.models.preprocess import BatchPreprocessor
+
+# Configuration
+MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", 16))
+MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", 10))
+
+
+class DummyModel:
+    """
+    Placeholder CPU backend until the real model is plugged in
+    Returns the same prediction for every image
+    """
+
+    version = "dummy-1"
+    input_size = (224, 224)  # (width, height) the engine preprocesses images to
+
+    def __init__(self, prediction: str = "Real", confidence: float = 85.5):
+        self.prediction = prediction
+        self.confidence = confidence
+
+    def predict_batch(self, images: list[np.ndarray] | np.ndarray) -> list[dict]:
+        """
+        Run the model on a batch of images
+
+        Any backend must provide this method and a `version` string
+        Backends with an `input_size` get the batch as one normalized
+        float32 RGB tensor (N, height, width, 3) instead of a list of BGR
+        images (optionally set `input_mean` / `input_std` too)
+        Returns one {"prediction", "confidence"} dict per image, in order
+        """
+        return [
+            {"prediction": self.prediction, "confidence": self.confidence}
+            for _ in images
+        ]
+
+
+class InferenceEngine:
+    """
+    Holds one model and batches images from all concurrent callers
+
+    Images queue up and a single worker thread runs them through the
+    backend in batches of up to max_batch_size, waiting at most
+    max_wait_ms for a batch to fill. Each caller gets a Future that
+    resolves to its own result. If the backend has an input_size, each
+    batch is resized and normalized in one pass first (see
+    BatchPreprocessor).
+    """
+
+    def __init__(self, backend, max_batch_size: int = MAX_BATCH_SIZE, max_wait_ms: float = MAX_WAIT_MS):
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.preprocess = None
+
+        if getattr(backend, "input_size", None):
+            options = {}
+            if getattr(backend, "input_mean", None):
+                options["mean"] = backend.input_mean
+            if getattr(backend, "input_std", None):
+                options["std"] = backend.input_std
+            self.preprocess = BatchPreprocessor(backend.input_size, **options)
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def model_version(self) -> str:
+        return getattr(self.backend, "version", "unknown")
+
+    def submit(self, image: np.ndarray) -> Future:
+        """Queue one image, returns a Future for its prediction"""
+        future = Future()
+        self._queue.put((image, future))
+        return future
+
+    def predict(self, image: np.ndarray, timeout: float | None = None) -> dict:
+        """Predict one image, blocking until its batch has run"""
+        return self.submit(image).result(timeout=timeout)
+
+    def predict_many(self, images: list[np.ndarray], timeout: float | None = None) -> list[dict]:
+        """Predict several images, results in the same order"""
+        futures = [self.submit(image) for image in images]
+        return [future.result(timeout=timeout) for future in futures]
+
+    def _next_batch(self) -> list[tuple]:
+        """Block for the first item, then collect more until full or out of time"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+
+            # A bad input only fails its own caller, not the whole batch
+            valid = []
+            for image, future in batch:
+                if _is_image(image):
+                    valid.append((image, future))
+                else:
+                    future.set_exception(ValueError(f"Not an image: {type(image).__name__}"))
+
+            if valid:
+                self._run_batch(valid)
+
+    def _run_batch(self, batch: list[tuple]):
+        """Run one batch, setting each caller's future"""
+        futures = [future for _, future in batch]
+
+        try:
+            images = [image for image, _ in batch]
+
+            if self.preprocess:
+                errors = []
+                images = self.preprocess(images, errors)
+
+                # Images the preprocessor couldn't handle fail on their own
+                failed = dict(errors)
+                for position, error in errors:
+                    futures[position].set_exception(error)
+                batch = [item for position, item in enumerate(batch) if position not in failed]
+                futures = [future for position, future in enumerate(futures) if position not in failed]
+
+                if not batch:
+                    return
+
+            results = self.backend.predict_batch(images)
+
+            if len(results) != len(futures):
+                raise RuntimeError(f"Backend returned {len(results)} results for {len(futures)} images")
+
+        except Exception as e:
+            # Retry alone, so only the image that broke the batch fails
+            if len(batch) > 1:
+                for item in batch:
+                    self._run_batch([item])
+                return
+
+            futures[0].set_exception(e)
+            return
+
+        for future, result in zip(futures, results):
+            future.set_result(result)
+
+
+def _is_image(image) -> bool:
+    return isinstance(image, np.ndarray) and image.ndim in (2, 3) and image.size > 0
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> InferenceEngine:
+    """Get the shared inference engine, loading the model on first use"""
+    global _engine
+
+    with _engine_lock:
+        if _engine is None:
+            _engine = InferenceEngine(DummyModel())
+
+    return _engine
+
+
+def set_backend(backend, **engine_options) -> InferenceEngine:
+    """Replace the shared engine's model (e.g. with the real one, or a test double)"""
+    global _engine
+
+    with _engine_lock:
+        _engine = InferenceEngine(backend, **engine_options)
+
+    return _engine
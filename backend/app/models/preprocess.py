@@ -0,0 +1,144 @@
+import os
+import threading
+
+import cv2
+import numpy as np
+
+# Configuration
+POOL_MAX_FREE = int(os.getenv("BUFFER_POOL_MAX_FREE", 64))  # Idle buffers kept per shape
+IMAGENET_MEAN = (0.485, 0.456, 0.406)  # RGB
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+
+class BufferPool:
+    """
+    Reusable NumPy buffers, keyed by shape and dtype
+
+    acquire() hands out an idle buffer (or allocates a new one) and
+    release() gives it back for the next caller. Buffers that are never
+    released are garbage collected as usual, so releasing is optional;
+    just never release one that something still reads. At most max_free
+    idle buffers are kept per shape, so memory follows peak concurrent
+    use instead of growing with the number of frames decoded.
+    """
+
+    def __init__(self, max_free: int = POOL_MAX_FREE):
+        self.max_free = max_free
+        self._free = {}
+        self._lock = threading.Lock()
+        self._counters = {"allocated": 0, "reused": 0, "released": 0}
+
+    def acquire(self, shape: tuple, dtype=np.uint8) -> np.ndarray:
+        key = (tuple(shape), np.dtype(dtype).str)
+
+        with self._lock:
+            free = self._free.get(key)
+            if free:
+                self._counters["reused"] += 1
+                return free.pop()
+            self._counters["allocated"] += 1
+
+        return np.empty(shape, dtype=dtype)
+
+    def release(self, buffer: np.ndarray | None) -> None:
+        # Views would pin (and alias) some other array's memory
+        if buffer is None or buffer.base is not None:
+            return
+
+        key = (buffer.shape, buffer.dtype.str)
+
+        with self._lock:
+            free = self._free.setdefault(key, [])
+            if len(free) < self.max_free:
+                free.append(buffer)
+                self._counters["released"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._counters,
+                "free": sum(len(free) for free in self._free.values()),
+                "free_bytes": sum(buffer.nbytes for free in self._free.values() for buffer in free)
+            }
+
+
+# Decoded video frames (see video_processor)
+FRAME_POOL = BufferPool()
+
+
+class BatchPreprocessor:
+    """
+    Turns a batch of BGR images into one model input tensor
+
+    Each image is resized straight into its slot of a reused uint8 batch
+    buffer; then the whole batch is converted to RGB float32 and
+    normalized, (pixel / 255 - mean) / std, in two vectorized passes
+    into a reused float32 buffer. Nothing is allocated per image.
+
+    The returned (N, height, width, 3) tensor is a view of that buffer
+    and is overwritten by the next call, so a preprocessor belongs to
+    one thread (the engine's worker).
+    """
+
+    def __init__(self, size: tuple, mean: tuple = IMAGENET_MEAN, std: tuple = IMAGENET_STD):
+        self.width, self.height = size
+        self.scale = (1 / (255 * np.asarray(std, dtype=np.float32))).astype(np.float32)
+        self.offset = (-np.asarray(mean, dtype=np.float32) / np.asarray(std, dtype=np.float32)).astype(np.float32)
+        self._pixels = np.empty((0, self.height, self.width, 3), dtype=np.uint8)
+        self._tensor = np.empty((0, self.height, self.width, 3), dtype=np.float32)
+
+    def _reserve(self, count: int):
+        """Grow the batch buffers to hold count images"""
+        if count > len(self._pixels):
+            self._pixels = np.empty((count, self.height, self.width, 3), dtype=np.uint8)
+            self._tensor = np.empty((count, self.height, self.width, 3), dtype=np.float32)
+
+    def _resize_into(self, image: np.ndarray, slot: np.ndarray):
+        if image.ndim == 3 and image.shape[2] == 1:
+            image = image[..., 0]
+
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        elif image.shape[2] == 4:
+            image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+        elif image.shape[2] != 3:
+            # cv2 would resize into a new array instead of the slot
+            raise ValueError(f"Unsupported channel count: {image.shape[2]}")
+
+        shrinking = image.shape[1] > self.width or image.shape[0] > self.height
+        interpolation = cv2.INTER_AREA if shrinking else cv2.INTER_LINEAR
+
+        if image.dtype == np.uint8:
+            cv2.resize(image, (self.width, self.height), dst=slot, interpolation=interpolation)
+        else:
+            np.clip(cv2.resize(image, (self.width, self.height), interpolation=interpolation), 0, 255, out=slot, casting="unsafe")
+
+    def __call__(self, images: list[np.ndarray], errors: list | None = None) -> np.ndarray:
+        """
+        Preprocess a batch
+
+        With an errors list, an image that can't be preprocessed (odd
+        dtype or channel count...) is left out of the tensor and recorded
+        there as (position in images, exception); otherwise it raises
+        """
+        self._reserve(len(images))
+
+        count = 0
+        for position, image in enumerate(images):
+            try:
+                self._resize_into(image, self._pixels[count])
+            except Exception as e:
+                if errors is None:
+                    raise
+                errors.append((position, e))
+                continue
+            count += 1
+
+        pixels = self._pixels[:count]
+        tensor = self._tensor[:count]
+
+        # BGR -> RGB is just a reversed view; the multiply writes it out
+        np.multiply(pixels[..., ::-1], self.scale, out=tensor)
+        tensor += self.offset
+
+        return tensor
@@ -1,19 +1,36 @@
 from app.utils.logger import logger
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
-import shutil
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import json
 import os
 import time
+import uuid
 from app.utils.file_handler import (
     validate_file, 
-    validate_file_size,
+    save_upload_stream,
     UPLOAD_DIR,
     TEMP_DIR
 )
+from app.utils import upload_index
+from app.utils.metrics import stage
 
 # Create router
 router = APIRouter(prefix="/api", tags=["upload"])
 
+# Max files of one batch being written to disk at the same time
+BATCH_CONCURRENCY = 4
+
+
+def _unique_filename(original: str) -> str:
+    """
+    Name to save an upload under: timestamp first so names sort by time,
+    then a random part so uploads with the same name (in one batch, or
+    in the same second) never share a path
+    """
+    return f"{int(time.time())}_{uuid.uuid4().hex[:12]}_{original}"
+
 
 @router.post("/upload")
 async def upload_file(file: UploadFile = File(...)):
@@ -26,11 +43,29 @@ async def upload_file(file: UploadFile = File(...)):
         file_info = validate_file(file)
         logger.info(f"File validated: {file_info}")
         
-        # ... rest of your code ...
+        # Create unique filename
+        filename = _unique_filename(file.filename)
+        file_path = os.path.join(UPLOAD_DIR, filename)
+        
+        # Stream to disk off the event loop (size limit, hash and type check in one pass)
+        with stage("save"):
+            saved = await run_in_threadpool(save_upload_stream, file, file_path)
+        await run_in_threadpool(upload_index.add_file, filename, saved["size"], sha256=saved["sha256"])
         
         logger.info(f"File uploaded successfully: {filename}")
         
-        return JSONResponse({...})
+        return JSONResponse({
+            "success": True,
+            "message": "File uploaded successfully",
+            "data": {
+                "original_filename": file.filename,
+                "saved_filename": filename,
+                "file_path": file_path,
+                "file_type": file_info["type"],
+                "file_size_mb": round(saved["size"] / (1024 * 1024), 2),
+                "sha256": saved["sha256"]
+            }
+        })
         
     except HTTPException as e:
         logger.error(f"Validation error: {str(e)}")
@@ -38,7 +73,13 @@ async def upload_file(file: UploadFile = File(...)):
         
     except Exception as e:
         logger.error(f"Upload error: {str(e)}")
-        # ... rest of error handling ...
+        return JSONResponse(
+            status_code=500,
+            content={
+                "success": False,
+                "error": str(e)
+            }
+        )
 
 @router.post("/upload/temp")
 async def upload_temp_file(file: UploadFile = File(...)):
@@ -57,23 +98,20 @@ async def upload_temp_file(file: UploadFile = File(...)):
         file_info = validate_file(file)
         
         # Create unique filename
-        timestamp = int(time.time())
-        filename = f"{timestamp}_{file.filename}"
+        filename = _unique_filename(file.filename)
         file_path = os.path.join(TEMP_DIR, filename)
         
-        # Save file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Validate size
-        validate_file_size(file_path)
+        # Stream to disk off the event loop (size limit, hash and type check in one pass)
+        with stage("save"):
+            saved = await run_in_threadpool(save_upload_stream, file, file_path)
         
         return JSONResponse({
             "success": True,
             "message": "File uploaded to temporary storage",
             "data": {
                 "file_path": file_path,
-                "file_type": file_info["type"]
+                "file_type": file_info["type"],
+                "sha256": saved["sha256"]
             }
         })
         
@@ -111,6 +149,7 @@ async def delete_file(filename: str):
             raise HTTPException(status_code=404, detail="File not found")
         
         os.remove(file_path)
+        await run_in_threadpool(upload_index.remove_file, filename)
         
         return JSONResponse({
             "success": True,
@@ -128,72 +167,92 @@ async def delete_file(filename: str):
                 "error": str(e)
             }
         )
+async def _save_batch_file(file: UploadFile, semaphore: asyncio.Semaphore) -> dict:
+    """Save one file of a batch; failures are returned as a result, never raised"""
+    file_path = None
+    
+    try:
+        # Validate file
+        file_info = validate_file(file)
+        
+        # Create unique filename
+        filename = _unique_filename(file.filename)
+        file_path = os.path.join(UPLOAD_DIR, filename)
+        
+        # Stream to disk off the event loop (size limit, hash and type check in one pass)
+        async with semaphore:
+            with stage("save"):
+                saved = await run_in_threadpool(save_upload_stream, file, file_path)
+        await run_in_threadpool(upload_index.add_file, filename, saved["size"], sha256=saved["sha256"])
+        
+        return {
+            "success": True,
+            "original_filename": file.filename,
+            "saved_filename": filename,
+            "file_type": file_info["type"],
+            "file_size_mb": round(saved["size"] / (1024 * 1024), 2),
+            "sha256": saved["sha256"]
+        }
+        
+    except Exception as e:
+        # Clean up if file was saved
+        if file_path and os.path.exists(file_path):
+            os.remove(file_path)
+        
+        return {
+            "success": False,
+            "original_filename": file.filename,
+            "error": e.detail if isinstance(e, HTTPException) else str(e)
+        }
+
+
+def _batch_summary(results: list[dict]) -> dict:
+    successful_uploads = sum(1 for result in results if result["success"])
+    return {
+        "total": len(results),
+        "successful": successful_uploads,
+        "failed": len(results) - successful_uploads
+    }
+
+
 @router.post("/upload/batch")
-async def upload_multiple_files(files: list[UploadFile] = File(...)):
+async def upload_multiple_files(files: list[UploadFile] = File(...), stream: bool = False):
     """
     Upload multiple files at once
+    Files are saved concurrently (at most BATCH_CONCURRENCY at a time)
     
     Args:
         files: List of image/video files
+        stream: If true, respond with NDJSON, one line per file as soon as
+            it finishes (with its "index" in the batch), then a summary line
         
     Returns:
-        JSON with results for each file
+        JSON with results for each file, in the same order as uploaded
     """
-    results = []
-    successful_uploads = 0
-    failed_uploads = 0
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
     
-    for file in files:
-        try:
-            # Validate file
-            file_info = validate_file(file)
-            
-            # Create unique filename
-            timestamp = int(time.time())
-            filename = f"{timestamp}_{file.filename}"
-            file_path = os.path.join(UPLOAD_DIR, filename)
-            
-            # Save file
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            
-            # Validate size
-            validate_file_size(file_path)
-            
-            # Get file size
-            file_size = os.path.getsize(file_path) / (1024 * 1024)
-            
-            results.append({
-                "success": True,
-                "original_filename": file.filename,
-                "saved_filename": filename,
-                "file_type": file_info["type"],
-                "file_size_mb": round(file_size, 2)
-            })
-            
-            successful_uploads += 1
-            
-        except Exception as e:
-            results.append({
-                "success": False,
-                "original_filename": file.filename,
-                "error": str(e)
-            })
+    if stream:
+        async def save_indexed(index: int, file: UploadFile):
+            return index, await _save_batch_file(file, semaphore)
+        
+        async def result_lines():
+            results = []
             
-            failed_uploads += 1
+            for next_done in asyncio.as_completed([save_indexed(i, file) for i, file in enumerate(files)]):
+                index, result = await next_done
+                results.append(result)
+                yield json.dumps({"index": index, **result}) + "\n"
             
-            # Clean up if file was saved
-            if 'file_path' in locals() and os.path.exists(file_path):
-                os.remove(file_path)
+            yield json.dumps({"summary": _batch_summary(results)}) + "\n"
+        
+        return StreamingResponse(result_lines(), media_type="application/x-ndjson")
+    
+    results = await asyncio.gather(*[_save_batch_file(file, semaphore) for file in files])
     
     return JSONResponse({
         "success": True,
         "message": f"Processed {len(files)} files",
-        "summary": {
-            "total": len(files),
-            "successful": successful_uploads,
-            "failed": failed_uploads
-        },
+        "summary": _batch_summary(results),
         "results": results
     })
 @router.get("/upload/{filename}")
@@ -210,30 +269,21 @@ async def get_file_info(filename: str):
     try:
         file_path = os.path.join(UPLOAD_DIR, filename)
         
-        if not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail="File not found")
+        # Served from the metadata index, no disk access
+        info = await run_in_threadpool(upload_index.get_file, filename)
         
-        # Get file stats
-        file_stats = os.stat(file_path)
-        file_size = file_stats.st_size / (1024 * 1024)  # Convert to MB
-        
-        # Determine file type
-        from app.utils.file_handler import is_image, is_video
-        if is_image(filename):
-            file_type = "image"
-        elif is_video(filename):
-            file_type = "video"
-        else:
-            file_type = "unknown"
+        if info is None:
+            raise HTTPException(status_code=404, detail="File not found")
         
         return JSONResponse({
             "success": True,
             "data": {
                 "filename": filename,
                 "file_path": file_path,
-                "file_type": file_type,
-                "file_size_mb": round(file_size, 2),
-                "created_at": file_stats.st_ctime
+                "file_type": info["file_type"],
+                "file_size_mb": round(info["size_bytes"] / (1024 * 1024), 2),
+                "created_at": info["created_at"],
+                "sha256": info["sha256"]
             }
         })
         
@@ -251,34 +301,62 @@ async def get_file_info(filename: str):
 
 
 @router.get("/upload")
-async def list_uploaded_files():
+async def list_uploaded_files(
+    cursor: str | None = None,
+    limit: int = Query(50, ge=1, le=upload_index.MAX_PAGE_SIZE),
+    file_type: str | None = Query(None, pattern="^(image|video)$"),
+    name: str | None = None,
+    min_size_mb: float | None = None,
+    max_size_mb: float | None = None,
+    sort_by: str = "created_at",
+    order: str = "desc"
+):
     """
-    List all uploaded files
+    List uploaded files, one page at a time
     
+    Args:
+        cursor: next_cursor from the previous page (omit for the first page)
+        limit: Files per page
+        file_type: Only "image" or "video" files
+        name: Only files whose name starts with this
+        min_size_mb / max_size_mb: Size range
+        sort_by: created_at, size or filename
+        order: asc or desc
+        
     Returns:
-        List of uploaded files with their info
+        Page of files with their info, and the cursor for the next page
     """
     try:
-        files = []
-        
-        if os.path.exists(UPLOAD_DIR):
-            for filename in os.listdir(UPLOAD_DIR):
-                file_path = os.path.join(UPLOAD_DIR, filename)
-                
-                if os.path.isfile(file_path):
-                    file_size = os.path.getsize(file_path) / (1024 * 1024)
-                    
-                    files.append({
-                        "filename": filename,
-                        "file_size_mb": round(file_size, 2)
-                    })
+        files, next_cursor = await run_in_threadpool(
+            upload_index.list_files,
+            cursor=cursor,
+            limit=limit,
+            file_type=file_type,
+            name_prefix=name,
+            min_size=int(min_size_mb * 1024 * 1024) if min_size_mb is not None else None,
+            max_size=int(max_size_mb * 1024 * 1024) if max_size_mb is not None else None,
+            sort_by=sort_by,
+            order=order
+        )
         
         return JSONResponse({
             "success": True,
-            "total_files": len(files),
-            "files": files
+            "count": len(files),
+            "next_cursor": next_cursor,
+            "files": [
+                {
+                    "filename": info["filename"],
+                    "file_type": info["file_type"],
+                    "file_size_mb": round(info["size_bytes"] / (1024 * 1024), 2),
+                    "created_at": info["created_at"]
+                }
+                for info in files
+            ]
         })
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+        
     except Exception as e:
         return JSONResponse(
             status_code=500,
@@ -1,3 +1,4 @@
+import hashlib
 import os
 from fastapi import UploadFile, HTTPException
 
@@ -7,6 +8,7 @@ TEMP_DIR = "temp"
 ALLOWED_IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
 ALLOWED_VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv'}
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB in bytes
+CHUNK_SIZE = 1024 * 1024  # 1MB per read when streaming uploads to disk
 
 # Create directories if they don't exist
 os.makedirs(UPLOAD_DIR, exist_ok=True)
@@ -90,4 +92,78 @@ def validate_file_size(file_path: str) -> bool:
             detail=f"File too large ({size_mb:.2f}MB). Maximum size: {max_mb}MB"
         )
     
-    return True
\ No newline at end of file
+    return True
+
+
+def sniff_file_type(header: bytes) -> str | None:
+    """
+    Detect file type from its first bytes (magic numbers)
+    Returns "image", "video" or None if unrecognised
+    """
+    if header.startswith(b"\xff\xd8\xff"):  # JPEG
+        return "image"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):  # PNG
+        return "image"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":  # WebP
+        return "image"
+    if header[:4] == b"RIFF" and header[8:12] == b"AVI ":  # AVI
+        return "video"
+    if header[4:8] == b"ftyp":  # MP4 / MOV
+        return "video"
+    if header.startswith(b"\x1a\x45\xdf\xa3"):  # Matroska (MKV)
+        return "video"
+    return None
+
+
+def save_upload_stream(file: UploadFile, file_path: str, max_size: int = MAX_FILE_SIZE) -> dict:
+    """
+    Stream an upload to disk in chunks
+    Stops as soon as max_size is crossed, and hashes + sniffs the content in the same pass
+    Blocking, so call it through run_in_threadpool from async routes
+    Returns dict with size, sha256 and sniffed type
+    Raises HTTPException (and removes the partial file) if too large or not the type its extension claims
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+    sniffed_type = None
+
+    try:
+        with open(file_path, "wb") as buffer:
+            while True:
+                chunk = file.file.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+
+                if size == 0:
+                    sniffed_type = sniff_file_type(chunk[:16])
+                    expected_type = "image" if is_image(file.filename) else "video"
+                    if sniffed_type != expected_type:
+                        raise HTTPException(
+                            status_code=400,
+                            detail=f"File content does not look like a valid {expected_type}"
+                        )
+
+                size += len(chunk)
+                if size > max_size:
+                    max_mb = max_size / (1024 * 1024)
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File too large. Maximum size: {max_mb}MB"
+                    )
+
+                sha256.update(chunk)
+                buffer.write(chunk)
+
+        if size == 0:
+            raise HTTPException(status_code=400, detail="File is empty")
+
+    except BaseException:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+
+    return {
+        "size": size,
+        "sha256": sha256.hexdigest(),
+        "sniffed_type": sniffed_type
+    }
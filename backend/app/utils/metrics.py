@@ -0,0 +1,135 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Lightweight latency metrics shared by the Flask app and the FastAPI app
+#
+# Requests and the stages inside them (save, decode, inference, upload...)
+# are recorded into fixed-bucket histograms and exposed in the Prometheus
+# text format by the /metrics endpoints. Recording is a lock + bisect, a
+# couple of microseconds, so it can stay on in production.
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_current_endpoint: ContextVar[str] = ContextVar("current_endpoint", default="background")
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram, one series per label set"""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple[str, ...], seconds: float):
+        index = bisect.bisect_left(BUCKETS, seconds)
+
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {"buckets": [0] * (len(BUCKETS) + 1), "sum": 0.0, "count": 0}
+            series["buckets"][index] += 1
+            series["sum"] += seconds
+            series["count"] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+
+        with self._lock:
+            snapshot = {labels: (list(s["buckets"]), s["sum"], s["count"]) for labels, s in self._series.items()}
+
+        for labels, (buckets, total, count) in sorted(snapshot.items()):
+            label_text = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels))
+            cumulative = 0
+
+            for bound, bucket_count in zip(BUCKETS, buckets):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+
+            lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {total}")
+            lines.append(f"{self.name}_count{{{label_text}}} {count}")
+
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Total time to handle a request",
+    ("app", "endpoint", "method", "status")
+)
+STAGE_DURATION = Histogram(
+    "request_stage_duration_seconds",
+    "Time spent in each processing stage of a request",
+    ("endpoint", "stage")
+)
+
+
+def set_current_endpoint(endpoint: str):
+    """Label stages recorded from here on (in this thread/task) with endpoint"""
+    _current_endpoint.set(endpoint)
+
+
+def observe_request(app: str, endpoint: str, method: str, status: int, seconds: float):
+    REQUEST_DURATION.observe((app, endpoint, method, str(status)), seconds)
+
+
+def observe_stage(stage_name: str, seconds: float, endpoint: str | None = None):
+    STAGE_DURATION.observe((endpoint or _current_endpoint.get(), stage_name), seconds)
+
+
+@contextmanager
+def stage(stage_name: str, endpoint: str | None = None):
+    """
+    Time a block as one stage of the current request
+
+        with stage("inference"):
+            prediction = engine.predict(image)
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage_name, time.perf_counter() - start, endpoint)
+
+
+def timed_iter(iterable, stage_name: str, endpoint: str | None = None):
+    """
+    Yield from iterable, recording the time spent producing items (not
+    the caller's time between them) as one stage observation at the end
+    """
+    iterator = iter(iterable)
+    endpoint = endpoint or _current_endpoint.get()
+    elapsed = 0.0
+
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - start
+            yield item
+    finally:
+        observe_stage(stage_name, elapsed, endpoint)
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = REQUEST_DURATION.render() + STAGE_DURATION.render()
+    return "\n".join(lines) + "\n"
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
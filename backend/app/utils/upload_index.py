@@ -0,0 +1,196 @@
+import base64
+import json
+import os
+import sqlite3
+import time
+
+from app.utils.file_handler import UPLOAD_DIR, TEMP_DIR, is_image, is_video
+
+# Metadata index of files in UPLOAD_DIR
+# Kept up to date by the upload/delete routes and rebuilt from disk at startup,
+# so listing never has to walk the directory
+INDEX_DB = os.getenv("UPLOAD_INDEX_DB", os.path.join(TEMP_DIR, "upload_index.db"))
+
+SORT_COLUMNS = {
+    "created_at": "created_at",
+    "size": "size_bytes",
+    "filename": "filename"
+}
+MAX_PAGE_SIZE = 500
+
+
+_db_ready = False
+
+
+def _connect() -> sqlite3.Connection:
+    """Open the index, creating the table on first use"""
+    if not _db_ready:
+        init_index()
+
+    conn = sqlite3.connect(INDEX_DB, timeout=10)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def init_index():
+    """Create the table and its indexes if they don't exist"""
+    global _db_ready
+    os.makedirs(os.path.dirname(INDEX_DB) or ".", exist_ok=True)
+
+    with sqlite3.connect(INDEX_DB, timeout=10) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS uploads (
+                filename TEXT PRIMARY KEY,
+                file_type TEXT,
+                size_bytes INTEGER,
+                created_at REAL,
+                sha256 TEXT
+            )
+        """)
+        # Sorted listings page through (sort column, filename) without scanning
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_uploads_created ON uploads (created_at, filename)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_uploads_size ON uploads (size_bytes, filename)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_uploads_type ON uploads (file_type, created_at, filename)")
+
+    _db_ready = True
+
+
+def get_file_type(filename: str) -> str:
+    if is_image(filename):
+        return "image"
+    if is_video(filename):
+        return "video"
+    return "unknown"
+
+
+def add_file(filename: str, size_bytes: int, created_at: float | None = None, sha256: str | None = None):
+    """Add or update one file's metadata"""
+    with _connect() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO uploads (filename, file_type, size_bytes, created_at, sha256) VALUES (?, ?, ?, ?, ?)",
+            (filename, get_file_type(filename), size_bytes, created_at or time.time(), sha256)
+        )
+
+
+def remove_file(filename: str):
+    with _connect() as conn:
+        conn.execute("DELETE FROM uploads WHERE filename = ?", (filename,))
+
+
+def get_file(filename: str) -> dict | None:
+    with _connect() as conn:
+        row = conn.execute("SELECT * FROM uploads WHERE filename = ?", (filename,)).fetchone()
+    return dict(row) if row else None
+
+
+def reconcile(upload_dir: str = UPLOAD_DIR) -> dict:
+    """
+    Bring the index in line with what's actually on disk
+    Adds files that aren't indexed and drops rows for files that are gone
+    Returns counts of added and removed entries
+    """
+    init_index()
+
+    on_disk = {}
+    with os.scandir(upload_dir) as entries:
+        for entry in entries:
+            if entry.is_file():
+                stats = entry.stat()
+                on_disk[entry.name] = (stats.st_size, stats.st_ctime)
+
+    with _connect() as conn:
+        indexed = {row[0] for row in conn.execute("SELECT filename FROM uploads")}
+
+        missing = [name for name in on_disk if name not in indexed]
+        stale = [name for name in indexed if name not in on_disk]
+
+        conn.executemany(
+            "INSERT INTO uploads (filename, file_type, size_bytes, created_at) VALUES (?, ?, ?, ?)",
+            [(name, get_file_type(name), *on_disk[name]) for name in missing]
+        )
+        conn.executemany("DELETE FROM uploads WHERE filename = ?", [(name,) for name in stale])
+
+    return {"added": len(missing), "removed": len(stale)}
+
+
+def _encode_cursor(value, filename: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([value, filename]).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        value, filename = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return value, filename
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def list_files(
+    cursor: str | None = None,
+    limit: int = 50,
+    file_type: str | None = None,
+    name_prefix: str | None = None,
+    min_size: int | None = None,
+    max_size: int | None = None,
+    sort_by: str = "created_at",
+    order: str = "desc"
+) -> tuple[list[dict], str | None]:
+    """
+    One page of indexed files, filtered and sorted
+    Uses keyset pagination on (sort column, filename), so every page costs
+    the same no matter how deep into the listing it is
+    Returns (files, next_cursor); next_cursor is None on the last page
+    Raises ValueError for bad sort/order/cursor values
+    """
+    if sort_by not in SORT_COLUMNS:
+        raise ValueError(f"sort_by must be one of: {', '.join(SORT_COLUMNS)}")
+    if order not in ("asc", "desc"):
+        raise ValueError("order must be 'asc' or 'desc'")
+
+    column = SORT_COLUMNS[sort_by]
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    conditions = []
+    params = []
+
+    if file_type:
+        conditions.append("file_type = ?")
+        params.append(file_type)
+    if name_prefix:
+        # Range instead of LIKE so the primary key index is used
+        conditions.append("filename >= ? AND filename < ?")
+        params.extend([name_prefix, name_prefix + "\U0010ffff"])
+    if min_size is not None:
+        conditions.append("size_bytes >= ?")
+        params.append(min_size)
+    if max_size is not None:
+        conditions.append("size_bytes <= ?")
+        params.append(max_size)
+    if cursor:
+        value, filename = _decode_cursor(cursor)
+        comparison = "<" if order == "desc" else ">"
+        if column == "filename":
+            conditions.append(f"filename {comparison} ?")
+            params.append(filename)
+        else:
+            conditions.append(f"({column}, filename) {comparison} (?, ?)")
+            params.extend([value, filename])
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    direction = order.upper()
+    query = (
+        f"SELECT * FROM uploads {where} "
+        f"ORDER BY {column} {direction}, filename {direction} LIMIT ?"
+    )
+
+    with _connect() as conn:
+        rows = [dict(row) for row in conn.execute(query, (*params, limit + 1))]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = _encode_cursor(last[column], last["filename"])
+
+    return rows, next_cursor
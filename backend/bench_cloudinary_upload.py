@@ -0,0 +1,118 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cloudinary
+import cloudinary.uploader
+from cloudinary import utils
+
+from cloudinary_config import CloudinaryClient
+
+# Benchmark Cloudinary uploads against a local stand-in server
+# Run: python bench_cloudinary_upload.py
+#
+# The stand-in adds a fixed delay per new connection (TLS handshake) and
+# per request (round trip), roughly what a real upload pays on top of
+# sending the bytes.
+
+HANDSHAKE_SECONDS = 0.03
+ROUND_TRIP_SECONDS = 0.02
+SMALL_FILES = 24
+SMALL_FILE_BYTES = 512 * 1024
+LARGE_FILE_BYTES = 64 * 1024 * 1024
+CONCURRENCY = 4
+
+
+class StandIn(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive
+    wbufsize = 64 * 1024  # Send headers and body together
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        time.sleep(HANDSHAKE_SECONDS)
+
+    def do_POST(self):
+        remaining = int(self.headers.get('Content-Length', 0))
+        while remaining:
+            remaining -= len(self.rfile.read(min(remaining, 1024 * 1024)))
+
+        time.sleep(ROUND_TRIP_SECONDS)
+
+        data = json.dumps({'public_id': 'bench', 'secure_url': 'https://stand-in.local/bench'}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def make_file(folder, name, size):
+    path = os.path.join(folder, name)
+    with open(path, 'wb') as f:
+        f.write(os.urandom(size))
+    return path
+
+
+def old_upload(file_path):
+    """What cloudinary_config did before: configure on every call, single request"""
+    cloudinary.config(cloud_name="bench", api_key="1", api_secret="secret")
+    return cloudinary.uploader.upload(file_path, folder="bench", resource_type="auto")['secure_url']
+
+
+def timed(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+if __name__ == "__main__":
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    prefix = f"http://127.0.0.1:{server.server_port}"
+
+    folder = tempfile.mkdtemp()
+    small = [make_file(folder, f"small_{i}.jpg", SMALL_FILE_BYTES) for i in range(SMALL_FILES)]
+    large = make_file(folder, "large.mp4", LARGE_FILE_BYTES)
+    small_mb = SMALL_FILES * SMALL_FILE_BYTES / 1e6
+
+    print(f"☁️  Uploads to a local stand-in ({HANDSHAKE_SECONDS * 1000:.0f}ms handshake, {ROUND_TRIP_SECONDS * 1000:.0f}ms round trip)\n")
+    print(f"{'case':<44}{'time':>8}{'MB/s':>8}{'peak mem':>10}")
+
+    # Before: SDK default pool (one connection per host), one file at a time
+    cloudinary.config(upload_prefix=prefix)
+    cloudinary.uploader._http = utils.get_http_connector(cloudinary.config(), cloudinary.CERT_KWARGS)
+    elapsed, peak = timed(lambda: [old_upload(path) for path in small])
+    print(f"{f'{SMALL_FILES} images, sequential (before)':<44}{elapsed:>7.2f}s{small_mb / elapsed:>8.1f}{peak / 1e6:>8.1f}MB")
+
+    client = CloudinaryClient(cloud_name="bench", api_key="1", api_secret="secret", upload_prefix=prefix)
+
+    elapsed, peak = timed(lambda: [client.upload(path, "bench") for path in small])
+    print(f"{f'{SMALL_FILES} images, sequential, pooled client':<44}{elapsed:>7.2f}s{small_mb / elapsed:>8.1f}{peak / 1e6:>8.1f}MB")
+
+    # As upload_queue runs them: several worker threads sharing the client
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        elapsed, peak = timed(lambda: list(pool.map(lambda path: client.upload(path, "bench"), small)))
+    print(f"{f'{SMALL_FILES} images, {CONCURRENCY} threads, pooled client':<44}{elapsed:>7.2f}s{small_mb / elapsed:>8.1f}{peak / 1e6:>8.1f}MB")
+
+    large_mb = LARGE_FILE_BYTES / 1e6
+
+    elapsed, peak = timed(lambda: old_upload(large))
+    print(f"{f'{large_mb:.0f}MB video, single request (before)':<44}{elapsed:>7.2f}s{large_mb / elapsed:>8.1f}{peak / 1e6:>8.1f}MB")
+
+    elapsed, peak = timed(lambda: client.upload(large, "bench"))
+    print(f"{f'{large_mb:.0f}MB video, chunked':<44}{elapsed:>7.2f}s{large_mb / elapsed:>8.1f}{peak / 1e6:>8.1f}MB")
+
+    server.shutdown()
@@ -0,0 +1,80 @@
+import os
+import random
+import tempfile
+import time
+import phash_index
+from phash_index import PerceptualIndex, MAX_DISTANCE
+
+# Benchmark near-duplicate lookups against index size
+# Run: python bench_phash_index.py
+
+SIZES = [10_000, 100_000, 1_000_000]
+QUERIES = 2_000
+END_TO_END_SIZES = [10_000, 200_000]
+
+
+def flip_bits(value, count):
+    """Simulate a re-encoded copy by flipping a few random bits"""
+    for position in random.sample(range(64), count):
+        value ^= 1 << position
+    return value
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    print(f"🔎 pHash lookups within {MAX_DISTANCE} bits\n")
+    print(f"{'entries':>10}{'build':>10}{'per lookup':>14}{'found':>8}")
+
+    for size in SIZES:
+        hashes = [random.getrandbits(64) for _ in range(size)]
+        index = PerceptualIndex()
+
+        start = time.perf_counter()
+        for i, value in enumerate(hashes):
+            index.add(value, i)
+        build = time.perf_counter() - start
+
+        queries = [flip_bits(random.choice(hashes), random.randint(0, MAX_DISTANCE)) for _ in range(QUERIES)]
+
+        start = time.perf_counter()
+        found = sum(1 for query in queries if index.search(query))
+        per_lookup = (time.perf_counter() - start) / QUERIES
+
+        print(f"{size:>10}{build:>9.1f}s{per_lookup * 1e6:>11.1f}µs{found / QUERIES:>8.0%}")
+
+    # find_near_duplicate / add_to_index as the routes call them, SQLite included
+    print("\n🗄️  End to end (SQLite + sync)\n")
+    print(f"{'entries':>10}{'first sync':>12}{'per lookup':>14}{'per add':>11}")
+
+    for size in END_TO_END_SIZES:
+        phash_index.PHASH_DB = os.path.join(tempfile.mkdtemp(), 'phash.db')
+        phash_index._db_ready = False
+        phash_index._indexes.clear()
+        phash_index._rows.clear()
+        phash_index._row_ids.clear()
+        phash_index._last_row_id = 0
+
+        hashes = [random.getrandbits(64) for _ in range(size)]
+        with phash_index._connect() as conn:
+            conn.executemany(
+                "INSERT INTO hashes (namespace, phash, value) VALUES (?, ?, ?)",
+                [('bench', phash_index._signed(value), str(i)) for i, value in enumerate(hashes)]
+            )
+
+        start = time.perf_counter()
+        phash_index._sync()
+        first_sync = time.perf_counter() - start
+
+        queries = [flip_bits(random.choice(hashes), random.randint(0, MAX_DISTANCE)) for _ in range(QUERIES)]
+
+        start = time.perf_counter()
+        for query in queries:
+            phash_index.find_near_duplicate(query, 'bench')
+        per_lookup = (time.perf_counter() - start) / QUERIES
+
+        start = time.perf_counter()
+        for i in range(QUERIES):
+            phash_index.add_to_index(random.getrandbits(64), 'bench', f"new{i}")
+        per_add = (time.perf_counter() - start) / QUERIES
+
+        print(f"{size:>10}{first_sync:>11.2f}s{per_lookup * 1e6:>11.1f}µs{per_add * 1e6:>9.0f}µs")
@@ -0,0 +1,105 @@
+import cv2
+import numpy as np
+import os
+import time
+from video_processor import get_sample_indices, read_sampled_frames, iter_video_frames, adaptive_probe_count
+
+# Benchmark frame sampling cost against clip duration
+# Run: python bench_video_sampling.py
+
+BENCH_DIR = 'temp/bench'
+DURATIONS = [10, 30, 60, 120, 300]  # seconds
+FPS = 30
+SIZE = (640, 360)
+MAX_FRAMES = 20
+MODES = ['sequential', 'grab', 'seek']
+WORKER_COUNTS = [1, 2, 4, 8]
+PARALLEL_FRAMES = 300
+
+
+def make_clip(duration):
+    """Write a synthetic test clip of the given duration (cached between runs)"""
+    
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    path = os.path.join(BENCH_DIR, f"clip_{duration}s.mp4")
+    
+    if os.path.exists(path):
+        return path
+    
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), FPS, SIZE)
+    
+    for i in range(duration * FPS):
+        frame = np.full((SIZE[1], SIZE[0], 3), i % 256, dtype=np.uint8)
+        cv2.putText(frame, str(i), (20, 200), cv2.FONT_HERSHEY_SIMPLEX, 4, (255, 255, 255), 6)
+        writer.write(frame)
+    
+    writer.release()
+    return path
+
+
+def time_mode(path, mode):
+    """Return (seconds, frames read) for sampling MAX_FRAMES frames"""
+    
+    video = cv2.VideoCapture(path)
+    total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+    indices = get_sample_indices(total_frames, MAX_FRAMES)
+    
+    start = time.perf_counter()
+    frames = list(read_sampled_frames(video, indices, mode=mode))
+    elapsed = time.perf_counter() - start
+    
+    video.release()
+    return elapsed, len(frames)
+
+
+def time_adaptive(path):
+    """Return (seconds, probes) for adaptive sampling of MAX_FRAMES frames"""
+    
+    video = cv2.VideoCapture(path)
+    probes = adaptive_probe_count(int(video.get(cv2.CAP_PROP_FRAME_COUNT)), MAX_FRAMES)
+    video.release()
+    
+    start = time.perf_counter()
+    frames = list(iter_video_frames(path, MAX_FRAMES, workers=1, sampling='adaptive'))
+    return time.perf_counter() - start, probes
+
+
+def time_workers(path, workers):
+    """Return seconds to decode PARALLEL_FRAMES frames with a given worker count"""
+    
+    start = time.perf_counter()
+    frames = list(iter_video_frames(path, PARALLEL_FRAMES, mode='grab', workers=workers, sampling='uniform'))
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    print(f"🎬 Sampling {MAX_FRAMES} frames from {SIZE[0]}x{SIZE[1]} @ {FPS}fps clips\n")
+    print(f"{'duration':>10}" + "".join(f"{mode:>14}" for mode in MODES))
+    
+    for duration in DURATIONS:
+        path = make_clip(duration)
+        row = f"{duration:>9}s"
+        
+        for mode in MODES:
+            elapsed, count = time_mode(path, mode)
+            row += f"{elapsed * 1000:>11.1f}ms"
+            row += " " if count == MAX_FRAMES else "!"
+        
+        print(row)
+    
+    print("\n(! = fewer frames than requested)")
+    
+    print(f"\n🎯 Adaptive sampling, {MAX_FRAMES} frames (auto mode)\n")
+    
+    for duration in DURATIONS:
+        elapsed, probes = time_adaptive(make_clip(duration))
+        print(f"{duration:>9}s {elapsed * 1000:>10.1f}ms   {probes} probes")
+    
+    path = make_clip(DURATIONS[-1])
+    print(f"\n⚡ Parallel segment decoding, {PARALLEL_FRAMES} frames from {DURATIONS[-1]}s clip ({os.cpu_count()} CPUs)\n")
+    
+    baseline = None
+    for workers in WORKER_COUNTS:
+        elapsed = time_workers(path, workers)
+        baseline = baseline or elapsed
+        print(f"{workers:>4} workers {elapsed * 1000:>10.1f}ms   x{baseline / elapsed:.2f}")
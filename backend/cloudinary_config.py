@@ -1,40 +1,124 @@
+import os
+import threading
+
 import cloudinary
 import cloudinary.uploader
 import cloudinary.api
+from cloudinary import utils
+
+# Cloudinary settings (override with environment variables)
+CLOUDINARY_CLOUD_NAME = os.getenv('CLOUDINARY_CLOUD_NAME', "dillobvw3")  # Replace with yours
+CLOUDINARY_API_KEY = os.getenv('CLOUDINARY_API_KEY', "611239543672646")  # Replace with yours
+CLOUDINARY_API_SECRET = os.getenv('CLOUDINARY_API_SECRET', "qup0tpwtmGtdlT65Gc1Ws5qrWyU")  # Replace with yours
+CLOUDINARY_UPLOAD_PREFIX = os.getenv('CLOUDINARY_UPLOAD_PREFIX')  # e.g. a local stand-in server
+
+CLOUDINARY_POOL_SIZE = int(os.getenv('CLOUDINARY_POOL_SIZE', 8))  # Kept-alive connections
+CLOUDINARY_LARGE_FILE_BYTES = int(os.getenv('CLOUDINARY_LARGE_FILE_BYTES', 20 * 1024 * 1024))
+CLOUDINARY_CHUNK_BYTES = int(os.getenv('CLOUDINARY_CHUNK_BYTES', 20 * 1024 * 1024))
+CLOUDINARY_TIMEOUT_SECONDS = float(os.getenv('CLOUDINARY_TIMEOUT_SECONDS', 120))
+
+_client = None
+_client_lock = threading.Lock()
+
+
+class CloudinaryClient:
+    """
+    Cloudinary client (use get_client() for the shared, configured-once instance)
+
+    Uploads go through one connection pool (so repeated and parallel
+    uploads reuse connections), and files above large_file_bytes are sent
+    in chunks with upload_large instead of one huge request.
+    """
+
+    def __init__(
+        self,
+        cloud_name=CLOUDINARY_CLOUD_NAME,
+        api_key=CLOUDINARY_API_KEY,
+        api_secret=CLOUDINARY_API_SECRET,
+        upload_prefix=CLOUDINARY_UPLOAD_PREFIX,
+        pool_size=CLOUDINARY_POOL_SIZE,
+        large_file_bytes=CLOUDINARY_LARGE_FILE_BYTES,
+        chunk_bytes=CLOUDINARY_CHUNK_BYTES,
+        timeout=CLOUDINARY_TIMEOUT_SECONDS
+    ):
+        settings = {'cloud_name': cloud_name, 'api_key': api_key, 'api_secret': api_secret}
+        if upload_prefix:
+            settings['upload_prefix'] = upload_prefix
+        cloudinary.config(**settings)
+
+        # The SDK's default pool keeps a single connection per host, so
+        # concurrent uploads (upload_queue workers) would each open and throw
+        # away a new one. _http is private, hence the pin in requirements.txt
+        if hasattr(cloudinary.uploader, '_http'):
+            cloudinary.uploader._http = utils.get_http_connector(
+                cloudinary.config(),
+                {**cloudinary.CERT_KWARGS, 'maxsize': pool_size, 'block': False}
+            )
+        else:
+            print("Warning: cloudinary.uploader has no _http, using the SDK's default connection pool")
+
+        self.large_file_bytes = large_file_bytes
+        self.chunk_bytes = chunk_bytes
+        self.timeout = timeout
+
+    def upload(self, file_path, folder="deepfake-uploads"):
+        """
+        Upload a file (chunked if it's large)
+
+        Returns:
+            The file's HTTPS URL
+
+        Raises:
+            cloudinary.exceptions.Error (or a connection error) on failure
+        """
+
+        options = {'folder': folder, 'resource_type': "auto", 'timeout': self.timeout}
+
+        if os.path.getsize(file_path) > self.large_file_bytes:
+            result = cloudinary.uploader.upload_large(file_path, chunk_size=self.chunk_bytes, **options)
+        else:
+            result = cloudinary.uploader.upload(file_path, **options)
+
+        return result['secure_url']
+
+    def delete(self, public_id):
+        result = cloudinary.uploader.destroy(public_id)
+        return result['result'] == 'ok'
+
+    def resource(self, public_id):
+        return cloudinary.api.resource(public_id)
+
+
+def get_client():
+    """The shared client (created on first use)"""
+
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = CloudinaryClient()
+    return _client
+
 
 # Configure Cloudinary
 def configure_cloudinary():
-    cloudinary.config(
-        cloud_name = "dillobvw3",  # Replace with yours
-        api_key = "611239543672646",        # Replace with yours
-        api_secret = "qup0tpwtmGtdlT65Gc1Ws5qrWyU"   # Replace with yours
-    )
-
-def upload_file_to_cloudinary(file_path, folder="deepfake-uploads"):
-    """Upload file to Cloudinary"""
+    get_client()
+
+def upload_file_to_cloudinary(file_path, folder="deepfake-uploads", raise_errors=False):
+    """Upload file to Cloudinary (raise_errors=True re-raises instead of returning None)"""
     try:
-        configure_cloudinary()
-        
-        # Upload
-        result = cloudinary.uploader.upload(
-            file_path,
-            folder=folder,
-            resource_type="auto"  # Automatically detects image/video
-        )
-        
-        return result['secure_url']  # Returns HTTPS URL
-    
+        return get_client().upload(file_path, folder=folder)  # Returns HTTPS URL
+
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"Error uploading to Cloudinary: {e}")
         return None
 
 def delete_file_from_cloudinary(public_id):
     """Delete file from Cloudinary"""
     try:
-        configure_cloudinary()
-        result = cloudinary.uploader.destroy(public_id)
-        return result['result'] == 'ok'
-    
+        return get_client().delete(public_id)
+
     except Exception as e:
         print(f"Error deleting from Cloudinary: {e}")
         return False
@@ -42,13 +126,8 @@ def delete_file_from_cloudinary(public_id):
 def get_file_info(public_id):
     """Get file information"""
     try:
-        configure_cloudinary()
-        result = cloudinary.api.resource(public_id)
-        return result
-    
+        return get_client().resource(public_id)
+
     except Exception as e:
         print(f"Error getting file info: {e}")
         return None
-
-
-
@@ -0,0 +1,73 @@
+import threading
+from http.server import ThreadingHTTPServer
+
+import cv2
+import numpy as np
+import pytest
+
+# Fixtures shared by the test modules: synthetic video clips and local HTTP
+# stand-ins. Files go under pytest's tmp_path_factory, so they're cleaned up
+# with the rest of pytest's temp folders.
+
+
+def write_clip(path, frames, size=(96, 64), fourcc='MJPG', fps=25, pattern='numbered', seed=0):
+    """
+    Write a synthetic clip
+
+    Patterns:
+        'numbered' - flat frames with the frame index as pixel value and
+                     printed on them, so frames can be told apart
+        'noise'    - random pixels; no two frames alike, and barely compressible
+        'blocks'   - random 8x12 blocks scaled up: frames differ, but have
+                     enough structure for perceptual hashes
+    """
+
+    width, height = size
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+    rng = np.random.default_rng(seed)
+
+    for i in range(frames):
+        if pattern == 'noise':
+            image = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+        elif pattern == 'blocks':
+            small = rng.integers(0, 255, (8, 12, 3), dtype=np.uint8)
+            image = cv2.resize(small, size, interpolation=cv2.INTER_NEAREST)
+        else:
+            image = np.full((height, width, 3), i % 256, dtype=np.uint8)
+            cv2.putText(image, str(i), (5, height - 19), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+        writer.write(image)
+
+    writer.release()
+    return path
+
+
+@pytest.fixture(scope='session')
+def make_clip(tmp_path_factory):
+    """Factory for clips in a fresh temp folder: make_clip(frames, name=..., **write_clip options) -> path"""
+
+    def make(frames=100, name='clip.avi', **options):
+        return write_clip(str(tmp_path_factory.mktemp('clip') / name), frames, **options)
+
+    return make
+
+
+@pytest.fixture(scope='module')
+def serve():
+    """
+    Factory that serves a BaseHTTPRequestHandler class on a free local
+    port: serve(Handler) -> base URL. Servers stop when the module is done.
+    """
+
+    servers = []
+
+    def start(handler):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+
+    yield start
+
+    for server in servers:
+        server.shutdown()
+        server.server_close()
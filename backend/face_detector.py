@@ -0,0 +1,263 @@
+import os
+import threading
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+# Face crops for inference
+#
+# The model only needs the faces, so frames are cut down to an aligned
+# crop of the largest face before inference. Detection runs on a
+# downscaled copy of the frame. Across a video's sampled frames, boxes
+# are followed by template matching, and the detector only runs again
+# when a track is lost or the scene changes.
+#
+# Detectors, in order of preference:
+#   - YuNet (cv2.FaceDetectorYN) if FACE_DETECTOR_MODEL points at its
+#     .onnx file; also gives eye landmarks, used to level the crop
+#   - The Haar cascade bundled with opencv-python (cv2.data.haarcascades)
+# If neither is available, frames go to the model uncropped.
+
+FACE_DETECTOR_MODEL = os.getenv('FACE_DETECTOR_MODEL')  # e.g. face_detection_yunet_2023mar.onnx
+FACE_CROP_ENABLED = os.getenv('FACE_CROP_ENABLED', 'true').lower() == 'true'
+FACE_DETECT_WIDTH = int(os.getenv('FACE_DETECT_WIDTH', 320))  # Detection/tracking resolution
+FACE_CROP_SIZE = int(os.getenv('FACE_CROP_SIZE', 224))  # Side of the square crop sent to the model
+FACE_MARGIN = float(os.getenv('FACE_MARGIN', 0.3))  # Context kept around the box, as a fraction of its size
+FACE_MIN_SCORE = float(os.getenv('FACE_MIN_SCORE', 0.8))  # YuNet confidence
+FACE_TRACK_MIN_SCORE = float(os.getenv('FACE_TRACK_MIN_SCORE', 0.6))  # Template match score to keep a track
+FACE_SCENE_CHANGE = float(os.getenv('FACE_SCENE_CHANGE', 0.6))  # Histogram correlation below this is a cut
+
+HAAR_CASCADE = 'haarcascade_frontalface_default.xml'
+
+# box: (x, y, w, h) in full-frame pixels; landmarks: (right eye, left eye) or None
+Face = namedtuple('Face', ['box', 'landmarks', 'score'])
+
+_local = threading.local()
+
+
+def _load_detector():
+    """
+    Build a detect(small_bgr) -> [Face] function, or None if no detector is available
+
+    Detectors aren't thread-safe, so each thread loads its own
+    """
+
+    if FACE_DETECTOR_MODEL and hasattr(cv2, 'FaceDetectorYN') and os.path.exists(FACE_DETECTOR_MODEL):
+        yunet = cv2.FaceDetectorYN.create(FACE_DETECTOR_MODEL, '', (320, 320), FACE_MIN_SCORE)
+
+        def detect_yunet(image):
+            yunet.setInputSize((image.shape[1], image.shape[0]))
+            _, rows = yunet.detect(image)
+            if rows is None:
+                return []
+            return [
+                Face(tuple(row[0:4]), (tuple(row[4:6]), tuple(row[6:8])), float(row[14]))
+                for row in rows
+            ]
+
+        return detect_yunet
+
+    cascade_dir = getattr(getattr(cv2, 'data', None), 'haarcascades', None)
+    if hasattr(cv2, 'CascadeClassifier') and cascade_dir and os.path.exists(os.path.join(cascade_dir, HAAR_CASCADE)):
+        cascade = cv2.CascadeClassifier(os.path.join(cascade_dir, HAAR_CASCADE))
+
+        def detect_haar(image):
+            gray = cv2.equalizeHist(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))
+            boxes = cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(24, 24))
+            return [Face(tuple(box), None, 1.0) for box in boxes]
+
+        return detect_haar
+
+    return None
+
+
+def get_detector():
+    """This thread's face detector (None if none is available or cropping is off)"""
+
+    if not FACE_CROP_ENABLED:
+        return None
+
+    if not hasattr(_local, 'detector'):
+        _local.detector = _load_detector()
+        if _local.detector is None:
+            print("⚠️ No face detector available, analyzing whole frames")
+
+    return _local.detector
+
+
+def pipeline_version(model_version):
+    """
+    Version string for cached results: a crop and a whole frame give
+    different predictions, so results of one must not be reused for the other
+    """
+
+    if get_detector() is None:
+        return model_version
+    return f"{model_version}+face{FACE_CROP_SIZE}"
+
+
+def _downscale(image):
+    """(small copy at most FACE_DETECT_WIDTH wide, scale factor from small to full)"""
+
+    height, width = image.shape[:2]
+    if width <= FACE_DETECT_WIDTH:
+        return image, 1.0
+
+    scale = width / FACE_DETECT_WIDTH
+    small = cv2.resize(image, (FACE_DETECT_WIDTH, round(height / scale)), interpolation=cv2.INTER_AREA)
+    return small, scale
+
+
+def _scale_face(face, scale):
+    box = tuple(value * scale for value in face.box)
+    landmarks = None
+    if face.landmarks is not None:
+        landmarks = tuple((x * scale, y * scale) for x, y in face.landmarks)
+    return Face(box, landmarks, face.score)
+
+
+def crop_face(image, face, size=FACE_CROP_SIZE, margin=FACE_MARGIN):
+    """
+    Square crop around a face, resized to size x size
+
+    With eye landmarks the crop is also rotated so the eyes are level.
+    Parts of the crop outside the frame repeat the edge pixels.
+    """
+
+    x, y, w, h = face.box
+    center = (x + w / 2, y + h / 2)
+    side = max(w, h) * (1 + margin)
+
+    angle = 0.0
+    if face.landmarks is not None:
+        (right_x, right_y), (left_x, left_y) = face.landmarks
+        angle = np.degrees(np.arctan2(left_y - right_y, left_x - right_x))
+
+    # Rotate about the face center, scale the square to `size` and move it
+    # to the origin, all in one warp
+    matrix = cv2.getRotationMatrix2D(center, angle, size / side)
+    matrix[0, 2] += size / 2 - center[0]
+    matrix[1, 2] += size / 2 - center[1]
+
+    return cv2.warpAffine(image, matrix, (size, size), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+
+def detect_faces(image, detector=None):
+    """
+    Detect faces in a full-size BGR image
+
+    Returns:
+        List of Face, largest first
+    """
+
+    detector = detector or get_detector()
+    if detector is None or image is None:
+        return []
+
+    small, scale = _downscale(image)
+    faces = [_scale_face(face, scale) for face in detector(small)]
+
+    return sorted(faces, key=lambda face: face.box[2] * face.box[3], reverse=True)
+
+
+def crop_primary_face(image, detector=None):
+    """Aligned crop of the largest face in a still image, or None if there's no face"""
+
+    faces = detect_faces(image, detector)
+    return crop_face(image, faces[0]) if faces else None
+
+
+class FaceTracker:
+    """
+    Follows faces across the sampled frames of one video
+
+    Call update() with each frame in order. Known faces are located in
+    the new frame by template matching around their last position; the
+    detector only runs on the first frame, when any track is lost and
+    when the scene changes (a drop in histogram correlation).
+    """
+
+    def __init__(self, detector=None):
+        self.detector = detector or get_detector()
+        self.detector_calls = 0
+        self.tracked_frames = 0
+
+        self._faces = []  # Last known faces, in downscaled coordinates
+        self._previous = None  # Previous downscaled grayscale frame
+        self._histogram = None
+
+    @property
+    def enabled(self):
+        return self.detector is not None
+
+    def _detect(self, small):
+        self.detector_calls += 1
+        faces = self.detector(small)
+        return sorted(faces, key=lambda face: face.box[2] * face.box[3], reverse=True)
+
+    def _track(self, face, gray):
+        """Find a face's template from the previous frame in gray; None if it's lost"""
+
+        x, y, w, h = (int(round(value)) for value in face.box)
+        template = self._previous[max(0, y):y + h, max(0, x):x + w]
+        if template.shape[0] < 8 or template.shape[1] < 8:
+            return None
+
+        # Search one box size around the last position (sampled frames can
+        # be a second or more apart)
+        left, top = max(0, x - w), max(0, y - h)
+        window = gray[top:y + 2 * h, left:x + 2 * w]
+        if window.shape[0] < template.shape[0] or window.shape[1] < template.shape[1]:
+            return None
+
+        scores = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+        _, best, _, (match_x, match_y) = cv2.minMaxLoc(scores)
+        if best < FACE_TRACK_MIN_SCORE:
+            return None
+
+        dx = left + match_x - max(0, x)
+        dy = top + match_y - max(0, y)
+        landmarks = None
+        if face.landmarks is not None:
+            landmarks = tuple((px + dx, py + dy) for px, py in face.landmarks)
+
+        return Face((face.box[0] + dx, face.box[1] + dy, face.box[2], face.box[3]), landmarks, float(best))
+
+    def update(self, image):
+        """
+        Faces in the next frame
+
+        Returns:
+            List of Face in full-frame coordinates, largest first (empty if
+            there's no face or no detector)
+        """
+
+        if self.detector is None:
+            return []
+
+        small, scale = _downscale(image)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        histogram = cv2.calcHist([gray], [0], None, [32], [0, 256])
+
+        scene_changed = (
+            self._histogram is None or
+            cv2.compareHist(self._histogram, histogram, cv2.HISTCMP_CORREL) < FACE_SCENE_CHANGE
+        )
+
+        faces = None
+        if self._faces and not scene_changed:
+            faces = [self._track(face, gray) for face in self._faces]
+            if any(face is None for face in faces):
+                faces = None
+            else:
+                self.tracked_frames += 1
+
+        if faces is None:
+            faces = self._detect(small)
+
+        self._faces = faces
+        self._previous = gray
+        self._histogram = histogram
+
+        return [_scale_face(face, scale) for face in faces]
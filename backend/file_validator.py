@@ -0,0 +1,52 @@
+import os
+
+# Configuration (same limits as app/utils/file_handler.py)
+ALLOWED_IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
+ALLOWED_VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv'}
+MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB in bytes
+
+
+def get_file_extension(filename):
+    """Extract file extension from filename"""
+    return os.path.splitext(filename)[1].lower()
+
+
+def is_image(filename):
+    """Check if file is an image"""
+    return get_file_extension(filename) in ALLOWED_IMAGE_EXTENSIONS
+
+
+def is_video(filename):
+    """Check if file is a video"""
+    return get_file_extension(filename) in ALLOWED_VIDEO_EXTENSIONS
+
+
+def validate_file(file):
+    """
+    Validate an uploaded Flask file
+    
+    Args:
+        file: werkzeug FileStorage from request.files
+    
+    Returns:
+        (is_valid, message) tuple
+    """
+    
+    if not file or not file.filename:
+        return False, "No filename provided"
+    
+    if not (is_image(file.filename) or is_video(file.filename)):
+        allowed = ALLOWED_IMAGE_EXTENSIONS | ALLOWED_VIDEO_EXTENSIONS
+        return False, f"File type not allowed. Allowed types: {', '.join(sorted(allowed))}"
+    
+    # Check size without reading the file into memory
+    file.stream.seek(0, os.SEEK_END)
+    file_size = file.stream.tell()
+    file.stream.seek(0)
+    
+    if file_size > MAX_FILE_SIZE:
+        size_mb = file_size / (1024 * 1024)
+        max_mb = MAX_FILE_SIZE / (1024 * 1024)
+        return False, f"File too large ({size_mb:.2f}MB). Maximum size: {max_mb}MB"
+    
+    return True, "Valid file"
@@ -0,0 +1,257 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from process_utils import process_alive
+
+# Background jobs for slow endpoints (e.g. video analysis)
+#
+# Job state lives in a small SQLite file so any gunicorn worker can answer
+# status/result polls; the work itself runs on a bounded pool of threads
+# inside the process that accepted the job. No external broker needed.
+#
+# A job's function only exists in the memory of that process, so jobs
+# still queued or running when it exits can never finish. Each row
+# records the pid that owns it, and a process marks the unfinished jobs
+# of owners that are gone as failed the first time it opens the database.
+
+JOBS_DB = os.getenv('JOBS_DB', 'temp/jobs.db')
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+MAX_PENDING_JOBS = int(os.getenv('MAX_PENDING_JOBS', 50))
+JOB_TTL_SECONDS = int(os.getenv('JOB_TTL_SECONDS', 3600))  # Keep finished jobs for 1 hour
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+_queue = queue.Queue(maxsize=MAX_PENDING_JOBS)
+_tasks = {}
+_workers = []
+_lock = threading.Lock()
+_db_ready = False
+
+
+class QueueFullError(Exception):
+    """Raised when too many jobs are already waiting"""
+
+
+def _connect():
+    """Open a connection to the jobs database"""
+
+    os.makedirs(os.path.dirname(JOBS_DB) or '.', exist_ok=True)
+    conn = sqlite3.connect(JOBS_DB, timeout=10)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def init_db():
+    """Create the jobs table if it doesn't exist"""
+
+    global _db_ready
+    if _db_ready == os.getpid():
+        return
+
+    with _connect() as conn:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT,
+                status TEXT,
+                frames_done INTEGER DEFAULT 0,
+                frames_total INTEGER DEFAULT 0,
+                created_at REAL,
+                started_at REAL,
+                finished_at REAL,
+                result TEXT,
+                error TEXT,
+                owner_pid INTEGER
+            )
+        ''')
+
+        # Databases created before jobs had an owner
+        columns = [row['name'] for row in conn.execute("PRAGMA table_info(jobs)")]
+        if 'owner_pid' not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN owner_pid INTEGER")
+
+    _db_ready = os.getpid()
+    fail_orphaned_jobs()
+
+
+def fail_orphaned_jobs():
+    """
+    Mark queued/running jobs whose owning process has exited as failed
+
+    Returns:
+        Number of jobs marked
+    """
+
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT id, owner_pid FROM jobs WHERE status IN (?, ?)", (STATUS_QUEUED, STATUS_RUNNING)
+        ).fetchall()
+
+        orphans = [row['id'] for row in rows if row['owner_pid'] is None or not process_alive(row['owner_pid'])]
+
+        conn.executemany(
+            "UPDATE jobs SET status = ?, finished_at = ?, error = ? WHERE id = ? AND status IN (?, ?)",
+            [
+                (STATUS_FAILED, time.time(), "Interrupted by a server restart", job_id, STATUS_QUEUED, STATUS_RUNNING)
+                for job_id in orphans
+            ]
+        )
+
+    if orphans:
+        print(f"⚠️ Marked {len(orphans)} interrupted job(s) as failed")
+
+    return len(orphans)
+
+
+def _update(job_id, **fields):
+    """Update columns of one job row"""
+
+    columns = ', '.join(f"{name} = ?" for name in fields)
+    with _connect() as conn:
+        conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+
+def _worker():
+    """Pull job ids off the queue and run them until the process exits"""
+
+    while True:
+        job_id = _queue.get()
+        func, args, kwargs = _tasks.pop(job_id)
+
+        _update(job_id, status=STATUS_RUNNING, started_at=time.time())
+
+        def progress(frames_done, frames_total):
+            _update(job_id, frames_done=frames_done, frames_total=frames_total)
+
+        try:
+            result = func(*args, progress=progress, **kwargs)
+            _update(job_id, status=STATUS_DONE, finished_at=time.time(), result=json.dumps(result))
+
+        except Exception as e:
+            print(f"❌ Job {job_id} failed: {e}")
+            _update(job_id, status=STATUS_FAILED, finished_at=time.time(), error=str(e))
+
+        finally:
+            _queue.task_done()
+
+
+def _start_workers():
+    """Start the worker threads once per process"""
+
+    with _lock:
+        if _workers:
+            return
+
+        init_db()
+
+        for _ in range(JOB_WORKERS):
+            thread = threading.Thread(target=_worker, daemon=True)
+            thread.start()
+            _workers.append(thread)
+
+
+def purge_old_jobs(ttl_seconds=JOB_TTL_SECONDS):
+    """Delete finished jobs older than ttl_seconds"""
+
+    with _connect() as conn:
+        conn.execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+            (STATUS_DONE, STATUS_FAILED, time.time() - ttl_seconds)
+        )
+
+
+def submit_job(kind, func, *args, **kwargs):
+    """
+    Queue func to run in the background
+
+    func is called as func(*args, progress=callback, **kwargs) and must
+    return something JSON serializable. callback(frames_done, frames_total)
+    updates the job's progress.
+
+    Args:
+        kind: Short label for the job type (e.g. 'analyze-video')
+        func: Function to run
+
+    Returns:
+        New job id
+
+    Raises:
+        QueueFullError if MAX_PENDING_JOBS jobs are already waiting
+    """
+
+    _start_workers()
+    purge_old_jobs()
+
+    job_id = uuid.uuid4().hex
+
+    with _connect() as conn:
+        conn.execute(
+            "INSERT INTO jobs (id, kind, status, created_at, owner_pid) VALUES (?, ?, ?, ?, ?)",
+            (job_id, kind, STATUS_QUEUED, time.time(), os.getpid())
+        )
+
+    _tasks[job_id] = (func, args, kwargs)
+
+    try:
+        _queue.put_nowait(job_id)
+    except queue.Full:
+        _tasks.pop(job_id, None)
+        with _connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        raise QueueFullError("Too many jobs in progress. Please try again later.")
+
+    return job_id
+
+
+def get_job(job_id):
+    """
+    Get job status and progress
+
+    Returns:
+        Dict with status, progress and (when finished) result/error,
+        or None if the job doesn't exist
+    """
+
+    init_db()
+
+    with _connect() as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+    if row is None:
+        return None
+
+    frames_done = row['frames_done']
+    frames_total = row['frames_total']
+
+    # Estimate remaining time from the average time per frame so far
+    eta_seconds = None
+    if row['status'] == STATUS_RUNNING and frames_done and frames_total:
+        elapsed = time.time() - row['started_at']
+        eta_seconds = round(elapsed / frames_done * (frames_total - frames_done), 1)
+    elif row['status'] == STATUS_DONE:
+        eta_seconds = 0
+
+    return {
+        'job_id': row['id'],
+        'kind': row['kind'],
+        'status': row['status'],
+        'progress': {
+            'frames_done': frames_done,
+            'frames_total': frames_total,
+            'percent': round(frames_done / frames_total * 100, 1) if frames_total else 0,
+            'eta_seconds': eta_seconds
+        },
+        'created_at': row['created_at'],
+        'started_at': row['started_at'],
+        'finished_at': row['finished_at'],
+        'result': json.loads(row['result']) if row['result'] else None,
+        'error': row['error']
+    }
@@ -0,0 +1,201 @@
+import argparse
+import glob
+import json
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from request_logger import LOG_FILE
+
+# Columnar archive of the request log
+#
+# Rotated segments (requests.log.1, .2, ...) beyond the newest
+# LOG_BACKUP_COUNT are compacted into Parquet, partitioned by day
+# (logs/archive/date=YYYY-MM-DD/*.parquet), and deleted.
+# Queries read only the columns and days they need.
+#
+# Usage:
+#   python log_archive.py compact [--keep 5]
+#   python log_archive.py latency --endpoint /api/analyze-video --days 7 --by hour
+
+ARCHIVE_DIR = os.getenv('LOG_ARCHIVE_DIR', 'logs/archive')
+
+SCHEMA = pa.schema([
+    ('timestamp', pa.timestamp('s')),
+    ('endpoint', pa.string()),
+    ('method', pa.string()),
+    ('ip_address', pa.string()),
+    ('user_agent', pa.string()),
+    ('status_code', pa.int16()),
+    ('response_time_ms', pa.float64()),
+    ('error', pa.string()),
+    ('date', pa.string())
+])
+
+PARTITIONING = ds.partitioning(pa.schema([('date', pa.string())]), flavor='hive')
+
+
+def _read_segment(path):
+    """Parse one JSON-lines segment into a table, skipping broken lines"""
+
+    columns = {name: [] for name in SCHEMA.names}
+
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                timestamp = datetime.strptime(entry['timestamp'], '%Y-%m-%d %H:%M:%S')
+            except (ValueError, KeyError):
+                continue
+
+            columns['timestamp'].append(timestamp)
+            columns['date'].append(timestamp.strftime('%Y-%m-%d'))
+            for name in ('endpoint', 'method', 'ip_address', 'user_agent', 'status_code', 'response_time_ms', 'error'):
+                columns[name].append(entry.get(name))
+
+    return pa.table(columns, schema=SCHEMA)
+
+
+def compact_logs(log_file=LOG_FILE, archive_dir=ARCHIVE_DIR, keep=0):
+    """
+    Move rotated log segments into the Parquet archive
+
+    Args:
+        keep: Leave the newest `keep` segments (.1 to .keep) as they are
+
+    Returns:
+        Number of log entries archived
+    """
+
+    archived = 0
+
+    # Oldest first; claim each segment by renaming it so a concurrent
+    # rotation or compaction can't touch it
+    segments = [
+        path for path in glob.glob(f"{log_file}.*")
+        if path.rsplit('.', 1)[1].isdigit() and int(path.rsplit('.', 1)[1]) > keep
+    ]
+    segments.sort(key=lambda path: int(path.rsplit('.', 1)[1]), reverse=True)
+
+    for segment in segments:
+        claimed = f"{segment}.{uuid.uuid4().hex}.compacting"
+        try:
+            os.rename(segment, claimed)
+        except FileNotFoundError:
+            continue
+
+        table = _read_segment(claimed)
+
+        if table.num_rows:
+            ds.write_dataset(
+                table,
+                archive_dir,
+                format='parquet',
+                partitioning=PARTITIONING,
+                basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+                existing_data_behavior='overwrite_or_ignore'
+            )
+
+        os.remove(claimed)
+        archived += table.num_rows
+
+    return archived
+
+
+def load_archive(archive_dir=ARCHIVE_DIR):
+    """Open the archive as a pyarrow dataset"""
+    return ds.dataset(archive_dir, format='parquet', partitioning=PARTITIONING, schema=SCHEMA)
+
+
+def query_latency(endpoint=None, start=None, end=None, by='hour', percentiles=(50, 95, 99), archive_dir=ARCHIVE_DIR):
+    """
+    Latency percentiles over time from the archive
+
+    Only the timestamp/endpoint/latency columns are read, and day
+    partitions outside [start, end) are skipped entirely.
+
+    Args:
+        endpoint: Only this endpoint (all endpoints if None)
+        start, end: datetime range (defaults to the last 7 days)
+        by: 'hour' or 'day' buckets
+        percentiles: Which percentiles to report
+
+    Returns:
+        List of dicts {period, requests, p50, p95, ...} sorted by period
+    """
+
+    if not os.path.isdir(archive_dir):
+        return []
+
+    end = end or datetime.now()
+    start = start or end - timedelta(days=7)
+
+    condition = (
+        (ds.field('date') >= start.strftime('%Y-%m-%d')) &
+        (ds.field('date') <= end.strftime('%Y-%m-%d')) &
+        (ds.field('timestamp') >= pa.scalar(start, pa.timestamp('s'))) &
+        (ds.field('timestamp') < pa.scalar(end, pa.timestamp('s'))) &
+        ds.field('response_time_ms').is_valid()
+    )
+    if endpoint:
+        condition = condition & (ds.field('endpoint') == endpoint)
+
+    table = load_archive(archive_dir).to_table(columns=['timestamp', 'response_time_ms'], filter=condition)
+
+    if table.num_rows == 0:
+        return []
+
+    period = pc.floor_temporal(table['timestamp'], unit=by)
+    grouped = pa.table({'period': period, 'latency': table['response_time_ms']}).group_by('period').aggregate([
+        ('latency', 'count'),
+        ('latency', 'tdigest', pc.TDigestOptions(q=[p / 100 for p in percentiles]))
+    ])
+
+    rows = []
+    for row in grouped.sort_by('period').to_pylist():
+        result = {'period': row['period'].isoformat(), 'requests': row['latency_count']}
+        for p, value in zip(percentiles, row['latency_tdigest']):
+            result[f"p{p:g}"] = round(value, 2)
+        rows.append(result)
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Request log archive")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    compact = commands.add_parser('compact', help="Move rotated log segments into the Parquet archive")
+    compact.add_argument('--keep', type=int, default=0, help="Newest segments to leave as text (default: 0)")
+
+    latency = commands.add_parser('latency', help="Latency percentiles over time")
+    latency.add_argument('--endpoint', help="e.g. /api/analyze-video (default: all)")
+    latency.add_argument('--days', type=float, default=7, help="How far back to look (default: 7)")
+    latency.add_argument('--by', choices=['hour', 'day'], default='hour')
+    latency.add_argument('--percentile', type=float, action='append', help="Repeatable (default: 50, 95, 99)")
+
+    args = parser.parse_args()
+
+    if args.command == 'compact':
+        print(f"✅ Archived {compact_logs(keep=args.keep)} log entries")
+        return
+
+    end = datetime.now()
+    rows = query_latency(
+        endpoint=args.endpoint,
+        start=end - timedelta(days=args.days),
+        end=end,
+        by=args.by,
+        percentiles=tuple(args.percentile or (50, 95, 99))
+    )
+
+    for row in rows:
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
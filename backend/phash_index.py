@@ -0,0 +1,306 @@
+import cv2
+import numpy as np
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from itertools import combinations
+
+# Perceptual-hash index for near-duplicate images and frames
+#
+# Exact content hashes (result_cache) miss re-encoded, resized or
+# recompressed copies. A 64-bit pHash survives those, and two copies end up
+# a few bits apart. Lookups use multi-index hashing: the hash is split into
+# CHUNKS 16-bit pieces, and by the pigeonhole principle any hash within
+# distance r shares at least one piece within distance r // CHUNKS, so only
+# a handful of buckets need probing even with millions of entries.
+#
+# Each worker keeps its own in-memory copy. Rows other workers added are
+# picked up by a background sync every PHASH_SYNC_SECONDS, so lookups never
+# wait on SQLite, and only the newest PHASH_MAX_ENTRIES rows are kept.
+
+PHASH_DB = os.getenv('PHASH_DB', 'temp/phash_index.db')
+MAX_DISTANCE = int(os.getenv('PHASH_MAX_DISTANCE', 6))  # Bits out of 64
+MAX_ENTRIES = int(os.getenv('PHASH_MAX_ENTRIES', 200000))
+SYNC_SECONDS = float(os.getenv('PHASH_SYNC_SECONDS', 2))
+PRUNE_EVERY = 1000  # Adds between deletes of rows past MAX_ENTRIES
+SYNC_BATCH = 5000  # Rows loaded per hold of the lock
+
+HASH_BITS = 64
+CHUNKS = 4
+CHUNK_BITS = HASH_BITS // CHUNKS
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+_indexes = {}
+_masks = {}
+_rows = deque()  # (row id, namespace, hash) in the order they were synced
+_row_ids = {}  # (namespace, hash) -> newest row id
+_last_row_id = 0
+_last_sync = 0
+_adds = 0
+_lock = threading.Lock()
+_sync_lock = threading.Lock()
+_db_ready = False
+
+
+def _to_gray(image):
+    """BGR/BGRA/gray image to single-channel float32"""
+
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+    return image.astype(np.float32)
+
+
+def _bits_to_int(bits):
+    """Pack a flat boolean array into an int, first element as highest bit"""
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def phash(image):
+    """
+    64-bit perceptual hash (DCT of a 32x32 downscale)
+
+    Args:
+        image: NumPy image as returned by cv2 (BGR or grayscale)
+
+    Returns:
+        Hash as a Python int
+    """
+
+    small = cv2.resize(_to_gray(image), (32, 32), interpolation=cv2.INTER_AREA)
+    low = cv2.dct(small)[:8, :8].flatten()
+
+    # Compare against the median, leaving out the DC term which only tracks brightness
+    return _bits_to_int(low > np.median(low[1:]))
+
+
+def dhash(image):
+    """64-bit difference hash (cheaper than pHash, less robust to crops)"""
+
+    small = cv2.resize(_to_gray(image), (9, 8), interpolation=cv2.INTER_AREA)
+    return _bits_to_int((small[:, 1:] > small[:, :-1]).flatten())
+
+
+def hamming(a, b):
+    """Number of differing bits between two hashes"""
+    return (a ^ b).bit_count()
+
+
+def _flip_masks(radius):
+    """XOR masks that flip up to radius bits of a chunk (cached per radius)"""
+
+    if radius not in _masks:
+        masks = [0]
+        for distance in range(1, radius + 1):
+            for positions in combinations(range(CHUNK_BITS), distance):
+                masks.append(sum(1 << position for position in positions))
+        _masks[radius] = masks
+    return _masks[radius]
+
+
+def _neighbours(value, radius):
+    """All CHUNK_BITS-bit values within the given Hamming radius of value"""
+    return [value ^ mask for mask in _flip_masks(radius)]
+
+
+class PerceptualIndex:
+    """
+    In-memory multi-index hash table of 64-bit hashes
+
+    Each hash maps to one stored value (the newest one wins)
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.tables = [{} for _ in range(CHUNKS)]
+
+    def __len__(self):
+        return len(self.values)
+
+    def _chunks(self, image_hash):
+        return [(image_hash >> (i * CHUNK_BITS)) & CHUNK_MASK for i in range(CHUNKS)]
+
+    def add(self, image_hash, value):
+        if image_hash not in self.values:
+            for table, chunk in zip(self.tables, self._chunks(image_hash)):
+                table.setdefault(chunk, []).append(image_hash)
+        self.values[image_hash] = value
+
+    def remove(self, image_hash):
+        if self.values.pop(image_hash, None) is None:
+            return
+        for table, chunk in zip(self.tables, self._chunks(image_hash)):
+            bucket = table[chunk]
+            bucket.remove(image_hash)
+            if not bucket:
+                del table[chunk]
+
+    def search(self, image_hash, max_distance=MAX_DISTANCE):
+        """
+        Find stored hashes within max_distance bits
+
+        Returns:
+            List of (distance, hash, value), closest first
+        """
+
+        radius = max_distance // CHUNKS
+        found = {}
+
+        for table, chunk in zip(self.tables, self._chunks(image_hash)):
+            for key in _neighbours(chunk, radius):
+                bucket = table.get(key)
+                if bucket:
+                    for candidate in bucket:
+                        distance = (image_hash ^ candidate).bit_count()
+                        if distance <= max_distance:
+                            found[candidate] = distance
+
+        matches = [(distance, candidate, self.values[candidate]) for candidate, distance in found.items()]
+        matches.sort(key=lambda match: match[0])
+        return matches
+
+
+def _signed(image_hash):
+    """SQLite integers are signed 64-bit"""
+    return image_hash - (1 << HASH_BITS) if image_hash >= 1 << (HASH_BITS - 1) else image_hash
+
+
+def _unsigned(value):
+    return value + (1 << HASH_BITS) if value < 0 else value
+
+
+def _connect():
+    """Open the index database, creating the table on first use"""
+
+    global _db_ready
+
+    os.makedirs(os.path.dirname(PHASH_DB) or '.', exist_ok=True)
+    conn = sqlite3.connect(PHASH_DB, timeout=10)
+
+    if not _db_ready:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS hashes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                namespace TEXT,
+                phash INTEGER,
+                value TEXT
+            )
+        ''')
+        conn.commit()
+        _db_ready = True
+
+    return conn
+
+
+def _sync():
+    """Load rows added since the last sync (by this or other worker processes)"""
+
+    global _last_row_id, _last_sync
+
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT id, namespace, phash, value FROM hashes WHERE id > ? ORDER BY id",
+            (_last_row_id,)
+        ).fetchall()
+
+    # In slices, so a cold start doesn't hold up lookups for the whole load
+    for start in range(0, len(rows), SYNC_BATCH):
+        with _lock:
+            for row_id, namespace, image_hash, value in rows[start:start + SYNC_BATCH]:
+                image_hash = _unsigned(image_hash)
+                _indexes.setdefault(namespace, PerceptualIndex()).add(image_hash, value)
+                _rows.append((row_id, namespace, image_hash))
+                _row_ids[(namespace, image_hash)] = row_id
+                _last_row_id = row_id
+
+    with _lock:
+        # Drop entries that fell out of the newest MAX_ENTRIES rows
+        while _rows and _rows[0][0] <= _last_row_id - MAX_ENTRIES:
+            row_id, namespace, image_hash = _rows.popleft()
+            if _row_ids.get((namespace, image_hash)) == row_id:
+                del _row_ids[(namespace, image_hash)]
+                _indexes[namespace].remove(image_hash)
+
+        _last_sync = time.monotonic()
+
+
+def _sync_in_background():
+    try:
+        _sync()
+    finally:
+        _sync_lock.release()
+
+
+def _maybe_sync():
+    """Start a background sync if the last one is older than SYNC_SECONDS"""
+
+    if time.monotonic() - _last_sync < SYNC_SECONDS or not _sync_lock.acquire(blocking=False):
+        return
+    threading.Thread(target=_sync_in_background, daemon=True).start()
+
+
+def find_near_duplicate(image_hash, namespace, max_distance=MAX_DISTANCE):
+    """
+    Look up the closest stored hash in a namespace
+
+    Args:
+        image_hash: pHash of the new image/frame
+        namespace: Keeps unrelated entries apart (e.g. 'predict:dummy-1')
+        max_distance: Largest Hamming distance that still counts as a duplicate
+
+    Returns:
+        (distance, stored value) or None
+    """
+
+    _maybe_sync()
+
+    with _lock:
+        index = _indexes.get(namespace)
+        matches = index.search(image_hash, max_distance) if index else []
+
+    if not matches:
+        return None
+
+    distance, _, value = matches[0]
+    return distance, value
+
+
+def add_to_index(image_hash, namespace, value):
+    """Remember a hash -> value (e.g. a result_cache key) mapping"""
+
+    global _adds
+
+    with _connect() as conn:
+        conn.execute(
+            "INSERT INTO hashes (namespace, phash, value) VALUES (?, ?, ?)",
+            (namespace, _signed(image_hash), value)
+        )
+
+    # Visible to this worker right away; the next sync records the row id
+    with _lock:
+        _indexes.setdefault(namespace, PerceptualIndex()).add(image_hash, value)
+        _adds += 1
+        due = _adds % PRUNE_EVERY == 0
+
+    if due:
+        purge_old_hashes()
+    _maybe_sync()
+
+
+def purge_old_hashes(max_entries=MAX_ENTRIES):
+    """Delete all but the newest max_entries rows"""
+
+    with _connect() as conn:
+        conn.execute(
+            "DELETE FROM hashes WHERE id <= (SELECT MAX(id) FROM hashes) - ?",
+            (max_entries,)
+        )
+
+
+def get_index_stats():
+    """Entries per namespace"""
+
+    with _lock:
+        return {namespace: len(index) for namespace, index in _indexes.items()}
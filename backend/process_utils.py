@@ -0,0 +1,20 @@
+import os
+
+# Helpers for state shared between gunicorn workers (files and SQLite rows
+# tagged with the pid that owns them)
+
+
+def process_alive(pid):
+    """Whether pid is a running process other than this one"""
+
+    if pid == os.getpid():
+        return False  # An earlier process with our pid
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Exists, but belongs to another user
+
+    return True
@@ -0,0 +1,252 @@
+import io
+import os
+import re
+import tempfile
+import time
+from collections import OrderedDict
+
+from app.utils.file_handler import sniff_file_type
+from url_handler import get_session, DownloadError, URL_CONNECT_TIMEOUT, URL_READ_TIMEOUT
+
+# Read a remote video as a seekable file, so video_processor can sample it
+# while it downloads instead of after
+#
+# If the server supports Range requests, only the blocks the decoder
+# actually touches are fetched (the header, the index and the sampled
+# frames). Otherwise the body is streamed once and spooled to a temp file
+# so the decoder can still seek back. Either way, reading stops at a hard
+# byte budget.
+
+REMOTE_VIDEO_MAX_BYTES = int(os.getenv('REMOTE_VIDEO_MAX_BYTES', 200 * 1024 * 1024))  # 200MB
+REMOTE_VIDEO_BLOCK_BYTES = int(os.getenv('REMOTE_VIDEO_BLOCK_BYTES', 512 * 1024))
+REMOTE_VIDEO_CACHE_BLOCKS = 64  # Blocks kept in memory (ranged mode)
+REMOTE_VIDEO_MAX_SECONDS = float(os.getenv('REMOTE_VIDEO_MAX_SECONDS', 60))  # Whole read, for callers to pass
+
+
+class RemoteVideoStream(io.BufferedIOBase):
+    """
+    Seekable, read-only view of a remote video
+
+    Errors while reading (budget exceeded, timeout, network) end the
+    stream early instead of raising, since the decoder calls read() from
+    native code; check .stopped_reason afterwards.
+
+    Args:
+        url: Video URL
+        max_bytes: Most bytes to fetch in total
+        block_size: Bytes per Range request
+        max_seconds: Limit on the whole read
+
+    Raises:
+        DownloadError if the URL isn't a readable video
+    """
+
+    def __init__(self, url, max_bytes=REMOTE_VIDEO_MAX_BYTES, block_size=REMOTE_VIDEO_BLOCK_BYTES, max_seconds=None):
+        super().__init__()
+
+        self.url = url
+        self.max_bytes = max_bytes
+        self.block_size = block_size
+        self.deadline = time.monotonic() + max_seconds if max_seconds else None
+        self.bytes_fetched = 0
+        self.requests = 0
+        self.stopped_reason = None
+
+        self._position = 0
+        self._blocks = OrderedDict()
+        self._response = None
+        self._body = None
+        self._spool = None
+        self._spooled = 0
+
+        response = self._get(0, block_size - 1)
+
+        if response.status_code not in (200, 206):
+            response.close()
+            raise DownloadError(f"Failed to download: Status {response.status_code}")
+
+        content_type = response.headers.get('content-type', '')
+        if not content_type.startswith(('video/', 'application/octet-stream')):
+            response.close()
+            raise DownloadError("URL does not point to a video")
+
+        self.ranged = response.status_code == 206
+
+        if self.ranged:
+            match = re.search(r'/(\d+)$', response.headers.get('content-range', ''))
+            self.size = int(match.group(1)) if match else None
+            first_block = self._read_response(response, block_size)
+            response.close()
+            self._blocks[0] = first_block
+            header = first_block
+        else:
+            content_length = response.headers.get('content-length')
+            self.size = int(content_length) if content_length and content_length.isdigit() else None
+
+            if self.size and self.size > max_bytes:
+                response.close()
+                raise DownloadError(f"Video too large (max {max_bytes // (1024 * 1024)}MB)")
+
+            self._response = response
+            self._body = response.iter_content(64 * 1024)
+            self._spool = tempfile.TemporaryFile()
+            self._fill_spool(16)
+            self._spool.seek(0)
+            header = self._spool.read(16)
+
+        if sniff_file_type(header[:16]) != 'video':
+            self.close()
+            raise DownloadError("URL does not point to a supported video")
+
+    def _get(self, start, end):
+        timeout = (URL_CONNECT_TIMEOUT, URL_READ_TIMEOUT)
+        if self.deadline:
+            remaining = max(0.1, self.deadline - time.monotonic())
+            timeout = tuple(min(seconds, remaining) for seconds in timeout)
+
+        self.requests += 1
+        return get_session().get(self.url, headers={'Range': f"bytes={start}-{end}"}, timeout=timeout, stream=True)
+
+    def _check_limits(self, more_bytes):
+        """Raise if fetching more_bytes would go over the budget or deadline"""
+
+        if self.bytes_fetched + more_bytes > self.max_bytes:
+            raise DownloadError(f"Byte budget reached ({self.max_bytes} bytes)")
+        if self.deadline and time.monotonic() > self.deadline:
+            raise DownloadError("Request timeout - video took too long to download")
+
+    def _read_response(self, response, limit):
+        data = response.raw.read(limit, decode_content=True)
+        self._check_limits(len(data))
+        self.bytes_fetched += len(data)
+        return data
+
+    def _block(self, number):
+        """Block `number` of the file, fetching it if needed (ranged mode)"""
+
+        if number in self._blocks:
+            self._blocks.move_to_end(number)
+            return self._blocks[number]
+
+        start = number * self.block_size
+        self._check_limits(min(self.block_size, (self.size or start + self.block_size) - start))
+
+        with self._get(start, start + self.block_size - 1) as response:
+            if response.status_code == 416:
+                return b''  # Past the end (only asked for when the size is unknown)
+            if response.status_code != 206:
+                raise DownloadError(f"Range request failed: Status {response.status_code}")
+            data = self._read_response(response, self.block_size)
+
+        self._blocks[number] = data
+        while len(self._blocks) > REMOTE_VIDEO_CACHE_BLOCKS:
+            self._blocks.popitem(last=False)
+
+        return data
+
+    def _find_size(self):
+        """Read up to the end when the server didn't say how long the file is"""
+
+        if not self.ranged:
+            self._fill_spool(float('inf'))
+            return
+
+        number = 0
+        while True:
+            block = self._block(number)
+            if len(block) < self.block_size:
+                self.size = number * self.block_size + len(block)
+                return
+            number += 1
+
+    def _fill_spool(self, end):
+        """Stream the body into the spool file until it holds `end` bytes (or EOF)"""
+
+        self._spool.seek(0, io.SEEK_END)
+
+        while self._spooled < end and self._body is not None:
+            chunk = next(self._body, None)
+            if chunk is None:
+                self._body = None
+                self.size = self._spooled
+                break
+
+            self._check_limits(len(chunk))
+            self.bytes_fetched += len(chunk)
+            self._spool.write(chunk)
+            self._spooled += len(chunk)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self._position = offset
+        elif whence == io.SEEK_CUR:
+            self._position += offset
+        else:
+            if self.size is None:
+                try:
+                    self._find_size()
+                except Exception as e:
+                    self.stopped_reason = str(e)
+                    return -1
+            self._position = self.size + offset
+
+        return self._position
+
+    def read(self, size=-1):
+        if self.stopped_reason:
+            return b''
+
+        end = self._position + size if size is not None and size >= 0 else float('inf')
+        if self.size is not None:
+            end = min(end, self.size)
+        if end <= self._position:
+            return b''
+
+        try:
+            if self.ranged:
+                data = self._read_ranged(end)
+            else:
+                self._fill_spool(end)
+                self._spool.seek(self._position)
+                data = self._spool.read(int(min(end, self._spooled) - self._position))
+
+        except Exception as e:
+            self.stopped_reason = str(e)
+            return b''
+
+        self._position += len(data)
+        return data
+
+    def _read_ranged(self, end):
+        parts = []
+        position = self._position
+
+        while position < end:
+            number = position // self.block_size
+            block = self._block(number)
+            offset = position - number * self.block_size
+            if offset >= len(block):
+                break
+            part = block[offset:int(min(len(block), end - number * self.block_size))]
+            parts.append(part)
+            position += len(part)
+
+        return b''.join(parts)
+
+    def close(self):
+        if self._response is not None:
+            self._response.close()
+            self._response = None
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+        super().close()
@@ -1,12 +1,174 @@
 from datetime import datetime
+import atexit
 import json
 import os
+import queue
+import threading
+import time
+from request_stats import record_request, get_stats
 
 LOG_FILE = 'logs/requests.log'
 
-def log_request(endpoint, method, ip_address, user_agent, status_code, response_time=None, error=None):
-    """Log API request details"""
-    
+# Entries are queued by log_request and written by a background thread in
+# batches, so requests never wait on the filesystem
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+LOG_QUEUE_POLICY = os.getenv('LOG_QUEUE_POLICY', 'drop')  # 'drop' or 'block' when the queue is full
+LOG_FLUSH_ENTRIES = int(os.getenv('LOG_FLUSH_ENTRIES', 200))
+LOG_FLUSH_SECONDS = float(os.getenv('LOG_FLUSH_SECONDS', 1.0))
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024))  # Rotate at 10MB
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 5))  # Rotated segments kept as plain text
+LOG_ARCHIVE_ON_ROTATE = os.getenv('LOG_ARCHIVE_ON_ROTATE', '1') == '1'  # Compact older segments to Parquet
+
+_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+_writer = None
+_writer_pid = None
+_writer_lock = threading.Lock()
+_dropped = 0
+
+
+def _segments():
+    """Numbers of the rotated segments on disk (requests.log.1 -> 1)"""
+
+    folder = os.path.dirname(LOG_FILE) or '.'
+    prefix = os.path.basename(LOG_FILE) + '.'
+
+    return [
+        int(name[len(prefix):]) for name in os.listdir(folder)
+        if name.startswith(prefix) and name[len(prefix):].isdigit()
+    ]
+
+
+def _rotate():
+    """
+    requests.log -> requests.log.1 -> ... -> requests.log.N
+
+    Segments past LOG_BACKUP_COUNT are deleted, or with LOG_ARCHIVE_ON_ROTATE
+    kept (.N+1, ...) for compact_logs to move into the archive
+    """
+
+    if LOG_ARCHIVE_ON_ROTATE:
+        last = max(_segments(), default=0) + 1
+    else:
+        last = LOG_BACKUP_COUNT
+
+    for i in range(last - 1, 0, -1):
+        older = f"{LOG_FILE}.{i}"
+        if os.path.exists(older):
+            os.replace(older, f"{LOG_FILE}.{i + 1}")
+
+    if last > 0:
+        os.replace(LOG_FILE, f"{LOG_FILE}.1")
+    else:
+        os.remove(LOG_FILE)
+
+
+def _write_batch(lines):
+    """Append a batch of lines with a single write, then rotate if too big"""
+
+    os.makedirs(os.path.dirname(LOG_FILE) or '.', exist_ok=True)
+
+    # Opened per batch (not per request) so we pick up a rotation done by
+    # another gunicorn worker
+    with open(LOG_FILE, 'a') as f:
+        f.write(''.join(lines))
+        size = f.tell()
+
+    if size >= LOG_MAX_BYTES:
+        try:
+            _rotate()
+        except FileNotFoundError:
+            pass  # Another worker rotated it first
+
+        if LOG_ARCHIVE_ON_ROTATE:
+            threading.Thread(target=_archive_rotated, args=(LOG_FILE,), daemon=True).start()
+
+
+def _archive_rotated(log_file):
+    """Move segments past LOG_BACKUP_COUNT into the Parquet archive (see log_archive.py)"""
+
+    try:
+        from log_archive import compact_logs
+        compact_logs(log_file, keep=LOG_BACKUP_COUNT)
+    except Exception as e:
+        print(f"❌ Error archiving request logs: {e}")
+
+
+def _writer_loop():
+    """Background thread: batch queued entries and write them by size or time"""
+
+    buffer = []
+    waiters = []
+    deadline = time.monotonic() + LOG_FLUSH_SECONDS
+
+    while True:
+        try:
+            item = _queue.get(timeout=max(0, deadline - time.monotonic()))
+        except queue.Empty:
+            item = None
+
+        if isinstance(item, threading.Event):
+            waiters.append(item)
+        elif item is not None:
+            buffer.append(item)
+
+        if buffer and (waiters or len(buffer) >= LOG_FLUSH_ENTRIES or time.monotonic() >= deadline):
+            try:
+                _write_batch(buffer)
+            except Exception as e:
+                print(f"❌ Error writing request log: {e}")
+            buffer = []
+
+        if time.monotonic() >= deadline:
+            deadline = time.monotonic() + LOG_FLUSH_SECONDS
+
+        for waiter in waiters:
+            waiter.set()
+        waiters = []
+
+
+def _ensure_writer():
+    """Start the writer thread (again after a fork, e.g. in each gunicorn worker)"""
+
+    global _writer, _writer_pid
+
+    if _writer_pid == os.getpid() and _writer.is_alive():
+        return
+
+    with _writer_lock:
+        if _writer_pid == os.getpid() and _writer.is_alive():
+            return
+
+        _writer = threading.Thread(target=_writer_loop, daemon=True)
+        _writer.start()
+        _writer_pid = os.getpid()
+
+
+def flush_logs(timeout=5.0):
+    """Block until everything logged so far is written to disk"""
+
+    if _writer_pid != os.getpid():
+        return True
+
+    done = threading.Event()
+    _queue.put(done)
+    return done.wait(timeout)
+
+
+atexit.register(flush_logs)
+
+
+def log_request(endpoint, method, ip_address, user_agent, status_code, response_time=None, error=None, route=None):
+    """
+    Log API request details
+
+    route is the URL rule (e.g. '/api/jobs/<job_id>') used to group the
+    statistics; defaults to endpoint
+    """
+
+    global _dropped
+
+    record_request(route or endpoint, status_code, response_time)
+
     log_entry = {
         'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
         'endpoint': endpoint,
@@ -17,48 +179,27 @@ def log_request(endpoint, method, ip_address, user_agent, status_code, response_
         'response_time_ms': response_time,
         'error': error
     }
-    
-    # Create logs directory if doesn't exist
-    os.makedirs('logs', exist_ok=True)
-    
-    # Write to log file
-    with open(LOG_FILE, 'a') as f:
-        f.write(json.dumps(log_entry) + '\n')
+
+    _ensure_writer()
+
+    line = json.dumps(log_entry) + '\n'
+
+    if LOG_QUEUE_POLICY == 'block':
+        _queue.put(line)
+        return
+
+    try:
+        _queue.put_nowait(line)
+    except queue.Full:
+        _dropped += 1
+
+
+def get_dropped_count():
+    """Number of log entries dropped because the queue was full"""
+    return _dropped
+
 
 def get_request_stats():
-    """Get statistics from request logs"""
-    
-    if not os.path.exists(LOG_FILE):
-        return {
-            'total_requests': 0,
-            'success_rate': 0,
-            'avg_response_time': 0
-        }
-    
-    total = 0
-    successful = 0
-    response_times = []
-    
-    with open(LOG_FILE, 'r') as f:
-        for line in f:
-            try:
-                entry = json.loads(line)
-                total += 1
-                
-                if entry['status_code'] == 200:
-                    successful += 1
-                
-                if entry['response_time_ms']:
-                    response_times.append(entry['response_time_ms'])
-            except:
-                continue
-    
-    avg_time = sum(response_times) / len(response_times) if response_times else 0
-    success_rate = (successful / total * 100) if total > 0 else 0
-    
-    return {
-        'total_requests': total,
-        'successful_requests': successful,
-        'success_rate': round(success_rate, 2),
-        'avg_response_time_ms': round(avg_time, 2)
-    }
\ No newline at end of file
+    """Get statistics (kept up to date in memory by log_request)"""
+
+    return get_stats()
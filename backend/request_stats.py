@@ -0,0 +1,387 @@
+import atexit
+import copy
+import json
+import math
+import os
+import threading
+import time
+from process_utils import process_alive
+
+# Rolling request statistics, updated on every log_request call
+#
+# Latencies go into fixed log-scale histograms (each bin 10% wide, so a
+# percentile read from its bin midpoint is off by at most ~5%). Percentiles
+# cost the same whether we've seen a hundred requests or a hundred million. Sliding windows are rings of time buckets, each with
+# its own histogram; a bucket is cleared when its slot is reused.
+#
+# Each process keeps its own aggregates in memory and saves them to its
+# own file next to STATS_FILE (request_stats.<pid>.json), so gunicorn
+# workers never overwrite each other. get_stats merges this process's
+# live numbers with the other workers' last saves. When a process starts
+# it takes over (merges and deletes) the files of processes that have
+# exited, so totals carry over restarts without being counted twice.
+
+STATS_FILE = os.getenv('STATS_FILE', 'logs/request_stats.json')
+STATS_PERSIST_SECONDS = float(os.getenv('STATS_PERSIST_SECONDS', 5))
+MAX_ENDPOINTS = 200  # Anything beyond this is counted as 'other'
+
+# Histogram bins: MIN_LATENCY_MS * GROWTH**i, up to about 100 seconds
+MIN_LATENCY_MS = 0.1
+GROWTH = 1.1
+BIN_COUNT = int(math.log(100000 / MIN_LATENCY_MS, GROWTH)) + 2
+
+# name: (bucket width in seconds, number of buckets)
+WINDOWS = {
+    '1m': (1, 60),
+    '5m': (5, 60),
+    '1h': (60, 60)
+}
+
+PERCENTILES = (50, 95, 99)
+
+_lock = threading.Lock()
+_state = None
+_persister_pid = None
+
+
+def _bin_index(latency_ms):
+    if latency_ms <= MIN_LATENCY_MS:
+        return 0
+    return min(BIN_COUNT - 1, int(math.log(latency_ms / MIN_LATENCY_MS, GROWTH)) + 1)
+
+
+def _bin_value(index):
+    """Representative latency of a bin (geometric middle)"""
+    if index == 0:
+        return MIN_LATENCY_MS
+    return MIN_LATENCY_MS * GROWTH ** (index - 0.5)
+
+
+def _status_class(status_code):
+    return f"{status_code // 100}xx"
+
+
+def _new_bucket(bucket_start):
+    return {'start': bucket_start, 'requests': 0, 'status_classes': {}, 'histogram': {}}
+
+
+def _new_state():
+    return {
+        'total_requests': 0,
+        'successful_requests': 0,
+        'timed_requests': 0,
+        'response_time_sum_ms': 0.0,
+        'status_classes': {},
+        'endpoints': {},
+        'histogram': {},
+        'windows': {name: [None] * size for name, (_, size) in WINDOWS.items()}
+    }
+
+
+def _process_file(pid):
+    """Where process pid saves its aggregates"""
+    base, extension = os.path.splitext(STATS_FILE)
+    return f"{base}.{pid}{extension}"
+
+
+def _saved_files():
+    """Files saved by each process, as (pid, path)"""
+
+    base, extension = os.path.splitext(STATS_FILE)
+    folder = os.path.dirname(STATS_FILE) or '.'
+    prefix = os.path.basename(base) + '.'
+
+    try:
+        names = os.listdir(folder)
+    except OSError:
+        return []
+
+    files = []
+    for name in names:
+        pid = name[len(prefix):-len(extension) or None]
+        if name.startswith(prefix) and name.endswith(extension) and pid.isdigit():
+            files.append((int(pid), os.path.join(folder, name)))
+
+    return files
+
+
+def _read(path):
+    """Aggregates saved in path, or None"""
+
+    try:
+        with open(path) as f:
+            state = json.load(f)
+
+        # JSON turns int keys into strings
+        for histogram in _histograms(state):
+            restored = {int(key): value for key, value in histogram.items()}
+            histogram.clear()
+            histogram.update(restored)
+
+        return state
+
+    except (OSError, ValueError, KeyError, AttributeError):
+        return None
+
+
+def _write(state, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_file = f"{path}.{threading.get_ident()}.tmp"
+
+    with open(temp_file, 'w') as f:
+        json.dump(state, f)
+
+    os.replace(temp_file, path)
+
+
+def _load():
+    """Start from the aggregates of processes that have exited"""
+
+    state = _new_state()
+
+    # STATS_FILE itself is where all workers used to save
+    orphans = [STATS_FILE] + [path for pid, path in _saved_files() if not process_alive(pid)]
+    claimed = []
+
+    for path in orphans:
+        # Renaming first means only one new process takes each file over
+        claim = f"{path}.{os.getpid()}.claim"
+        try:
+            os.rename(path, claim)
+        except OSError:
+            continue
+
+        saved = _read(claim)
+        if saved:
+            _merge_state(state, saved)
+        claimed.append(claim)
+
+    if claimed:
+        _write(state, _process_file(os.getpid()))
+        for claim in claimed:
+            os.remove(claim)
+
+    return state
+
+
+def _merge_state(target, source):
+    """Add the aggregates in source to target"""
+
+    for key in ('total_requests', 'successful_requests', 'timed_requests', 'response_time_sum_ms'):
+        target[key] += source[key]
+
+    _merge(target['status_classes'], source['status_classes'])
+    _merge(target['histogram'], source['histogram'])
+
+    for endpoint, stats in source['endpoints'].items():
+        merged = target['endpoints'].setdefault(endpoint, {'requests': 0, 'status_classes': {}, 'histogram': {}})
+        merged['requests'] += stats['requests']
+        _merge(merged['status_classes'], stats['status_classes'])
+        _merge(merged['histogram'], stats['histogram'])
+
+    for name, buckets in source['windows'].items():
+        slots = target['windows'].get(name)
+        if slots is None or len(slots) != len(buckets):
+            continue  # Window settings changed since that file was saved
+
+        for slot, bucket in enumerate(buckets):
+            current = slots[slot]
+            if bucket is None or (current and current['start'] > bucket['start']):
+                continue
+
+            if current is None or current['start'] < bucket['start']:
+                slots[slot] = copy.deepcopy(bucket)
+            else:
+                current['requests'] += bucket['requests']
+                _merge(current['status_classes'], bucket['status_classes'])
+                _merge(current['histogram'], bucket['histogram'])
+
+
+def _histograms(state):
+    yield state['histogram']
+    for endpoint in state['endpoints'].values():
+        yield endpoint['histogram']
+    for buckets in state['windows'].values():
+        for bucket in buckets:
+            if bucket:
+                yield bucket['histogram']
+
+
+def _get_state():
+    global _state
+    if _state is None:
+        _state = _load()
+    return _state
+
+
+def save_stats():
+    """Write this process's aggregates to its file"""
+
+    with _lock:
+        if _state is None:
+            return
+        state = copy.deepcopy(_state)
+
+    _write(state, _process_file(os.getpid()))
+
+
+def _persist_loop():
+    while True:
+        time.sleep(STATS_PERSIST_SECONDS)
+        try:
+            save_stats()
+        except Exception as e:
+            print(f"❌ Error saving request stats: {e}")
+
+
+def _ensure_persister():
+    """Start the periodic save thread once per process"""
+
+    global _persister_pid
+
+    if _persister_pid == os.getpid():
+        return
+
+    _persister_pid = os.getpid()
+    threading.Thread(target=_persist_loop, daemon=True).start()
+
+
+atexit.register(save_stats)
+
+
+def record_request(endpoint, status_code, response_time=None, now=None):
+    """Add one request to the aggregates (O(1))"""
+
+    now = now or time.time()
+    status_class = _status_class(status_code)
+    latency_bin = _bin_index(response_time) if response_time is not None else None
+
+    _ensure_persister()
+
+    with _lock:
+        state = _get_state()
+
+        state['total_requests'] += 1
+        if status_code == 200:
+            state['successful_requests'] += 1
+        state['status_classes'][status_class] = state['status_classes'].get(status_class, 0) + 1
+
+        if endpoint not in state['endpoints'] and len(state['endpoints']) >= MAX_ENDPOINTS:
+            endpoint = 'other'
+        stats = state['endpoints'].setdefault(endpoint, {'requests': 0, 'status_classes': {}, 'histogram': {}})
+        stats['requests'] += 1
+        stats['status_classes'][status_class] = stats['status_classes'].get(status_class, 0) + 1
+
+        if latency_bin is not None:
+            state['timed_requests'] += 1
+            state['response_time_sum_ms'] += response_time
+            state['histogram'][latency_bin] = state['histogram'].get(latency_bin, 0) + 1
+            stats['histogram'][latency_bin] = stats['histogram'].get(latency_bin, 0) + 1
+
+        for name, (width, size) in WINDOWS.items():
+            bucket_start = int(now // width) * width
+            slot = int(now // width) % size
+            bucket = state['windows'][name][slot]
+
+            if bucket is None or bucket['start'] != bucket_start:
+                bucket = _new_bucket(bucket_start)
+                state['windows'][name][slot] = bucket
+
+            bucket['requests'] += 1
+            bucket['status_classes'][status_class] = bucket['status_classes'].get(status_class, 0) + 1
+            if latency_bin is not None:
+                bucket['histogram'][latency_bin] = bucket['histogram'].get(latency_bin, 0) + 1
+
+
+def _percentiles(histogram):
+    """p50/p95/p99 in ms from a {bin: count} histogram"""
+
+    total = sum(histogram.values())
+    result = {f"p{p}": None for p in PERCENTILES}
+
+    if not total:
+        return result
+
+    targets = [(p, math.ceil(total * p / 100)) for p in PERCENTILES]
+    seen = 0
+
+    for index in sorted(histogram):
+        seen += histogram[index]
+        while targets and seen >= targets[0][1]:
+            p, _ = targets.pop(0)
+            result[f"p{p}"] = round(_bin_value(index), 2)
+
+    return result
+
+
+def _merge(target, counts):
+    for key, value in counts.items():
+        target[key] = target.get(key, 0) + value
+
+
+def get_stats(now=None):
+    """Lifetime totals, per-endpoint and per-window aggregates"""
+
+    now = now or time.time()
+
+    with _lock:
+        state = copy.deepcopy(_get_state())
+
+    # Other workers' numbers, as of their last save
+    for pid, path in _saved_files():
+        if pid != os.getpid():
+            saved = _read(path)
+            if saved:
+                _merge_state(state, saved)
+
+    total = state['total_requests']
+    successful = state['successful_requests']
+    timed = state['timed_requests']
+
+    windows = {}
+    for name, (width, size) in WINDOWS.items():
+        oldest = int(now // width) * width - (size - 1) * width
+        requests = 0
+        status_classes = {}
+        histogram = {}
+
+        for bucket in state['windows'][name]:
+            if bucket and bucket['start'] >= oldest:
+                requests += bucket['requests']
+                _merge(status_classes, bucket['status_classes'])
+                _merge(histogram, bucket['histogram'])
+
+        windows[name] = {
+            'requests': requests,
+            'requests_per_second': round(requests / (width * size), 3),
+            'status_classes': status_classes,
+            'latency_ms': _percentiles(histogram)
+        }
+
+    endpoints = {
+        endpoint: {
+            'requests': stats['requests'],
+            'status_classes': dict(stats['status_classes']),
+            'latency_ms': _percentiles(stats['histogram'])
+        }
+        for endpoint, stats in state['endpoints'].items()
+    }
+
+    return {
+        'total_requests': total,
+        'successful_requests': successful,
+        'success_rate': round(successful / total * 100, 2) if total else 0,
+        'avg_response_time_ms': round(state['response_time_sum_ms'] / timed, 2) if timed else 0,
+        'latency_ms': _percentiles(state['histogram']),
+        'status_classes': dict(state['status_classes']),
+        'endpoints': endpoints,
+        'windows': windows
+    }
+
+
+def reset_stats():
+    """Forget everything (used by tests)"""
+
+    global _state
+    with _lock:
+        _state = _new_state()
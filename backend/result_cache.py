@@ -0,0 +1,214 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Cache of analysis results keyed by content hash + model version
+#
+# Tier 1: in-memory LRU, evicted by total size of the stored results
+# Tier 2: SQLite on disk, shared by all gunicorn workers and kept across restarts
+
+CACHE_DB = os.getenv('RESULT_CACHE_DB', 'temp/result_cache.db')
+CACHE_MEMORY_BYTES = int(os.getenv('RESULT_CACHE_MEMORY_BYTES', 16 * 1024 * 1024))  # 16MB
+CACHE_MAX_ROWS = int(os.getenv('RESULT_CACHE_MAX_ROWS', 200000))
+CACHE_TTL_SECONDS = int(os.getenv('RESULT_CACHE_TTL_SECONDS', 30 * 24 * 3600))
+CACHE_PRUNE_EVERY = 500  # Writes between prunes of the disk tier
+CHUNK_SIZE = 1024 * 1024  # 1MB
+
+_memory = OrderedDict()
+_memory_bytes = 0
+_lock = threading.Lock()
+_db_ready = False
+_writes = 0
+
+_counters = {
+    'memory_hits': 0,
+    'disk_hits': 0,
+    'misses': 0,
+    'evictions': 0
+}
+
+
+def save_and_hash(file, save_path):
+    """
+    Save an uploaded Flask file and hash it in the same pass
+
+    Args:
+        file: werkzeug FileStorage from request.files
+        save_path: Where to write the file
+
+    Returns:
+        SHA-256 hex digest of the contents
+    """
+
+    sha256 = hashlib.sha256()
+
+    with open(save_path, 'wb') as out:
+        while True:
+            chunk = file.stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            sha256.update(chunk)
+            out.write(chunk)
+
+    return sha256.hexdigest()
+
+
+def hash_file(file_path):
+    """SHA-256 hex digest of a file on disk"""
+
+    sha256 = hashlib.sha256()
+
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            sha256.update(chunk)
+
+    return sha256.hexdigest()
+
+
+def make_key(content_hash, model_version, kind):
+    """Cache key for one piece of content analyzed by one model version"""
+    return f"{kind}:{model_version}:{content_hash}"
+
+
+def _connect():
+    """Open the on-disk cache, creating the table on first use"""
+
+    global _db_ready
+
+    os.makedirs(os.path.dirname(CACHE_DB) or '.', exist_ok=True)
+    conn = sqlite3.connect(CACHE_DB, timeout=10)
+
+    if not _db_ready:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                created_at REAL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_results_created ON results (created_at)')
+        conn.commit()
+        _db_ready = True
+
+    return conn
+
+
+def _remember(key, value_json):
+    """Put an entry in the memory tier and evict least recently used ones"""
+
+    global _memory_bytes
+
+    with _lock:
+        if key in _memory:
+            _memory_bytes -= len(_memory.pop(key))
+
+        _memory[key] = value_json
+        _memory_bytes += len(value_json)
+
+        while _memory_bytes > CACHE_MEMORY_BYTES and len(_memory) > 1:
+            _, evicted = _memory.popitem(last=False)
+            _memory_bytes -= len(evicted)
+            _counters['evictions'] += 1
+
+
+def get_cached(key):
+    """
+    Look up a cached result
+
+    Returns:
+        The stored dict, or None on a miss
+    """
+
+    with _lock:
+        value_json = _memory.get(key)
+        if value_json is not None:
+            _memory.move_to_end(key)
+            _counters['memory_hits'] += 1
+            return json.loads(value_json)
+
+    with _connect() as conn:
+        row = conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+
+    if row is None:
+        with _lock:
+            _counters['misses'] += 1
+        return None
+
+    _remember(key, row[0])
+
+    with _lock:
+        _counters['disk_hits'] += 1
+
+    return json.loads(row[0])
+
+
+def set_cached(key, value):
+    """Store a result (must be JSON serializable) in both tiers"""
+
+    global _writes
+
+    value_json = json.dumps(value)
+
+    with _connect() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO results (key, value, created_at) VALUES (?, ?, ?)",
+            (key, value_json, time.time())
+        )
+
+    _remember(key, value_json)
+
+    # Prune the disk tier now and then, not on every write
+    with _lock:
+        _writes += 1
+        due = _writes % CACHE_PRUNE_EVERY == 0
+
+    if due:
+        purge_old_results()
+
+
+def purge_old_results(ttl_seconds=CACHE_TTL_SECONDS, max_rows=CACHE_MAX_ROWS):
+    """
+    Delete results older than ttl_seconds, then the oldest ones past max_rows
+
+    Returns:
+        Number of results deleted
+    """
+
+    with _connect() as conn:
+        keys = [row[0] for row in conn.execute(
+            "SELECT key FROM results WHERE created_at < ?", (time.time() - ttl_seconds,)
+        )]
+        keys += [row[0] for row in conn.execute(
+            "SELECT key FROM results WHERE created_at >= ? ORDER BY created_at DESC LIMIT -1 OFFSET ?",
+            (time.time() - ttl_seconds, max_rows)
+        )]
+        conn.executemany("DELETE FROM results WHERE key = ?", [(key,) for key in keys])
+
+    global _memory_bytes
+    with _lock:
+        for key in keys:
+            if key in _memory:
+                _memory_bytes -= len(_memory.pop(key))
+
+    return len(keys)
+
+
+def get_cache_stats():
+    """Hit/miss counters and memory usage for sizing the cache"""
+
+    with _lock:
+        stats = dict(_counters)
+        stats['memory_entries'] = len(_memory)
+        stats['memory_bytes'] = _memory_bytes
+
+    lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+    hits = stats['memory_hits'] + stats['disk_hits']
+    stats['hit_rate'] = round(hits / lookups * 100, 2) if lookups else 0
+    stats['memory_limit_bytes'] = CACHE_MEMORY_BYTES
+
+    return stats
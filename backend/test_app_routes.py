@@ -0,0 +1,258 @@
+import importlib.util
+import io
+import json
+import os
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler
+
+import cv2
+import numpy as np
+import pytest
+
+import job_queue
+import video_processor
+import phash_index
+import request_logger
+import request_stats
+import result_cache
+import upload_queue
+import url_cache
+import url_handler
+
+@pytest.fixture(scope='module', autouse=True)
+def flask_app(tmp_path_factory):
+    # Keep every database and file the routes touch in a temp folder
+    data_dir = tmp_path_factory.mktemp('data')
+    result_cache.CACHE_DB = str(data_dir / 'result_cache.db')
+    phash_index.PHASH_DB = str(data_dir / 'phash_index.db')
+    job_queue.JOBS_DB = str(data_dir / 'jobs.db')
+    upload_queue.UPLOAD_DB = str(data_dir / 'uploads.db')
+    upload_queue.UPLOAD_SPOOL_DIR = str(data_dir / 'spool')
+    url_cache.URL_CACHE_DB = str(data_dir / 'url_cache.db')
+    url_cache.URL_CACHE_DIR = str(data_dir / 'url_cache')
+    url_handler.DOWNLOAD_DIR = str(data_dir / 'downloads')
+    request_logger.LOG_FILE = str(data_dir / 'requests.log')
+    request_stats.STATS_FILE = str(data_dir / 'request_stats.json')
+    for module in (result_cache, phash_index, job_queue, upload_queue, url_cache):
+        module._db_ready = False
+    upload_queue.init_db()  # The workers may already be running, they only create it on start
+
+    # app.py shares its name with the FastAPI app/ package
+    spec = importlib.util.spec_from_file_location('flask_app', 'app.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.limiter.enabled = False
+    return module
+
+
+@pytest.fixture(scope='module')
+def client(flask_app):
+    return flask_app.app.test_client()
+
+
+class ImageHost(BaseHTTPRequestHandler):
+    """Serves one real image, one that doesn't decode, and 404s"""
+
+    photo = cv2.imencode('.png', np.full((48, 48, 3), 90, dtype=np.uint8))[1].tobytes()
+    images = {'/photo.png': photo, '/broken.png': photo[:40]}  # PNG header, truncated body
+
+    def do_GET(self):
+        body = ImageHost.images.get(self.path)
+
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def base(serve):
+    return serve(ImageHost)
+
+
+def wait_for_upload(upload_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        upload = upload_queue.get_upload(upload_id)
+        if upload['status'] == upload_queue.STATUS_DONE:
+            return upload
+        time.sleep(0.05)
+    raise TimeoutError(upload_id)
+
+
+def test_video_job_hands_its_file_to_the_upload_queue(flask_app, make_clip):
+    upload_queue.set_uploader(lambda path, folder: f"https://stub.local/{folder}.avi")
+    content_hash = uuid.uuid4().hex
+
+    try:
+        path = make_clip(30)
+        result = flask_app._run_video_job(path, content_hash)
+
+        assert not result['cached']
+        assert result['upload_id']
+        assert not os.path.exists(path)  # Moved into the upload spool, not deleted
+        wait_for_upload(result['upload_id'])
+
+        cached = flask_app._run_video_job(make_clip(30), content_hash)
+        assert cached['cached']
+        assert cached['video_url'] == 'https://stub.local/deepfake-videos.avi'
+    finally:
+        upload_queue.set_uploader(None)
+
+
+def test_upload_url_outlives_the_upload_row(flask_app, make_clip):
+    upload_queue.set_uploader(lambda path, folder: 'https://stub.local/kept.avi')
+    content_hash = uuid.uuid4().hex
+
+    try:
+        upload_id = flask_app._run_video_job(make_clip(30), content_hash)['upload_id']
+        wait_for_upload(upload_id)
+
+        flask_app._run_video_job(make_clip(30), content_hash)  # Resolves the URL once
+        upload_queue.purge_old_uploads(ttl_seconds=-1)
+        assert upload_queue.get_upload(upload_id) is None
+
+        cached = flask_app._run_video_job(make_clip(30), content_hash)
+        assert cached['video_url'] == 'https://stub.local/kept.avi'
+    finally:
+        upload_queue.set_uploader(None)
+
+
+def test_analyze_urls_streams_ndjson(client, base):
+    upload_queue.set_uploader(lambda path, folder: 'https://stub.local/photo.png')
+    urls = [f"{base}/photo.png", f"{base}/broken.png", f"{base}/missing.png"]
+
+    try:
+        response = client.post('/api/analyze-urls', json={'urls': urls})
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        wait_for_upload(next(line['upload_id'] for line in lines if line.get('upload_id')))
+    finally:
+        upload_queue.set_uploader(None)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+
+    *results, summary = lines
+    by_index = {result['index']: result for result in results}
+
+    assert sorted(by_index) == [0, 1, 2]
+    assert [by_index[i]['url'] for i in range(3)] == urls
+    assert by_index[0]['status'] == 200 and by_index[0]['prediction']
+    assert by_index[1]['status'] == 400 and by_index[1]['error'] == 'Could not read image file'
+    assert by_index[2]['status'] == 400
+    assert summary == {'summary': {'total': 3, 'succeeded': 1, 'failed': 2}}
+
+    # The image that didn't decode was removed, the good one went to the upload queue
+    assert os.listdir(url_handler.DOWNLOAD_DIR) == []
+
+
+def test_analyze_urls_rejects_bad_bodies(flask_app, client):
+    assert client.post('/api/analyze-urls', data='not json', content_type='application/json').status_code == 400
+    assert client.post('/api/analyze-urls', json={}).status_code == 400
+    assert client.post('/api/analyze-urls', json={'urls': []}).status_code == 400
+    assert client.post('/api/analyze-urls', json={'urls': 'http://example.com/a.png'}).status_code == 400
+
+    response = client.post('/api/analyze-urls', json={'urls': ['http://example.com/a.png', 7]})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Every URL must be a string'}
+
+    original = flask_app.BULK_URL_MAX
+    flask_app.BULK_URL_MAX = 2
+    try:
+        response = client.post('/api/analyze-urls', json={'urls': ['http://example.com/a.png'] * 3})
+    finally:
+        flask_app.BULK_URL_MAX = original
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Too many URLs (max 2)'}
+
+
+def test_video_stream_sends_first_frames_before_probing(client, make_clip):
+    decoded = []
+
+    def counted(*args, **kwargs):
+        for frame_index, frame in original(*args, **kwargs):
+            decoded.append(frame_index)
+            yield frame_index, frame
+
+    original, workers = video_processor.read_sampled_frames, video_processor.VIDEO_WORKERS
+    video_processor.read_sampled_frames = counted
+    video_processor.VIDEO_WORKERS = 1
+    video_processor.VIDEO_SAMPLING = 'adaptive'
+    upload_queue.set_uploader(lambda path, folder: 'https://stub.local/stream.avi')
+
+    try:
+        with open(make_clip(200), 'rb') as f:
+            response = client.post(
+                '/api/analyze-video/stream',
+                data={'file': (f, f"{uuid.uuid4().hex}.avi")},
+                buffered=False
+            )
+        chunks = iter(response.response)
+        first = next(chunks).decode()
+        decoded_at_first_event = len(decoded)
+        rest = b''.join(chunks).decode()
+        response.close()
+
+        result = json.loads(rest.split('event: result\ndata: ')[1])
+        wait_for_upload(result['upload_id'])
+    finally:
+        video_processor.read_sampled_frames, video_processor.VIDEO_WORKERS = original, workers
+        video_processor.VIDEO_SAMPLING = 'uniform'
+        upload_queue.set_uploader(None)
+
+    assert response.mimetype == 'text/event-stream'
+    assert first.startswith('event: frame')
+    assert decoded_at_first_event <= 5  # The first round only, no probes
+    assert result['frames_analyzed'] > 0
+
+
+def test_video_stream_save_failure_is_json(flask_app, client):
+    original = flask_app.save_and_hash
+
+    def failing_save(file, path):
+        raise OSError('No space left on device')
+
+    flask_app.save_and_hash = failing_save
+    try:
+        response = client.post('/api/analyze-video/stream', data={'file': (io.BytesIO(b'\0' * 64), 'clip.avi')})
+    finally:
+        flask_app.save_and_hash = original
+
+    assert response.status_code == 500
+    assert response.get_json() == {'error': 'No space left on device'}
+
+
+def test_upload_names_stay_in_temp_and_never_clash(flask_app, client):
+    original = flask_app.save_and_hash
+    saved = []
+
+    def recording_save(file, path):
+        saved.append(path)
+        raise OSError('stop here')
+
+    flask_app.save_and_hash = recording_save
+    try:
+        for route in ('/api/predict', '/api/predict', '/api/analyze-video'):
+            client.post(route, data={'file': (io.BytesIO(b'\0' * 64), '../../escape.avi')})
+    finally:
+        flask_app.save_and_hash = original
+
+    assert len(saved) == 3 and len(set(saved)) == 3
+    for path in saved:
+        assert os.path.dirname(path) == flask_app.TEMP_DIR
+        assert path.endswith('_escape.avi')
+
+
+if __name__ == "__main__":
+    if pytest.main([__file__, '-q']) == 0:
+        print("\n✅ All app route tests passed!")
@@ -0,0 +1,112 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+
+import cloudinary.uploader
+import pytest
+
+from cloudinary_config import CloudinaryClient
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """Local stand-in for the Cloudinary upload API; records each request"""
+
+    protocol_version = 'HTTP/1.1'
+    requests = []
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        StandIn.connections += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        StandIn.requests.append({'content_range': self.headers.get('Content-Range'), 'size': len(body)})
+
+        if b'fail.jpg' in body:
+            status, result = 400, {'error': {'message': 'rejected'}}
+        else:
+            status, result = 200, {'public_id': 'test', 'secure_url': 'https://stand-in.local/test'}
+
+        data = json.dumps(result).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def base(serve):
+    return serve(StandIn)
+
+
+@pytest.fixture(autouse=True)
+def fresh_counts():
+    StandIn.requests = []
+    StandIn.connections = 0
+
+
+def make_client(base, **kwargs):
+    return CloudinaryClient(cloud_name='test', api_key='1', api_secret='secret', upload_prefix=base, **kwargs)
+
+
+def make_file(folder, name, size):
+    path = str(folder / name)
+    with open(path, 'wb') as f:
+        f.write(os.urandom(size))
+    return path
+
+
+def test_small_file_single_request_reusing_connection(base, tmp_path):
+    client = make_client(base)
+    path = make_file(tmp_path, 'photo.jpg', 1000)
+
+    for _ in range(3):
+        assert client.upload(path, 'test') == 'https://stand-in.local/test'
+
+    assert [r['content_range'] for r in StandIn.requests] == [None, None, None]
+    assert StandIn.connections == 1
+
+
+def test_large_file_is_chunked(base, tmp_path):
+    client = make_client(base, large_file_bytes=5000, chunk_bytes=4000)
+    path = make_file(tmp_path, 'video.mp4', 10000)
+
+    assert client.upload(path, 'test') == 'https://stand-in.local/test'
+    assert [r['content_range'] for r in StandIn.requests] == [
+        'bytes 0-3999/10000', 'bytes 4000-7999/10000', 'bytes 8000-9999/10000'
+    ]
+
+
+def test_parallel_uploads_share_the_pool(base, tmp_path):
+    client = make_client(base)
+    paths = [make_file(tmp_path, f"{i}.jpg", 1000) for i in range(6)]
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        urls = list(pool.map(lambda path: client.upload(path, 'test'), paths))
+
+    assert urls == ['https://stand-in.local/test'] * 6
+    assert StandIn.connections <= 3
+
+
+def test_missing_private_connector_falls_back(base, tmp_path):
+    saved = cloudinary.uploader._http
+    del cloudinary.uploader._http
+
+    try:
+        client = make_client(base)
+        assert not hasattr(cloudinary.uploader, '_http')  # Left alone, not recreated
+    finally:
+        cloudinary.uploader._http = saved
+
+    assert client.upload(make_file(tmp_path, 'photo.jpg', 1000), 'test') == 'https://stand-in.local/test'
+
+
+if __name__ == "__main__":
+    if pytest.main([__file__, '-q']) == 0:
+        print("✅ Cloudinary client tests passed")
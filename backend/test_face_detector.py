@@ -0,0 +1,135 @@
+import numpy as np
+
+import face_detector
+from face_detector import Face, FaceTracker, crop_face, detect_faces, crop_primary_face, pipeline_version
+
+RNG = np.random.default_rng(0)
+PATCH = RNG.integers(0, 255, (80, 80, 3), dtype=np.uint8)  # Stands in for a face
+
+
+def make_frame(x, y, background=100):
+    """640x480 frame with a smooth background and PATCH at (x, y)"""
+
+    ramp = np.linspace(background - 40, background + 40, 640, dtype=np.float32)
+    frame = np.repeat(np.tile(ramp, (480, 1))[:, :, None], 3, axis=2).astype(np.uint8)
+    frame[y:y + 80, x:x + 80] = PATCH
+    return frame
+
+
+class FakeDetector:
+    """Reports the patch wherever the test says it is (in detection coordinates)"""
+
+    def __init__(self):
+        self.box = None
+        self.calls = 0
+
+    def __call__(self, small):
+        self.calls += 1
+        if self.box is None:
+            return []
+        scale = 640 / small.shape[1]
+        return [Face(tuple(value / scale for value in self.box), None, 1.0)]
+
+
+def test_tracks_moving_face_without_redetecting():
+    detector = FakeDetector()
+    tracker = FaceTracker(detector)
+
+    for step in range(6):
+        x, y = 200 + step * 12, 150 + step * 6
+        detector.box = (x, y, 80, 80)
+        faces = tracker.update(make_frame(x, y))
+
+        assert len(faces) == 1
+        found_x, found_y, w, h = faces[0].box
+        assert abs(found_x - x) <= 2 and abs(found_y - y) <= 2
+        assert (w, h) == (80, 80)
+
+    assert detector.calls == 1
+    assert tracker.tracked_frames == 5
+
+
+def test_scene_change_triggers_detection():
+    detector = FakeDetector()
+    tracker = FaceTracker(detector)
+
+    detector.box = (200, 150, 80, 80)
+    tracker.update(make_frame(200, 150))
+    tracker.update(make_frame(204, 150))
+    assert detector.calls == 1
+
+    # Same face, very different exposure
+    tracker.update(make_frame(204, 150, background=220))
+    assert detector.calls == 2
+
+
+def test_lost_track_triggers_detection():
+    detector = FakeDetector()
+    tracker = FaceTracker(detector)
+
+    detector.box = (200, 150, 80, 80)
+    tracker.update(make_frame(200, 150))
+
+    # The face leaves the frame
+    frame = make_frame(200, 150)
+    frame[150:230, 200:280] = make_frame(0, 0)[300:380, 200:280]
+    detector.box = None
+
+    assert tracker.update(frame) == []
+    assert detector.calls == 2
+
+    # Nothing to track, so every frame is checked for a new face
+    tracker.update(frame)
+    assert detector.calls == 3
+
+
+def test_crop_face():
+    frame = make_frame(200, 150)
+
+    crop = crop_face(frame, Face((200, 150, 80, 80), None, 1.0), size=80, margin=0)
+    assert crop.shape == (80, 80, 3)
+    assert np.abs(crop.astype(int) - PATCH.astype(int)).mean() < 2
+
+    # Level eyes: no rotation. Tilted eyes: the crop comes out rotated
+    level = crop_face(frame, Face((200, 150, 80, 80), ((220, 180), (260, 180)), 1.0), size=80, margin=0)
+    tilted = crop_face(frame, Face((200, 150, 80, 80), ((220, 170), (260, 190)), 1.0), size=80, margin=0)
+    assert np.array_equal(level, crop)
+    assert not np.array_equal(tilted, crop)
+
+    # Boxes at the edge are padded, not shrunk
+    assert crop_face(frame, Face((600, 440, 80, 80), None, 1.0)).shape == (224, 224, 3)
+
+
+def test_detect_faces_rescales_and_sorts():
+    def detector(small):
+        assert small.shape[1] == face_detector.FACE_DETECT_WIDTH
+        return [Face((10, 10, 20, 20), None, 0.9), Face((100, 50, 40, 40), ((110, 60), (130, 60)), 0.95)]
+
+    faces = detect_faces(make_frame(0, 0), detector)
+
+    assert [face.box for face in faces] == [(200, 100, 80, 80), (20, 20, 40, 40)]
+    assert faces[0].landmarks == ((220, 120), (260, 120))
+    assert crop_primary_face(make_frame(0, 0), lambda small: []) is None
+
+
+def test_disabled():
+    enabled = face_detector.FACE_CROP_ENABLED
+    face_detector.FACE_CROP_ENABLED = False
+
+    try:
+        assert face_detector.get_detector() is None
+        assert pipeline_version('model-1') == 'model-1'
+        assert FaceTracker().update(make_frame(0, 0)) == []
+    finally:
+        face_detector.FACE_CROP_ENABLED = enabled
+
+
+if __name__ == '__main__':
+    test_tracks_moving_face_without_redetecting()
+    test_scene_change_triggers_detection()
+    test_lost_track_triggers_detection()
+    test_crop_face()
+    test_detect_faces_rescales_and_sorts()
+    test_disabled()
+
+    print("\n✅ All face detector tests passed!")
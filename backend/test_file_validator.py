@@ -0,0 +1,59 @@
+import io
+
+from werkzeug.datastructures import FileStorage
+
+import file_validator
+from file_validator import validate_file, is_image, is_video
+
+
+def upload(filename, size=10):
+    return FileStorage(stream=io.BytesIO(b'\0' * size), filename=filename)
+
+
+def test_extensions():
+    assert is_image('photo.JPG')
+    assert is_image('photo.webp')
+    assert not is_image('clip.mp4')
+    assert is_video('clip.mov')
+    assert not is_video('notes.txt')
+    assert not is_video('no_extension')
+
+
+def test_accepts_images_and_videos():
+    for filename in ('photo.jpg', 'photo.png', 'clip.mp4', 'clip.mkv'):
+        assert validate_file(upload(filename)) == (True, "Valid file")
+
+
+def test_rejects_missing_and_unknown_files():
+    assert validate_file(None) == (False, "No filename provided")
+    assert validate_file(upload('')) == (False, "No filename provided")
+
+    valid, message = validate_file(upload('script.exe'))
+    assert not valid
+    assert message.startswith("File type not allowed")
+
+
+def test_rejects_large_files_without_moving_the_stream():
+    original = file_validator.MAX_FILE_SIZE
+    file_validator.MAX_FILE_SIZE = 100
+
+    try:
+        file = upload('photo.jpg', size=101)
+        valid, message = validate_file(file)
+        assert not valid
+        assert 'too large' in message
+
+        file = upload('photo.jpg', size=100)
+        assert validate_file(file)[0]
+        assert file.stream.tell() == 0  # Still readable from the start
+    finally:
+        file_validator.MAX_FILE_SIZE = original
+
+
+if __name__ == '__main__':
+    test_extensions()
+    test_accepts_images_and_videos()
+    test_rejects_missing_and_unknown_files()
+    test_rejects_large_files_without_moving_the_stream()
+
+    print("\n✅ All file validator tests passed!")
@@ -0,0 +1,119 @@
+import threading
+import numpy as np
+from app.models.inference import InferenceEngine, DummyModel
+
+
+class RecordingModel:
+    """Test backend: echoes each image's pixel value and records batch sizes"""
+
+    version = "test-1"
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict_batch(self, images):
+        self.batch_sizes.append(len(images))
+        return [{"prediction": "Real", "confidence": float(image[0, 0])} for image in images]
+
+
+def make_image(value):
+    return np.full((4, 4), value, dtype=np.float32)
+
+
+def test_dummy_model():
+    engine = InferenceEngine(DummyModel())
+    result = engine.predict(make_image(0))
+
+    assert result == {"prediction": "Real", "confidence": 85.5}
+    assert engine.model_version == "dummy-1"
+
+
+def test_results_go_back_to_their_callers():
+    model = RecordingModel()
+    engine = InferenceEngine(model, max_batch_size=8, max_wait_ms=50)
+
+    results = {}
+
+    def caller(value):
+        results[value] = engine.predict(make_image(value))["confidence"]
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {i: float(i) for i in range(20)}
+    assert max(model.batch_sizes) <= 8
+    assert len(model.batch_sizes) < 20  # Requests were actually batched
+
+
+def test_predict_many_keeps_order():
+    engine = InferenceEngine(RecordingModel(), max_batch_size=3)
+    results = engine.predict_many([make_image(i) for i in range(7)])
+
+    assert [r["confidence"] for r in results] == [float(i) for i in range(7)]
+
+
+def test_backend_errors_reach_callers():
+    class BrokenModel:
+        def predict_batch(self, images):
+            raise RuntimeError("model crashed")
+
+    engine = InferenceEngine(BrokenModel())
+
+    try:
+        engine.predict(make_image(1))
+        assert False, "expected an error"
+    except RuntimeError as e:
+        assert str(e) == "model crashed"
+
+
+def test_bad_input_only_fails_its_own_caller():
+    model = RecordingModel()
+    engine = InferenceEngine(model, max_wait_ms=50)
+
+    bad = [engine.submit(None), engine.submit(np.zeros((0, 4))), engine.submit("image.jpg")]
+    good = engine.submit(make_image(3))
+
+    assert good.result(timeout=5)["confidence"] == 3.0
+    for future in bad:
+        assert isinstance(future.exception(timeout=5), ValueError)
+    assert model.batch_sizes == [1]
+
+
+def test_batch_failure_is_narrowed_to_the_image_that_caused_it():
+    class PickyModel(RecordingModel):
+        def predict_batch(self, images):
+            if any(image[0, 0] == 13 for image in images):
+                raise RuntimeError("unlucky image")
+            return super().predict_batch(images)
+
+    engine = InferenceEngine(PickyModel(), max_wait_ms=50)
+    futures = [engine.submit(make_image(i)) for i in (11, 12, 13, 14)]
+
+    assert str(futures[2].exception(timeout=5)) == "unlucky image"
+    assert [futures[i].result(timeout=5)["confidence"] for i in (0, 1, 3)] == [11.0, 12.0, 14.0]
+
+
+def test_short_result_list_fails_instead_of_hanging():
+    class ShortModel:
+        def predict_batch(self, images):
+            return [{"prediction": "Real", "confidence": 1.0}][:len(images) - 1]
+
+    engine = InferenceEngine(ShortModel(), max_wait_ms=50)
+    futures = [engine.submit(make_image(i)) for i in range(3)]
+
+    for future in futures:
+        assert isinstance(future.exception(timeout=5), RuntimeError)
+
+
+if __name__ == "__main__":
+    test_dummy_model()
+    test_results_go_back_to_their_callers()
+    test_predict_many_keeps_order()
+    test_backend_errors_reach_callers()
+    test_bad_input_only_fails_its_own_caller()
+    test_batch_failure_is_narrowed_to_the_image_that_caused_it()
+    test_short_result_list_fails_instead_of_hanging()
+    print("All inference tests passed! ✓")
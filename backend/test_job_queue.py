@@ -0,0 +1,94 @@
+import os
+import subprocess
+import sys
+import time
+import pytest
+import job_queue
+
+@pytest.fixture(scope='module', autouse=True)
+def jobs_db(tmp_path_factory):
+    # Keep test jobs out of the real database
+    job_queue.JOBS_DB = str(tmp_path_factory.mktemp('jobs') / 'jobs.db')
+    job_queue._db_ready = False
+
+
+def wait_for(job_id, timeout=5):
+    """Poll until the job finishes"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = job_queue.get_job(job_id)
+        if job['status'] in (job_queue.STATUS_DONE, job_queue.STATUS_FAILED):
+            return job
+        time.sleep(0.05)
+    raise TimeoutError(job_id)
+
+
+def slow_count(n, progress=None):
+    """Fake job that reports progress for n frames"""
+    for i in range(n):
+        time.sleep(0.01)
+        progress(i + 1, n)
+    return {'frames': n}
+
+
+def failing_job(progress=None):
+    raise ValueError("boom")
+
+
+def test_job_runs_and_reports_progress():
+    job_id = job_queue.submit_job('test', slow_count, 5)
+    job = wait_for(job_id)
+
+    assert job['status'] == job_queue.STATUS_DONE
+    assert job['progress']['frames_done'] == 5
+    assert job['progress']['percent'] == 100
+    assert job['result'] == {'frames': 5}
+
+
+def test_failed_job_keeps_error():
+    job_id = job_queue.submit_job('test', failing_job)
+    job = wait_for(job_id)
+
+    assert job['status'] == job_queue.STATUS_FAILED
+    assert job['error'] == "boom"
+
+
+def test_unknown_job():
+    assert job_queue.get_job('does-not-exist') is None
+
+
+def test_jobs_of_exited_processes_are_failed():
+    job_queue.init_db()
+
+    exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+    exited.wait()
+
+    rows = [
+        ('orphan-running', job_queue.STATUS_RUNNING, exited.pid),
+        ('orphan-queued', job_queue.STATUS_QUEUED, None),  # From before jobs had an owner
+        ('same-pid', job_queue.STATUS_QUEUED, os.getpid()),  # Earlier process that had our pid
+        ('other-live-worker', job_queue.STATUS_RUNNING, os.getppid()),
+        ('finished', job_queue.STATUS_DONE, exited.pid)
+    ]
+    with job_queue._connect() as conn:
+        conn.executemany(
+            "INSERT INTO jobs (id, kind, status, created_at, owner_pid) VALUES (?, 'test', ?, ?, ?)",
+            [(job_id, status, time.time(), pid) for job_id, status, pid in rows]
+        )
+
+    # What a restarted process does the first time it opens the database
+    job_queue._db_ready = False
+    job_queue.init_db()
+
+    for job_id in ('orphan-running', 'orphan-queued', 'same-pid'):
+        job = job_queue.get_job(job_id)
+        assert job['status'] == job_queue.STATUS_FAILED
+        assert 'restart' in job['error']
+
+    assert job_queue.get_job('other-live-worker')['status'] == job_queue.STATUS_RUNNING
+    assert job_queue.get_job('finished')['status'] == job_queue.STATUS_DONE
+
+
+if __name__ == "__main__":
+    if pytest.main([__file__, '-q']) == 0:
+        print("All job queue tests passed! ✓")
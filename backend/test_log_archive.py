@@ -0,0 +1,80 @@
+import json
+import os
+from datetime import datetime
+import log_archive
+
+
+def write_segment(path, entries):
+    with open(path, 'w') as f:
+        for timestamp, endpoint, latency in entries:
+            f.write(json.dumps({
+                'timestamp': timestamp,
+                'endpoint': endpoint,
+                'method': 'POST',
+                'ip_address': '127.0.0.1',
+                'user_agent': 'pytest',
+                'status_code': 200,
+                'response_time_ms': latency,
+                'error': None
+            }) + '\n')
+        f.write("not json\n")
+
+
+def test_compact_and_query(tmp_path):
+    folder = str(tmp_path)
+    log_file = os.path.join(folder, 'requests.log')
+    archive_dir = os.path.join(folder, 'archive')
+
+    write_segment(log_file + '.1', [
+        (f"2026-10-01 10:{i % 60:02d}:00", '/api/analyze-video', float(i)) for i in range(1, 101)
+    ])
+    write_segment(log_file + '.2', [
+        ("2026-10-02 09:00:00", '/api/analyze-video', 500.0),
+        ("2026-10-02 09:30:00", '/api/predict', 1.0),
+    ])
+    write_segment(log_file, [("2026-10-03 09:00:00", '/api/predict', 1.0)])  # Live file, left alone
+
+    assert log_archive.compact_logs(log_file, archive_dir) == 102
+    assert not os.path.exists(log_file + '.1')
+    assert os.path.exists(log_file)
+    assert sorted(os.listdir(archive_dir)) == ['date=2026-10-01', 'date=2026-10-02']
+
+    rows = log_archive.query_latency(
+        endpoint='/api/analyze-video',
+        start=datetime(2026, 10, 1),
+        end=datetime(2026, 10, 3),
+        by='hour',
+        percentiles=(50, 99),
+        archive_dir=archive_dir
+    )
+
+    assert [row['period'] for row in rows] == ['2026-10-01T10:00:00', '2026-10-02T09:00:00']
+    assert rows[0]['requests'] == 100
+    assert 45 <= rows[0]['p50'] <= 55
+    assert rows[0]['p99'] >= 98
+    assert rows[1] == {'period': '2026-10-02T09:00:00', 'requests': 1, 'p50': 500.0, 'p99': 500.0}
+
+
+def test_query_skips_days_outside_range(tmp_path):
+    folder = str(tmp_path)
+    log_file = os.path.join(folder, 'requests.log')
+    archive_dir = os.path.join(folder, 'archive')
+
+    write_segment(log_file + '.1', [("2026-09-01 12:00:00", '/api/predict', 10.0)])
+    log_archive.compact_logs(log_file, archive_dir)
+
+    assert log_archive.query_latency(start=datetime(2026, 10, 1), end=datetime(2026, 10, 8), archive_dir=archive_dir) == []
+    assert len(log_archive.query_latency(start=datetime(2026, 9, 1), end=datetime(2026, 9, 2), by='day', archive_dir=archive_dir)) == 1
+
+
+def test_compact_keeps_newest_segments(tmp_path):
+    folder = str(tmp_path)
+    log_file = os.path.join(folder, 'requests.log')
+    archive_dir = os.path.join(folder, 'archive')
+
+    for i in range(1, 5):
+        write_segment(f"{log_file}.{i}", [(f"2026-10-0{i} 12:00:00", '/api/predict', 10.0)])
+
+    assert log_archive.compact_logs(log_file, archive_dir, keep=2) == 2
+    assert sorted(os.listdir(folder)) == ['archive', 'requests.log.1', 'requests.log.2']
+    assert sorted(os.listdir(archive_dir)) == ['date=2026-10-03', 'date=2026-10-04']
@@ -0,0 +1,55 @@
+from app.utils import metrics
+
+
+def _lines(prefix):
+    return [line for line in metrics.render_prometheus().splitlines() if line.startswith(prefix)]
+
+
+def test_histogram_buckets_are_cumulative():
+    metrics.observe_request('flask', '/test/buckets', 'GET', 200, 0.003)
+    metrics.observe_request('flask', '/test/buckets', 'GET', 200, 0.2)
+
+    lines = _lines('http_request_duration_seconds_bucket{app="flask",endpoint="/test/buckets"')
+    counts = {line.split('le="')[1].split('"')[0]: int(line.rsplit(' ', 1)[1]) for line in lines}
+
+    assert counts['0.001'] == 0
+    assert counts['0.005'] == 1
+    assert counts['0.25'] == 2
+    assert counts['+Inf'] == 2
+
+
+def test_stage_uses_current_endpoint():
+    metrics.set_current_endpoint('/test/stage')
+
+    with metrics.stage('save'):
+        pass
+
+    assert _lines('request_stage_duration_seconds_count{endpoint="/test/stage",stage="save"} 1')
+
+
+def test_timed_iter_records_one_observation():
+    metrics.set_current_endpoint('/test/iter')
+
+    assert list(metrics.timed_iter(range(5), 'extract_frames')) == [0, 1, 2, 3, 4]
+    assert _lines('request_stage_duration_seconds_count{endpoint="/test/iter",stage="extract_frames"} 1')
+
+
+def test_fastapi_metrics_endpoint():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    client = TestClient(app)
+    client.get('/health')
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain')
+    assert 'http_request_duration_seconds_count{app="fastapi",endpoint="/health",method="GET",status="200"}' in response.text
+
+
+if __name__ == "__main__":
+    test_histogram_buckets_are_cumulative()
+    test_stage_uses_current_endpoint()
+    test_timed_iter_records_one_observation()
+    test_fastapi_metrics_endpoint()
+    print("✅ Metrics tests passed")
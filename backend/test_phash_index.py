@@ -0,0 +1,95 @@
+import random
+import cv2
+import numpy as np
+import pytest
+import phash_index
+from phash_index import PerceptualIndex, phash, hamming
+
+
+@pytest.fixture(scope='module', autouse=True)
+def index_db(tmp_path_factory):
+    # Keep test entries out of the real index
+    phash_index.PHASH_DB = str(tmp_path_factory.mktemp('phash') / 'phash.db')
+    phash_index._db_ready = False
+    phash_index._indexes.clear()  # Other tests may have synced from their own index
+    phash_index._rows.clear()
+    phash_index._row_ids.clear()
+    phash_index._last_row_id = 0
+
+
+def make_image(seed):
+    """Smooth random 'photo' so the hash has real structure to work with"""
+    rng = np.random.default_rng(seed)
+    noise = rng.integers(0, 255, (24, 32, 3), dtype=np.uint8)
+    return cv2.resize(noise, (640, 480), interpolation=cv2.INTER_CUBIC)
+
+
+def recompress(image):
+    """Downscale and save as a low quality JPEG, like a reposted copy"""
+    small = cv2.resize(image, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA)
+    _, encoded = cv2.imencode('.jpg', small, [cv2.IMWRITE_JPEG_QUALITY, 40])
+    return cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+
+
+def test_recompressed_copy_is_close():
+    original = make_image(1)
+
+    assert hamming(phash(original), phash(recompress(original))) <= phash_index.MAX_DISTANCE
+    assert hamming(phash(original), phash(make_image(2))) > phash_index.MAX_DISTANCE
+
+
+def test_search_matches_brute_force():
+    random.seed(0)
+    index = PerceptualIndex()
+    hashes = [random.getrandbits(64) for _ in range(5000)]
+    for i, value in enumerate(hashes):
+        index.add(value, i)
+
+    for _ in range(50):
+        query = random.choice(hashes) ^ random.getrandbits(64) & random.getrandbits(64) & random.getrandbits(64)
+        expected = sorted(h for h in hashes if hamming(h, query) <= 6)
+        found = sorted(h for _, h, _ in index.search(query, 6))
+        assert found == expected
+
+
+def test_near_duplicate_lookup_by_namespace():
+    original = make_image(3)
+    phash_index.add_to_index(phash(original), 'predict:v1', 'cache-key-1')
+
+    distance, value = phash_index.find_near_duplicate(phash(recompress(original)), 'predict:v1')
+    assert value == 'cache-key-1'
+    assert distance <= phash_index.MAX_DISTANCE
+
+    assert phash_index.find_near_duplicate(phash(original), 'predict:v2') is None
+    assert phash_index.find_near_duplicate(phash(make_image(4)), 'predict:v1') is None
+
+
+def test_sync_picks_up_other_workers_and_keeps_newest_rows():
+    original = phash_index.MAX_ENTRIES
+    phash_index.MAX_ENTRIES = 3
+
+    try:
+        # Rows written straight to the database, as another worker would
+        with phash_index._connect() as conn:
+            for i in range(5):
+                conn.execute(
+                    "INSERT INTO hashes (namespace, phash, value) VALUES (?, ?, ?)",
+                    ('other:v1', phash_index._signed(i << 40), f"row{i}")
+                )
+
+        phash_index._sync()
+
+        assert phash_index.find_near_duplicate(4 << 40, 'other:v1', 0) == (0, 'row4')
+        assert phash_index.find_near_duplicate(0, 'other:v1', 0) is None  # Evicted
+        assert phash_index.get_index_stats()['other:v1'] <= 3
+
+        phash_index.purge_old_hashes(max_entries=3)
+        with phash_index._connect() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM hashes").fetchone()[0] == 3
+    finally:
+        phash_index.MAX_ENTRIES = original
+
+
+if __name__ == "__main__":
+    if pytest.main([__file__, '-q']) == 0:
+        print("All pHash index tests passed! ✓")
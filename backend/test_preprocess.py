@@ -0,0 +1,186 @@
+import cv2
+import numpy as np
+import pytest
+
+from app.models.inference import InferenceEngine
+from app.models.preprocess import BufferPool, BatchPreprocessor, IMAGENET_MEAN, IMAGENET_STD
+from video_processor import iter_video_frames, read_sampled_frames
+
+
+@pytest.fixture(scope='module')
+def clip(make_clip):
+    return make_clip(60, pattern='noise', seed=2)
+
+
+def reference(image, size):
+    """Straightforward per-image version of what BatchPreprocessor does"""
+
+    resized = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    rgb = resized[:, :, ::-1].astype(np.float32) / 255
+    return (rgb - np.array(IMAGENET_MEAN, dtype=np.float32)) / np.array(IMAGENET_STD, dtype=np.float32)
+
+
+def test_pool_reuses_buffers():
+    pool = BufferPool(max_free=2)
+
+    first = pool.acquire((4, 4, 3))
+    pool.release(first)
+    assert pool.acquire((4, 4, 3)) is first
+    assert pool.acquire((4, 4, 3)) is not first  # Handed out already
+
+    # Different shapes and dtypes don't mix
+    pool.release(first)
+    assert pool.acquire((4, 4, 3), np.float32) is not first
+    assert pool.acquire((8, 4, 3)) is not first
+
+    # Idle buffers are capped, and views are never taken in
+    for _ in range(5):
+        pool.release(np.empty((2, 2), np.uint8))
+    pool.release(np.empty((4, 4), np.uint8)[:2])
+
+    stats = pool.stats()
+    assert stats['free'] == 3  # 1 + 2
+    assert stats['reused'] == 1
+
+
+def test_batch_matches_per_image_reference():
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 255, shape, dtype=np.uint8) for shape in ((480, 640, 3), (300, 300, 3), (720, 1280, 3))]
+
+    preprocess = BatchPreprocessor((224, 224))
+    tensor = preprocess(images)
+
+    assert tensor.shape == (3, 224, 224, 3)
+    assert tensor.dtype == np.float32
+    assert tensor.flags['C_CONTIGUOUS']
+
+    for image, row in zip(images, tensor):
+        assert np.allclose(row, reference(image, (224, 224)), atol=1e-5)
+
+
+def test_buffers_are_reused_between_batches():
+    preprocess = BatchPreprocessor((32, 32))
+    image = np.full((64, 64, 3), (255, 0, 0), dtype=np.uint8)  # Pure blue in BGR
+
+    first = preprocess([image] * 4)
+    second = preprocess([image] * 2)
+
+    assert np.shares_memory(first, second)
+
+    # Blue ends up in the last (RGB) channel
+    blue = (1 - IMAGENET_MEAN[2]) / IMAGENET_STD[2]
+    assert np.allclose(second[..., 2], blue, atol=1e-5)
+    assert np.allclose(second[..., 0], -IMAGENET_MEAN[0] / IMAGENET_STD[0], atol=1e-5)
+
+
+def test_odd_inputs():
+    preprocess = BatchPreprocessor((16, 16))
+
+    tensor = preprocess([
+        np.full((4, 4), 128.0, dtype=np.float32),  # Grayscale float
+        np.zeros((20, 20, 4), dtype=np.uint8)  # BGRA
+    ])
+
+    assert tensor.shape == (2, 16, 16, 3)
+    assert np.isfinite(tensor).all()
+
+
+def test_bad_images_are_left_out():
+    preprocess = BatchPreprocessor((16, 16))
+    good = [np.full((8, 8, 3), 40, np.uint8), np.full((8, 8, 3), 200, np.uint8)]
+    batch = [good[0], np.zeros((8, 8, 3), np.float16), good[1], np.zeros((8, 8, 2), np.uint8)]
+
+    errors = []
+    tensor = preprocess(batch, errors)
+
+    assert [position for position, _ in errors] == [1, 3]
+    assert np.allclose(tensor, preprocess(good))
+
+    try:
+        preprocess(batch)
+        assert False, "expected an error without an errors list"
+    except Exception:
+        pass
+
+
+def test_engine_runs_the_rest_of_a_batch_with_a_bad_image():
+    class TensorModel:
+        version = 'tensor-1'
+        input_size = (16, 16)
+
+        def __init__(self):
+            self.batches = []
+
+        def predict_batch(self, batch):
+            self.batches.append(len(batch))
+            return [{'prediction': 'Real', 'confidence': float(row.mean())} for row in batch]
+
+    model = TensorModel()
+    engine = InferenceEngine(model, max_wait_ms=50)
+    futures = [
+        engine.submit(np.zeros((8, 8, 3), np.uint8)),
+        engine.submit(np.zeros((8, 8, 3), np.float16)),
+        engine.submit(np.zeros((8, 8, 3), np.uint8))
+    ]
+
+    assert futures[0].result(timeout=5)['prediction'] == 'Real'
+    assert futures[2].result(timeout=5)['prediction'] == 'Real'
+    assert futures[1].exception(timeout=5) is not None
+    assert model.batches == [2]  # One batch without the bad image, no per-image retries
+
+
+def test_engine_preprocesses_for_backends_with_input_size():
+    class TensorModel:
+        version = 'tensor-1'
+        input_size = (48, 32)
+
+        def __init__(self):
+            self.inputs = []
+
+        def predict_batch(self, batch):
+            self.inputs.append((type(batch), batch.shape, batch.dtype))
+            return [{'prediction': 'Real', 'confidence': float(row.mean())} for row in batch]
+
+    model = TensorModel()
+    engine = InferenceEngine(model, max_wait_ms=20)
+    engine.predict_many([np.zeros((100, 100, 3), np.uint8)] * 3)
+
+    kind, shape, dtype = model.inputs[0]
+    assert kind is np.ndarray
+    assert shape[1:] == (32, 48, 3)
+    assert dtype == np.float32
+
+
+def test_pooled_decode_matches_and_recycles(clip):
+    plain = [frame.image for frame in iter_video_frames(clip, max_frames=10, workers=1, sampling='uniform')]
+
+    pool = BufferPool()
+    for _ in range(3):
+        pooled = list(iter_video_frames(clip, max_frames=10, workers=1, sampling='uniform', pool=pool))
+
+        assert all(np.array_equal(a, frame.image) for a, frame in zip(plain, pooled))
+
+        for frame in pooled:
+            pool.release(frame.image)
+
+    # Later passes decode into the buffers the first one released
+    stats = pool.stats()
+    assert stats['allocated'] == 10
+    assert stats['reused'] == 20
+
+
+def test_sequential_reads_skip_into_scratch(clip):
+    pool = BufferPool()
+    video = cv2.VideoCapture(clip)
+
+    frames = list(read_sampled_frames(video, [5, 30, 55], mode='sequential', pool=pool))
+    video.release()
+
+    assert [index for index, _ in frames] == [5, 30, 55]
+    assert pool.stats()['allocated'] == 3  # Only the kept frames come from the pool
+    assert len({id(frame) for _, frame in frames}) == 3
+
+
+if __name__ == '__main__':
+    if pytest.main([__file__, '-q']) == 0:
+        print("\n✅ All preprocessing tests passed!")
@@ -0,0 +1,207 @@
+import os
+import re
+import struct
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from remote_video import RemoteVideoStream
+from url_handler import DownloadError
+from video_processor import iter_video_frames, get_video_info
+
+
+def faststart(data):
+    """Move the mp4 index (moov) in front of the frames, like a streaming-ready upload"""
+
+    atoms = []
+    position = 0
+    while position < len(data):
+        size = struct.unpack('>I', data[position:position + 4])[0]
+        atoms.append(bytearray(data[position:position + size]))
+        position += size
+
+    moov = next(atom for atom in atoms if atom[4:8] == b'moov')
+    _shift_chunk_offsets(moov, len(moov))
+
+    rest = [atom for atom in atoms if atom is not moov]
+    mdat = next(i for i, atom in enumerate(rest) if atom[4:8] == b'mdat')
+    return b''.join(rest[:mdat] + [moov] + rest[mdat:])
+
+
+def _shift_chunk_offsets(atom, shift):
+    """Add shift to every stco entry under a container atom (in place)"""
+
+    position = 8
+    while position < len(atom):
+        size, kind = struct.unpack('>I4s', atom[position:position + 8])
+        if kind in (b'trak', b'mdia', b'minf', b'stbl'):
+            child = atom[position:position + size]
+            _shift_chunk_offsets(child, shift)
+            atom[position:position + size] = child
+        elif kind == b'stco':
+            count = struct.unpack('>I', atom[position + 12:position + 16])[0]
+            for offset in range(position + 16, position + 16 + 4 * count, 4):
+                atom[offset:offset + 4] = struct.pack('>I', struct.unpack('>I', atom[offset:offset + 4])[0] + shift)
+        position += size
+
+
+@pytest.fixture(scope='module')
+def clip(make_clip):
+    """A noisy mp4 clip, as bytes (noise keeps it from compressing to nothing)"""
+
+    with open(make_clip(250, name='clip.mp4', size=(160, 120), fourcc='mp4v', pattern='noise'), 'rb') as f:
+        return f.read()
+
+
+class VideoHost(BaseHTTPRequestHandler):
+    """Local stand-in for a video host, with or without Range support"""
+
+    ranges = True
+    total_known = True  # Content-Range ends in /<size> rather than /*
+    body = b''
+    bytes_sent = 0
+
+    def do_GET(self):
+        if self.path == '/page.html':
+            body = b'<html></html>'
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+
+        clip = VideoHost.body
+
+        if VideoHost.ranges and match and int(match.group(1)) >= len(clip):
+            self.send_response(416)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        if VideoHost.ranges and match:
+            start = int(match.group(1))
+            end = min(int(match.group(2) or len(clip) - 1), len(clip) - 1)
+            body = clip[start:end + 1]
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{end}/{len(clip) if VideoHost.total_known else '*'}")
+        else:
+            body = clip
+            self.send_response(200)
+
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+
+        try:
+            self.wfile.write(body)
+            VideoHost.bytes_sent += len(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def url(serve):
+    return f"{serve(VideoHost)}/clip.mp4"
+
+
+@pytest.fixture(autouse=True)
+def host(clip):
+    VideoHost.ranges = True
+    VideoHost.total_known = True
+    VideoHost.body = clip
+    VideoHost.bytes_sent = 0
+
+
+def test_ranged_reads_only_sampled_blocks(url, clip):
+    stream = RemoteVideoStream(url, block_size=64 * 1024)
+
+    assert stream.ranged
+    assert stream.size == len(clip)
+    assert get_video_info(stream)['total_frames'] == 250
+
+    frames = list(iter_video_frames(stream, max_frames=3, workers=1, sampling='uniform'))
+    stream.close()
+
+    assert [frame.index for frame in frames] == [0, 83, 166]
+    assert stream.stopped_reason is None
+    assert stream.bytes_fetched < len(clip)
+
+
+def test_without_range_support_spools_body(url, clip):
+    VideoHost.ranges = False
+    VideoHost.body = fast = faststart(clip)
+
+    stream = RemoteVideoStream(url)
+    assert not stream.ranged
+
+    frames = list(iter_video_frames(stream, max_frames=5, workers=1, sampling='uniform'))
+    stream.close()
+
+    assert [frame.index for frame in frames] == [0, 50, 100, 150, 200]
+    assert stream.stopped_reason is None
+    assert stream.bytes_fetched < len(fast) * 0.9  # Stopped after the last sampled frame
+
+
+def test_byte_budget_stops_reading(url):
+    stream = RemoteVideoStream(url, max_bytes=256 * 1024, block_size=64 * 1024)
+
+    frames = list(iter_video_frames(stream, max_frames=10, workers=1))
+    stream.close()
+
+    assert len(frames) < 10
+    assert stream.bytes_fetched <= 256 * 1024
+    assert 'budget' in stream.stopped_reason
+
+
+def test_too_large_without_ranges_is_rejected_up_front(url, clip):
+    VideoHost.ranges = False
+
+    try:
+        RemoteVideoStream(url, max_bytes=len(clip) // 2)
+        assert False, "expected DownloadError"
+    except DownloadError as e:
+        assert 'too large' in str(e)
+
+
+def test_non_video_is_rejected(url):
+    try:
+        RemoteVideoStream(url.replace('clip.mp4', 'page.html'))
+        assert False, "expected DownloadError"
+    except DownloadError as e:
+        assert 'video' in str(e)
+
+
+def test_stream_seek_and_read(url, clip):
+    stream = RemoteVideoStream(url, block_size=1000)
+
+    stream.seek(-10, os.SEEK_END)
+    assert stream.read() == clip[-10:]
+
+    stream.seek(995)
+    assert stream.read(10) == clip[995:1005]
+    assert stream.tell() == 1005
+    stream.close()
+
+
+def test_ranged_seek_to_end_without_known_size(url, clip):
+    VideoHost.total_known = False
+    stream = RemoteVideoStream(url, block_size=64 * 1024)
+
+    assert stream.ranged
+    assert stream.size is None
+
+    assert stream.seek(-10, os.SEEK_END) == len(clip) - 10
+    assert stream.read() == clip[-10:]
+    assert stream.size == len(clip)
+    stream.close()
+
+
+if __name__ == '__main__':
+    if pytest.main([__file__, '-q']) == 0:
+        print("\n✅ All remote video tests passed!")
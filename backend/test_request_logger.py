@@ -0,0 +1,84 @@
+import json
+import os
+import time
+import pytest
+import request_logger
+import request_stats
+
+
+@pytest.fixture(autouse=True)
+def fresh_log(tmp_path):
+    # Fresh log file per test, and log_request's stats kept out of logs/ too
+    request_logger.LOG_FILE = str(tmp_path / 'requests.log')
+    request_stats.STATS_FILE = str(tmp_path / 'request_stats.json')
+
+
+def log(n, endpoint='/api/health'):
+    for i in range(n):
+        request_logger.log_request(endpoint, 'GET', '127.0.0.1', 'pytest', 200, response_time=float(i))
+
+
+def test_entries_reach_disk_after_flush():
+    log(50)
+    assert request_logger.flush_logs()
+
+    with open(request_logger.LOG_FILE) as f:
+        entries = [json.loads(line) for line in f]
+
+    assert len(entries) == 50
+    assert entries[-1]['response_time_ms'] == 49.0
+
+
+def test_log_request_is_cheap():
+    start = time.perf_counter()
+    log(1000)
+    per_call = (time.perf_counter() - start) / 1000
+    request_logger.flush_logs()
+
+    assert per_call < 0.001  # Well under a millisecond, no file I/O on the caller
+
+
+def test_rotation_by_size():
+    old_limit = request_logger.LOG_MAX_BYTES
+    request_logger.LOG_MAX_BYTES = 2000
+    request_logger.LOG_ARCHIVE_ON_ROTATE = False
+
+    try:
+        for _ in range(5):
+            log(20)
+            request_logger.flush_logs()
+    finally:
+        request_logger.LOG_MAX_BYTES = old_limit
+        request_logger.LOG_ARCHIVE_ON_ROTATE = True
+
+    assert os.path.exists(request_logger.LOG_FILE + '.1')
+
+
+def test_rotation_keeps_backup_count():
+    old_limit, old_count = request_logger.LOG_MAX_BYTES, request_logger.LOG_BACKUP_COUNT
+    request_logger.LOG_MAX_BYTES = 2000
+    request_logger.LOG_BACKUP_COUNT = 2
+    request_logger.LOG_ARCHIVE_ON_ROTATE = False
+
+    try:
+        for _ in range(3):
+            log(1)
+            request_logger.flush_logs()
+            request_logger._rotate()  # Nothing to compact, older segments are dropped
+        assert sorted(request_logger._segments()) == [1, 2]
+
+        # With archiving, older segments wait for compact_logs instead
+        request_logger.LOG_ARCHIVE_ON_ROTATE = True
+        for _ in range(2):
+            log(1)
+            request_logger.flush_logs()
+            request_logger._rotate()
+        assert sorted(request_logger._segments()) == [1, 2, 3, 4]
+    finally:
+        request_logger.LOG_MAX_BYTES, request_logger.LOG_BACKUP_COUNT = old_limit, old_count
+        request_logger.LOG_ARCHIVE_ON_ROTATE = True
+
+
+if __name__ == "__main__":
+    if pytest.main([__file__, '-q']) == 0:
+        print("All request logger tests passed! ✓")
@@ -0,0 +1,107 @@
+import os
+import subprocess
+import sys
+import pytest
+import request_stats
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats(tmp_path):
+    request_stats.STATS_FILE = str(tmp_path / 'stats.json')
+    request_stats.reset_stats()
+
+
+def test_percentiles_within_bin_error():
+    for latency in range(1, 1001):  # 1..1000 ms
+        request_stats.record_request('/api/predict', 200, float(latency), now=1000)
+
+    latency = request_stats.get_stats(now=1000)['latency_ms']
+
+    assert abs(latency['p50'] - 500) / 500 < 0.06
+    assert abs(latency['p95'] - 950) / 950 < 0.06
+    assert abs(latency['p99'] - 990) / 990 < 0.06
+
+
+def test_sliding_windows_expire():
+    request_stats.record_request('/api/health', 200, 5.0, now=1000)
+    request_stats.record_request('/api/health', 500, 5.0, now=1200)
+
+    windows = request_stats.get_stats(now=1200)['windows']
+    assert windows['1m']['requests'] == 1
+    assert windows['1m']['status_classes'] == {'5xx': 1}
+    assert windows['5m']['requests'] == 2
+
+    windows = request_stats.get_stats(now=1000 + 4000)['windows']
+    assert windows['1h']['requests'] == 0
+
+
+def test_totals_and_endpoints():
+    request_stats.record_request('/api/health', 200, 1.0)
+    request_stats.record_request('/api/health', 200, 3.0)
+    request_stats.record_request('/api/predict', 400, None)
+
+    stats = request_stats.get_stats()
+    assert stats['total_requests'] == 3
+    assert stats['success_rate'] == 66.67
+    assert stats['avg_response_time_ms'] == 2.0
+    assert stats['endpoints']['/api/health']['requests'] == 2
+    assert stats['status_classes'] == {'2xx': 2, '4xx': 1}
+
+
+def test_survives_restart():
+    request_stats.record_request('/api/health', 200, 12.0)
+    request_stats.save_stats()
+
+    request_stats._state = None  # Simulate a fresh process
+    stats = request_stats.get_stats()
+
+    assert stats['total_requests'] == 1
+    assert stats['endpoints']['/api/health']['latency_ms']['p50'] is not None
+
+
+def save_as(pid, *requests):
+    """Aggregates another worker process saved"""
+    request_stats.reset_stats()
+    for endpoint, status, latency in requests:
+        request_stats.record_request(endpoint, status, latency, now=1000)
+
+    state = request_stats._state
+    request_stats._write(state, request_stats._process_file(pid))
+    request_stats.reset_stats()
+
+
+def test_workers_are_merged_not_overwritten():
+    other_worker = os.getppid()
+    save_as(other_worker, ('/api/predict', 200, 10.0), ('/api/predict', 500, 20.0))
+
+    request_stats.record_request('/api/predict', 200, 30.0, now=1000)
+    request_stats.save_stats()
+
+    stats = request_stats.get_stats(now=1000)
+
+    assert stats['total_requests'] == 3
+    assert stats['endpoints']['/api/predict']['requests'] == 3
+    assert stats['status_classes'] == {'2xx': 2, '5xx': 1}
+    assert stats['windows']['1m']['requests'] == 3
+
+    # Both files are still there, each with its own worker's numbers
+    assert len(request_stats._saved_files()) == 2
+
+
+def test_exited_workers_are_taken_over_once():
+    exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+    exited.wait()
+    save_as(exited.pid, ('/api/health', 200, 1.0), ('/api/health', 200, 2.0))
+
+    request_stats._state = None  # Fresh process
+    assert request_stats.get_stats()['total_requests'] == 2
+
+    # Its file was merged into ours, so it isn't counted again
+    assert [pid for pid, _ in request_stats._saved_files()] == [os.getpid()]
+    request_stats._state = None
+    assert request_stats.get_stats()['total_requests'] == 2
+
+
+if __name__ == "__main__":
+    if pytest.main([__file__, '-q']) == 0:
+        print("All request stats tests passed! ✓")
@@ -0,0 +1,74 @@
+import pytest
+import result_cache
+
+
+@pytest.fixture(scope='module', autouse=True)
+def cache_db(tmp_path_factory):
+    # Keep test entries out of the real cache
+    result_cache.CACHE_DB = str(tmp_path_factory.mktemp('cache') / 'cache.db')
+    result_cache._db_ready = False
+
+
+def test_hash_file_matches_save_and_hash(tmp_path):
+    class FakeUpload:
+        def __init__(self, data):
+            import io
+            self.stream = io.BytesIO(data)
+
+    path = str(tmp_path / 'upload.bin')
+    digest = result_cache.save_and_hash(FakeUpload(b'hello' * 1000), path)
+
+    assert digest == result_cache.hash_file(path)
+    assert open(path, 'rb').read() == b'hello' * 1000
+
+
+def test_miss_then_hit():
+    key = result_cache.make_key('abc', 'v1', 'predict')
+
+    assert result_cache.get_cached(key) is None
+    result_cache.set_cached(key, {'prediction': 'Real', 'file_url': 'https://x'})
+    assert result_cache.get_cached(key) == {'prediction': 'Real', 'file_url': 'https://x'}
+
+
+def test_model_version_is_part_of_key():
+    result_cache.set_cached(result_cache.make_key('same', 'v1', 'predict'), {'confidence': 1})
+
+    assert result_cache.get_cached(result_cache.make_key('same', 'v2', 'predict')) is None
+
+
+def test_evicted_entries_come_back_from_disk():
+    old_limit = result_cache.CACHE_MEMORY_BYTES
+    result_cache.CACHE_MEMORY_BYTES = 200
+
+    try:
+        for i in range(20):
+            result_cache.set_cached(f"k{i}", {'value': 'x' * 50})
+
+        before = result_cache.get_cache_stats()
+        assert before['memory_bytes'] <= 200
+        assert before['evictions'] > 0
+
+        assert result_cache.get_cached('k0') == {'value': 'x' * 50}
+        assert result_cache.get_cache_stats()['disk_hits'] == before['disk_hits'] + 1
+    finally:
+        result_cache.CACHE_MEMORY_BYTES = old_limit
+
+
+def test_purge_drops_expired_then_oldest_rows():
+    for i in range(5):
+        result_cache.set_cached(f"purge{i}", {'value': i})
+
+    with result_cache._connect() as conn:
+        conn.execute("UPDATE results SET created_at = 0 WHERE key = 'purge0'")
+        total = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    deleted = result_cache.purge_old_results(ttl_seconds=3600, max_rows=total - 2)
+
+    assert deleted == 2
+    assert result_cache.get_cached('purge0') is None  # Expired, gone from memory too
+    assert result_cache.get_cached('purge4') == {'value': 4}
+
+
+if __name__ == "__main__":
+    if pytest.main([__file__, '-q']) == 0:
+        print("All result cache tests passed! ✓")
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routes import upload
+from app.utils import upload_index
+
+JPEG_HEADER = b"\xff\xd8\xff\xe0" + b"\x00" * 12
+
+
+@pytest.fixture(scope='module', autouse=True)
+def upload_dir(tmp_path_factory):
+    # Keep test files and index rows out of the real uploads folder
+    data_dir = tmp_path_factory.mktemp("uploads")
+    upload.UPLOAD_DIR = str(data_dir)
+    upload_index.INDEX_DB = str(data_dir / "index.db")
+    upload_index._db_ready = False  # Table is created on first use
+    return data_dir
+
+
+client = TestClient(app)
+
+
+def jpeg(fill, size):
+    return JPEG_HEADER + fill * (size - len(JPEG_HEADER))
+
+
+def post_batch(files, **params):
+    return client.post("/api/upload/batch", params=params, files=[("files", file) for file in files])
+
+
+def test_same_name_files_get_their_own_paths(upload_dir):
+    a = jpeg(b"A", 4 * 1024 * 1024)
+    b = jpeg(b"B", 4 * 1024 * 1024)
+
+    response = post_batch([("photo.jpg", a, "image/jpeg"), ("photo.jpg", b, "image/jpeg")])
+    results = response.json()["results"]
+
+    assert response.status_code == 200
+    assert all(result["success"] for result in results)
+
+    names = [result["saved_filename"] for result in results]
+    assert len(set(names)) == 2
+    assert all(name.endswith("_photo.jpg") for name in names)
+
+    for result, data in zip(results, (a, b)):
+        with open(os.path.join(upload_dir, result["saved_filename"]), "rb") as f:
+            on_disk = f.read()
+        assert on_disk == data
+        assert result["sha256"] == hashlib.sha256(data).hexdigest()
+        assert upload_index.get_file(result["saved_filename"])["sha256"] == result["sha256"]
+
+
+def test_results_keep_upload_order():
+    files = [
+        (f"file_{i}.jpg", jpeg(b"x", (8 - i) * 256 * 1024), "image/jpeg")  # Biggest first, so later files finish first
+        for i in range(6)
+    ]
+    files.insert(3, ("notes.txt", b"hello", "text/plain"))
+
+    body = post_batch(files).json()
+
+    assert [result["original_filename"] for result in body["results"]] == [name for name, _, _ in files]
+    assert [result["success"] for result in body["results"]] == [True] * 3 + [False] + [True] * 3
+    assert body["summary"] == {"total": 7, "successful": 6, "failed": 1}
+
+
+def test_stream_mode_sends_ndjson():
+    files = [("one.jpg", jpeg(b"1", 1024), "image/jpeg"), ("bad.txt", b"nope", "text/plain"), ("two.png", jpeg(b"2", 1024), "image/png")]
+
+    response = post_batch(files, stream="true")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    *results, summary = lines
+
+    assert sorted(result["index"] for result in results) == [0, 1, 2]
+    for result in results:
+        assert result["original_filename"] == files[result["index"]][0]
+        assert result["success"] == (result["index"] != 1)
+    assert summary == {"summary": {"total": 3, "successful": 2, "failed": 1}}
+
+
+if __name__ == "__main__":
+    if pytest.main([__file__, '-q']) == 0:
+        print("\n✅ All batch upload tests passed!")
@@ -0,0 +1,63 @@
+import os
+import pytest
+from app.utils import upload_index
+
+
+@pytest.fixture(scope='module', autouse=True)
+def index_db(tmp_path_factory):
+    # Keep test entries out of the real index
+    upload_index.INDEX_DB = str(tmp_path_factory.mktemp("index") / "index.db")
+    upload_index.init_index()
+
+    for i in range(25):
+        upload_index.add_file(f"file_{i:02d}.{'jpg' if i % 2 else 'mp4'}", size_bytes=i * 1000, created_at=1000 + i)
+
+
+def collect_pages(**filters):
+    """Follow next_cursor until the last page"""
+    names, cursor = [], None
+    while True:
+        files, cursor = upload_index.list_files(cursor=cursor, limit=7, **filters)
+        names.extend(f["filename"] for f in files)
+        if cursor is None:
+            return names
+
+
+def test_cursor_pages_cover_everything_once():
+    names = collect_pages(sort_by="created_at", order="desc")
+
+    assert len(names) == 25
+    assert names[0] == "file_24.mp4"
+    assert names[-1] == "file_00.mp4"
+
+
+def test_filter_and_sort_by_size():
+    names = collect_pages(file_type="image", min_size=5000, sort_by="size", order="asc")
+
+    assert names == [f"file_{i:02d}.jpg" for i in range(5, 25, 2)]
+
+
+def test_reconcile_matches_directory(tmp_path):
+    folder = str(tmp_path)
+    for name in ("a.jpg", "b.mp4"):
+        with open(os.path.join(folder, name), "wb") as f:
+            f.write(b"x" * 10)
+
+    changes = upload_index.reconcile(folder)
+
+    assert changes == {"added": 2, "removed": 25}
+    assert upload_index.get_file("a.jpg")["size_bytes"] == 10
+    assert upload_index.get_file("file_00.mp4") is None
+
+
+def test_table_is_created_on_first_use(tmp_path):
+    original = upload_index.INDEX_DB
+    upload_index.INDEX_DB = str(tmp_path / "fresh.db")
+    upload_index._db_ready = False  # e.g. used outside the FastAPI app, without its startup hook
+
+    try:
+        assert upload_index.get_file("a.jpg") is None
+        upload_index.add_file("a.jpg", size_bytes=5)
+        assert upload_index.list_files()[0][0]["filename"] == "a.jpg"
+    finally:
+        upload_index.INDEX_DB = original
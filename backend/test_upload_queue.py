@@ -0,0 +1,138 @@
+import json
+import os
+import time
+from http.server import BaseHTTPRequestHandler
+
+import cloudinary
+import pytest
+
+import upload_queue
+
+
+class StubCloudinary(BaseHTTPRequestHandler):
+    """Local stand-in for the Cloudinary upload API; fails the first `failures` calls"""
+
+    failures = 0
+    calls = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        StubCloudinary.calls += 1
+
+        if StubCloudinary.calls <= StubCloudinary.failures:
+            status, body = 500, {'error': {'message': 'stub failure'}}
+        else:
+            status, body = 200, {'secure_url': f"https://stub.local/{StubCloudinary.calls}.jpg"}
+
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module', autouse=True)
+def queue_files(tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp('uploads')
+    upload_queue.UPLOAD_DB = str(data_dir / 'uploads.db')
+    upload_queue.UPLOAD_SPOOL_DIR = str(data_dir / 'spool')
+    upload_queue._db_ready = False
+    upload_queue.init_db()  # The workers may already be running, they only create it on start
+
+
+@pytest.fixture(scope='module')
+def stub_url(serve):
+    return serve(StubCloudinary)
+
+
+@pytest.fixture(autouse=True)
+def stub(stub_url):
+    upload_queue.UPLOAD_RETRY_BASE_SECONDS = 0.05
+    upload_queue.UPLOAD_MAX_ATTEMPTS = 3
+    upload_queue.set_uploader(None)
+    StubCloudinary.failures = 0
+    StubCloudinary.calls = 0
+
+    # configure_cloudinary() only sets the credentials, so this sticks
+    cloudinary.config(upload_prefix=stub_url)
+
+
+def make_file(folder, content=b'image bytes'):
+    path = str(folder / 'photo.jpg')
+    with open(path, 'wb') as f:
+        f.write(content)
+    return path
+
+
+def wait_for(upload_id, timeout=10):
+    """Poll until the upload finishes"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        upload = upload_queue.get_upload(upload_id)
+        if upload['status'] in (upload_queue.STATUS_DONE, upload_queue.STATUS_FAILED):
+            return upload
+        time.sleep(0.05)
+    raise TimeoutError(upload_id)
+
+
+def test_upload_completes_in_background(tmp_path):
+    path = make_file(tmp_path)
+    upload_id = upload_queue.enqueue_upload(path, folder='test')
+
+    # The caller's file is handed over straight away
+    assert not os.path.exists(path)
+
+    upload = wait_for(upload_id)
+    assert upload['status'] == upload_queue.STATUS_DONE
+    assert upload['url'].startswith('https://stub.local/')
+    assert upload_queue.get_upload_url(upload_id) == upload['url']
+
+
+def test_retries_with_backoff_until_success(tmp_path):
+    StubCloudinary.failures = 2
+
+    upload = wait_for(upload_queue.enqueue_upload(make_file(tmp_path), folder='test'))
+
+    assert upload['status'] == upload_queue.STATUS_DONE
+    assert upload['attempts'] == 3
+    assert StubCloudinary.calls == 3
+
+
+def test_gives_up_after_max_attempts(tmp_path):
+    StubCloudinary.failures = 100
+
+    upload = wait_for(upload_queue.enqueue_upload(make_file(tmp_path), folder='test'))
+
+    assert upload['status'] == upload_queue.STATUS_FAILED
+    assert upload['attempts'] == upload_queue.UPLOAD_MAX_ATTEMPTS
+    assert upload['error']
+    assert upload_queue.get_upload_url(upload['upload_id']) is None
+
+
+def test_interrupted_upload_is_reclaimed(tmp_path):
+    # Simulate a worker that died mid-upload: claimed long ago, never finished
+    upload_queue.set_uploader(lambda path, folder: 'https://stub.local/reclaimed.jpg')
+    upload_id = upload_queue.enqueue_upload(make_file(tmp_path), folder='test')
+    wait_for(upload_id)
+
+    upload_queue._update(
+        upload_id,
+        status=upload_queue.STATUS_UPLOADING,
+        claimed_at=time.time() - upload_queue.UPLOAD_LEASE_SECONDS - 1,
+        url=None
+    )
+
+    assert wait_for(upload_id)['url'] == 'https://stub.local/reclaimed.jpg'
+
+
+def test_unknown_upload():
+    assert upload_queue.get_upload('missing') is None
+
+
+if __name__ == "__main__":
+    if pytest.main([__file__, '-q']) == 0:
+        print("✅ Upload queue tests passed")
@@ -0,0 +1,52 @@
+import io
+import os
+import pytest
+from fastapi import HTTPException, UploadFile
+from app.utils.file_handler import save_upload_stream, sniff_file_type
+
+JPEG_HEADER = b"\xff\xd8\xff\xe0" + b"\x00" * 12
+
+
+def make_upload(filename, data):
+    return UploadFile(file=io.BytesIO(data), filename=filename)
+
+
+def test_sniff_file_type():
+    assert sniff_file_type(JPEG_HEADER) == "image"
+    assert sniff_file_type(b"\x89PNG\r\n\x1a\n" + b"\x00" * 8) == "image"
+    assert sniff_file_type(b"\x00\x00\x00\x18ftypmp42") == "video"
+    assert sniff_file_type(b"just some text..") is None
+
+
+def test_saves_and_hashes(tmp_path):
+    data = JPEG_HEADER + os.urandom(3 * 1024 * 1024)
+    path = str(tmp_path / "photo.jpg")
+
+    saved = save_upload_stream(make_upload("photo.jpg", data), path)
+
+    import hashlib
+    assert saved["size"] == len(data)
+    assert saved["sha256"] == hashlib.sha256(data).hexdigest()
+    assert open(path, "rb").read() == data
+
+
+def test_stops_at_size_limit(tmp_path):
+    path = str(tmp_path / "big.jpg")
+    upload = make_upload("big.jpg", JPEG_HEADER + b"\x00" * (5 * 1024 * 1024))
+
+    with pytest.raises(HTTPException) as error:
+        save_upload_stream(upload, path, max_size=2 * 1024 * 1024)
+
+    assert error.value.status_code == 413
+    assert not os.path.exists(path)
+    assert upload.file.tell() < 5 * 1024 * 1024  # Didn't read the whole body
+
+
+def test_rejects_wrong_content(tmp_path):
+    path = str(tmp_path / "fake.mp4")
+
+    with pytest.raises(HTTPException) as error:
+        save_upload_stream(make_upload("fake.mp4", JPEG_HEADER * 10), path)
+
+    assert error.value.status_code == 400
+    assert not os.path.exists(path)
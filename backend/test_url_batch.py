@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+import requests
+
+import url_batch
+from url_batch import run_url_batch
+
+
+class SlowHost(BaseHTTPRequestHandler):
+    """Local stand-in for remote hosts: /sleep/<seconds>, tracking concurrency per Host header"""
+
+    lock = threading.Lock()
+    active = defaultdict(int)
+    peak = defaultdict(int)
+    peak_total = 0
+
+    def do_GET(self):
+        host = self.headers['Host'].split(':')[0]
+
+        with SlowHost.lock:
+            SlowHost.active[host] += 1
+            SlowHost.peak[host] = max(SlowHost.peak[host], SlowHost.active[host])
+            SlowHost.peak_total = max(SlowHost.peak_total, sum(SlowHost.active.values()))
+
+        time.sleep(float(self.path.rsplit('/', 1)[1]))
+
+        with SlowHost.lock:
+            SlowHost.active[host] -= 1
+
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def port(serve):
+    return int(serve(SlowHost).rsplit(':', 1)[1])
+
+
+def setup_function():
+    SlowHost.active.clear()
+    SlowHost.peak.clear()
+    SlowHost.peak_total = 0
+
+
+def fetch(url):
+    return requests.get(url, timeout=5).text
+
+
+def test_limits_per_host_and_overall(port):
+    urls = [f"http://{host}:{port}/sleep/0.1" for host in ('127.0.0.1', 'localhost') for _ in range(6)]
+
+    results = list(run_url_batch(urls, fetch, concurrency=5, per_host=2))
+
+    assert sorted(index for index, _, _, _ in results) == list(range(12))
+    assert all(result == 'ok' and error is None for _, _, result, error in results)
+    assert SlowHost.peak['127.0.0.1'] <= 2
+    assert SlowHost.peak['localhost'] <= 2
+    assert SlowHost.peak_total <= 4
+
+
+def test_busy_host_does_not_block_others(port):
+    # Three slow URLs on one host (limit 1) listed before a fast one elsewhere
+    urls = [f"http://127.0.0.1:{port}/sleep/0.3"] * 3 + [f"http://localhost:{port}/sleep/0"]
+
+    start = time.monotonic()
+    first_index, _, _, _ = next(run_url_batch(urls, fetch, concurrency=4, per_host=1))
+
+    assert first_index == 3
+    assert time.monotonic() - start < 0.25
+
+
+def test_results_stream_in_completion_order_and_time_out(port):
+    urls = [f"http://127.0.0.1:{port}/sleep/{seconds}" for seconds in (0.5, 0.05, 3)]
+
+    results = list(run_url_batch(urls, fetch, concurrency=3, per_host=3, timeout=1))
+
+    assert [index for index, _, _, _ in results] == [1, 0, 2]
+    assert isinstance(results[2][3], TimeoutError)
+
+
+def test_errors_are_reported_per_url():
+    def fail_on_odd(url):
+        if url.endswith('1'):
+            raise ValueError('bad url')
+        return url
+
+    results = {index: (result, error) for index, _, result, error in run_url_batch(['u0', 'u1'], fail_on_odd)}
+
+    assert results[0] == ('u0', None)
+    assert isinstance(results[1][1], ValueError)
+
+
+def test_concurrent_batches_share_the_limit(port):
+    original = url_batch._slots
+    url_batch._slots = threading.BoundedSemaphore(3)
+
+    def run_batch(host, results):
+        urls = [f"http://{host}:{port}/sleep/0.1"] * 6
+        results.extend(run_url_batch(urls, fetch, concurrency=5, per_host=5))
+
+    try:
+        results = ([], [])
+        threads = [
+            threading.Thread(target=run_batch, args=(host, out))
+            for host, out in zip(('127.0.0.1', 'localhost'), results)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        url_batch._slots = original
+
+    assert all(len(out) == 6 and all(error is None for _, _, _, error in out) for out in results)
+    assert SlowHost.peak_total <= 3
+
+
+if __name__ == "__main__":
+    if pytest.main([__file__, '-q']) == 0:
+        print("✅ URL batch tests passed")
@@ -0,0 +1,141 @@
+import io
+import os
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+from PIL import Image
+
+import url_cache
+import url_handler
+
+
+def encode(color):
+    buffer = io.BytesIO()
+    Image.new('RGB', (32, 32), color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class ImageHost(BaseHTTPRequestHandler):
+    """Local stand-in for an image host that supports conditional requests"""
+
+    images = {}  # path -> (body, etag)
+    full_responses = 0
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        body, etag = ImageHost.images[path]
+
+        if etag and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        ImageHost.full_responses += 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def base(serve):
+    return serve(ImageHost)
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(tmp_path):
+    url_cache.URL_CACHE_DB = str(tmp_path / 'url_cache.db')
+    url_cache.URL_CACHE_DIR = str(tmp_path / 'bodies')
+    url_cache._db_ready = False
+    url_cache._counters.update({name: 0 for name in url_cache._counters})
+    url_handler.DOWNLOAD_DIR = str(tmp_path / 'downloads')
+    ImageHost.images = {'/red.png': (encode((255, 0, 0)), '"red-1"'), '/plain.png': (encode((0, 0, 255)), None)}
+    ImageHost.full_responses = 0
+
+
+def test_normalize_url():
+    assert url_cache.normalize_url('HTTP://Example.COM:80/a.png?b=2&a=1#top') == 'http://example.com/a.png?a=1&b=2'
+    assert url_cache.normalize_url('https://example.com') == 'https://example.com/'
+    assert url_cache.normalize_url('https://example.com:8443/x') == 'https://example.com:8443/x'
+
+
+def test_revalidation_skips_download(base):
+    first_path, first_hash = url_cache.download_cached(f"{base}/red.png")
+    second_path, second_hash = url_cache.download_cached(f"{base}/red.png?")
+
+    assert ImageHost.full_responses == 1
+    assert second_hash == first_hash
+    assert second_path != first_path
+
+    # Callers own their copies; removing one leaves the cache intact
+    os.remove(first_path)
+    with open(second_path, 'rb') as f:
+        assert f.read() == ImageHost.images['/red.png'][0]
+    assert url_cache.get_url_cache_stats()['revalidated'] == 1
+    assert os.path.dirname(second_path) == url_handler.DOWNLOAD_DIR
+
+
+def test_body_evicted_during_revalidation_is_refetched(base):
+    url_cache.download_cached(f"{base}/red.png")
+    real_fetch = url_cache.fetch_image
+
+    def evict_then_fetch(url, **options):
+        if options.get('headers'):
+            url_cache.evict(now=10 ** 10)  # Another worker evicts while the 304 is on its way
+        return real_fetch(url, **options)
+
+    url_cache.fetch_image = evict_then_fetch
+    try:
+        path, content_hash = url_cache.download_cached(f"{base}/red.png")
+    finally:
+        url_cache.fetch_image = real_fetch
+
+    with open(path, 'rb') as f:
+        assert f.read() == ImageHost.images['/red.png'][0]
+    assert ImageHost.full_responses == 2
+    assert url_cache.get_url_cache_stats()['revalidated'] == 0
+    assert url_cache.get_url_cache_stats()['entries'] == 1  # Cached again
+
+
+def test_changed_body_is_downloaded_again(base):
+    _, old_hash = url_cache.download_cached(f"{base}/red.png")
+    ImageHost.images['/red.png'] = (encode((0, 255, 0)), '"red-2"')
+
+    _, new_hash = url_cache.download_cached(f"{base}/red.png")
+
+    assert new_hash != old_hash
+    assert ImageHost.full_responses == 2
+    assert url_cache.get_url_cache_stats()['bodies'] == 1  # Old body dropped
+
+
+def test_urls_without_validators_are_not_cached(base):
+    url_cache.download_cached(f"{base}/plain.png")
+    url_cache.download_cached(f"{base}/plain.png")
+
+    assert ImageHost.full_responses == 2
+    assert url_cache.get_url_cache_stats()['entries'] == 0
+
+
+def test_eviction_by_ttl_and_disk_budget(base):
+    ImageHost.images['/green.png'] = (encode((0, 255, 0)), '"green"')
+    url_cache.download_cached(f"{base}/red.png")
+    url_cache.download_cached(f"{base}/green.png")
+
+    size = url_cache.get_url_cache_stats()['disk_bytes']
+    assert url_cache.evict(max_bytes=size - 1) == 1  # Least recently used goes first
+    assert url_cache.get_url_cache_stats()['entries'] == 1
+    assert len(os.listdir(url_cache.URL_CACHE_DIR)) == 1
+
+    assert url_cache.evict(now=10 ** 10) == 1
+    assert os.listdir(url_cache.URL_CACHE_DIR) == []
+
+
+if __name__ == "__main__":
+    if pytest.main([__file__, '-q']) == 0:
+        print("✅ URL cache tests passed")
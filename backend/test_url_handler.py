@@ -0,0 +1,142 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+from PIL import Image
+
+import url_handler
+
+
+def encode(format_name):
+    buffer = io.BytesIO()
+    Image.new('RGB', (32, 32), (200, 30, 30)).save(buffer, format_name)
+    return buffer.getvalue()
+
+
+PNG = encode('PNG')
+GIF = encode('GIF')
+
+
+class RemoteHost(BaseHTTPRequestHandler):
+    """Local stand-in for remote image hosts"""
+
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+    bytes_sent = 0
+
+    def setup(self):
+        super().setup()
+        RemoteHost.connections += 1
+
+    def do_GET(self):
+        if self.path == '/photo.png':
+            self.reply(PNG, 'image/png')
+        elif self.path == '/animation.gif':
+            self.reply(GIF, 'image/gif')
+        elif self.path == '/page.html':
+            self.reply(b'<html></html>', 'text/html')
+        elif self.path == '/lying.jpg':
+            self.reply(b'<html>not really an image</html>', 'image/jpeg')
+        elif self.path == '/huge-declared.png':
+            self.reply(PNG, 'image/png', content_length=100 * 1024 * 1024)
+        elif self.path == '/huge-chunked.png':
+            self.send_chunked(PNG + b'\0' * (50 * 1024 * 1024))
+        else:
+            self.reply(b'', 'text/plain', status=404)
+
+    def reply(self, body, content_type, status=200, content_length=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(content_length or len(body)))
+        self.end_headers()
+        if content_length is None:
+            self.wfile.write(body)
+            RemoteHost.bytes_sent += len(body)
+        else:
+            self.close_connection = True
+
+    def send_chunked(self, body):
+        """No Content-Length, so only the streaming cap can stop it"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for start in range(0, len(body), 64 * 1024):
+                chunk = body[start:start + 64 * 1024]
+                self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                RemoteHost.bytes_sent += len(chunk)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def base(serve):
+    return serve(RemoteHost)
+
+
+@pytest.fixture(autouse=True)
+def fresh_downloads(tmp_path):
+    url_handler.DOWNLOAD_DIR = str(tmp_path)
+    url_handler._session = None
+    RemoteHost.connections = 0
+    RemoteHost.bytes_sent = 0
+
+
+def test_supported_format_saved_as_is(base):
+    path, error = url_handler.download_image_from_url(f"{base}/photo.png")
+
+    assert error is None
+    assert path.endswith('.png')
+    with open(path, 'rb') as f:
+        assert f.read() == PNG
+
+
+def test_other_formats_converted_to_jpeg(base):
+    path, error = url_handler.download_image_from_url(f"{base}/animation.gif")
+
+    assert error is None
+    assert path.endswith('.jpg')
+    with Image.open(path) as image:
+        assert image.format == 'JPEG'
+
+
+def test_rejects_non_images(base):
+    assert url_handler.download_image_from_url(f"{base}/page.html") == (None, "URL does not point to an image")
+    assert url_handler.download_image_from_url(f"{base}/lying.jpg") == (None, "URL does not point to a supported image")
+    assert url_handler.download_image_from_url(f"{base}/missing.png")[1] == "Failed to download: Status 404"
+    assert os.listdir(url_handler.DOWNLOAD_DIR) == []
+
+
+def test_size_limit_enforced(base):
+    path, error = url_handler.download_image_from_url(f"{base}/huge-declared.png", max_bytes=1024 * 1024)
+    assert path is None and 'too large' in error
+
+    path, error = url_handler.download_image_from_url(f"{base}/huge-chunked.png", max_bytes=1024 * 1024)
+    assert path is None and 'too large' in error
+
+    # Stopped early rather than reading the whole body, and nothing left behind
+    assert RemoteHost.bytes_sent < 20 * 1024 * 1024
+    assert os.listdir(url_handler.DOWNLOAD_DIR) == []
+
+
+def test_concurrent_downloads_get_unique_paths_and_reuse_connections(base):
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(url_handler.download_image_from_url, [f"{base}/photo.png"] * 8))
+
+    paths = [path for path, _ in results]
+    assert len(set(paths)) == 8
+    assert all(os.path.exists(path) for path in paths)
+    assert RemoteHost.connections <= 4
+
+
+if __name__ == "__main__":
+    if pytest.main([__file__, '-q']) == 0:
+        print("✅ URL handler tests passed")
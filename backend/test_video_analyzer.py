@@ -0,0 +1,242 @@
+import itertools
+import time
+import uuid
+
+import cv2
+import numpy as np
+import pytest
+
+import phash_index
+import result_cache
+from app.models.inference import set_backend, DummyModel
+import video_analyzer
+import video_processor
+from video_analyzer import analyze_video_file, iter_video_analysis, confidence_bounds, verdict_settled
+from video_processor import coarse_to_fine, iter_video_frames
+
+
+class ScriptedModel:
+    """Test backend that hands out confidences from a repeating script"""
+
+    def __init__(self, *confidences):
+        self.version = f"scripted-{uuid.uuid4().hex}"  # Fresh version, so nothing is reused from the caches
+        self.script = itertools.cycle(confidences)
+        self.images = 0
+
+    def predict_batch(self, images):
+        self.images += len(images)
+        return [{'prediction': 'Real', 'confidence': next(self.script)} for _ in images]
+
+
+@pytest.fixture(scope='module', autouse=True)
+def isolated_caches(tmp_path_factory):
+    # Keep test entries out of the real caches
+    folder = tmp_path_factory.mktemp('caches')
+    result_cache.CACHE_DB = str(folder / 'cache.db')
+    result_cache._db_ready = False
+    phash_index.PHASH_DB = str(folder / 'phash.db')
+    phash_index._db_ready = False
+
+    yield
+
+    set_backend(DummyModel())
+
+
+@pytest.fixture(scope='module')
+def clip(make_clip):
+    """Random blocks, so no two sampled frames look alike"""
+    return make_clip(100, pattern='blocks', seed=1)
+
+
+def test_confidence_bounds():
+    low, high = confidence_bounds([80, 82, 84], z=2, min_std=0)
+    assert low < 82 < high
+    assert abs((high - 82) - 2 * 2 / np.sqrt(3)) < 1e-9
+
+    # Identical scores still get the minimum spread
+    low, high = confidence_bounds([90] * 4, z=3, min_std=5)
+    assert (low, high) == (82.5, 97.5)
+
+
+def test_verdict_settled():
+    assert verdict_settled([90] * 6, min_frames=6)
+    assert verdict_settled([10] * 6, min_frames=6)
+    assert not verdict_settled([90] * 5, min_frames=6)  # Below the floor
+    assert not verdict_settled([30, 70] * 10, min_frames=6)
+    assert not verdict_settled([55] * 6, min_frames=6)  # Too close to the threshold for 6 frames
+    assert verdict_settled([55] * 20, min_frames=6)
+
+
+def test_clear_verdict_stops_early(clip):
+    model = ScriptedModel(90)
+    set_backend(model)
+    decoded = []
+
+    def counted(*args, **kwargs):
+        for frame_index, frame in original(*args, **kwargs):
+            decoded.append(frame_index)
+            yield frame_index, frame
+
+    original, workers = video_processor.read_sampled_frames, video_processor.VIDEO_WORKERS
+    video_processor.read_sampled_frames = counted
+    video_processor.VIDEO_WORKERS = 1  # Keep decoding in this process, where it's counted
+
+    try:
+        result = analyze_video_file(clip, max_frames=20)  # Default settings
+    finally:
+        video_processor.read_sampled_frames, video_processor.VIDEO_WORKERS = original, workers
+
+    # Settled on the first round, before any probe was decoded
+    assert decoded == [0, 20, 40, 60, 80]
+    assert result['stopped_early']
+    assert result['frames_sampled'] == 20
+    assert result['frames_analyzed'] == 5
+    assert model.images == result['frames_analyzed']
+    assert result['overall_prediction'] == 'Real'
+    assert result['confidence_interval'][0] > 50
+
+    # Reported in video order, spread over the whole clip
+    indices = [frame['frame_index'] for frame in result['frame_results']]
+    assert indices == sorted(indices)
+    assert indices[0] == 0 and indices[-1] >= 75
+    assert [frame['frame_number'] for frame in result['frame_results']] == list(range(1, len(indices) + 1))
+
+
+def test_ambiguous_verdict_uses_every_frame(clip):
+    set_backend(ScriptedModel(30, 70))
+
+    result = analyze_video_file(clip, max_frames=20)
+
+    assert not result['stopped_early']
+    assert result['frames_analyzed'] == 20
+
+
+def test_early_stop_can_be_turned_off(clip):
+    set_backend(ScriptedModel(90))
+
+    progress = []
+    result = analyze_video_file(clip, max_frames=20, early_stop=False, progress=lambda done, total: progress.append((done, total)))
+
+    assert not result['stopped_early']
+    assert result['frames_analyzed'] == 20
+    assert progress[-1] == (20, 20)
+
+
+def test_frame_results_stream_while_decoding(clip):
+    set_backend(ScriptedModel(90), max_wait_ms=0)
+    decoded = []
+
+    def slow_frames(*args, **kwargs):
+        for frame in iter_video_frames(*args, **kwargs):
+            decoded.append(frame.index)
+            time.sleep(0.05)
+            yield frame
+
+    original = video_analyzer.iter_video_frames
+    video_analyzer.iter_video_frames = slow_frames
+
+    try:
+        events = iter_video_analysis(clip, max_frames=20, early_stop=False)
+
+        kind, first = next(events)
+        assert kind == 'frame'
+        assert first['frames_done'] == 1
+        assert first['frames_total'] == 20  # Planned, not just what's been decoded
+        assert len(decoded) < 20  # Didn't wait for the whole video
+        assert first['aggregate']['prediction'] == 'Real'
+
+        rest = list(events)
+    finally:
+        video_analyzer.iter_video_frames = original
+
+    assert [kind for kind, _ in rest] == ['frame'] * 19 + ['result']
+    assert rest[-2][1]['frames_done'] == rest[-2][1]['frames_total'] == 20
+    assert rest[-1][1]['frames_analyzed'] == 20
+
+
+def test_first_round_arrives_before_the_probe_pass(clip):
+    set_backend(ScriptedModel(30, 70), max_wait_ms=0)  # Never settles, so every round runs
+    decoded = []
+
+    def counted(*args, **kwargs):
+        for frame_index, frame in original(*args, **kwargs):
+            decoded.append(frame_index)
+            yield frame_index, frame
+
+    original, workers = video_processor.read_sampled_frames, video_processor.VIDEO_WORKERS
+    video_processor.read_sampled_frames = counted
+    video_processor.VIDEO_WORKERS = 1  # Keep decoding in this process, where it's counted
+    video_processor.VIDEO_SAMPLING = 'adaptive'
+
+    try:
+        events = iter_video_analysis(clip, max_frames=20, early_stop=True)
+
+        kind, first = next(events)
+        assert kind == 'frame'
+        assert decoded == [0, 20, 40, 60, 80]  # Only the first round so far
+        assert first['frames_total'] == 20
+
+        rest = list(events)
+    finally:
+        video_processor.read_sampled_frames, video_processor.VIDEO_WORKERS = original, workers
+        video_processor.VIDEO_SAMPLING = 'uniform'
+
+    result = rest[-1][1]
+    assert result['frames_analyzed'] == 20
+    assert not result['stopped_early']
+
+    # First-round frames are kept, and get their scene once it's known
+    indices = [frame['frame_index'] for frame in result['frame_results']]
+    assert set(indices) >= {0, 20, 40, 60, 80}
+    assert all(frame['scene'] is not None for frame in result['frame_results'])
+
+
+def edited_copy(path, edited, size=6):
+    """Same clip with a small patch of every frame changed, like a local face edit"""
+
+    video = cv2.VideoCapture(path)
+    writer = cv2.VideoWriter(edited, cv2.VideoWriter_fourcc(*'MJPG'), 25, (96, 64))
+    while True:
+        ok, frame = video.read()
+        if not ok:
+            break
+        frame[24:24 + size, 40:40 + size] = 255 - frame[24:24 + size, 40:40 + size]
+        writer.write(frame)
+    writer.release()
+    video.release()
+    return edited
+
+
+def test_frames_are_only_reused_within_one_upload(clip, tmp_path):
+    model = ScriptedModel(90)
+    set_backend(model)
+    edited = edited_copy(clip, str(tmp_path / 'edited.avi'))
+
+    hashes = lambda path: [phash_index.phash(frame.image) for frame in iter_video_frames(path, max_frames=20)]
+    assert all(phash_index.hamming(a, b) <= phash_index.MAX_DISTANCE for a, b in zip(hashes(clip), hashes(edited)))
+
+    original = analyze_video_file(clip, max_frames=20, early_stop=False, content_hash='original')
+    assert original['frames_reused'] == 0
+    assert model.images == 20
+
+    # Close enough to match, but a different upload: every frame goes to the model
+    copy = analyze_video_file(edited, max_frames=20, early_stop=False, content_hash='edited')
+    assert copy['frames_reused'] == 0
+    assert model.images == 40
+
+    again = analyze_video_file(clip, max_frames=20, early_stop=False, content_hash='original')
+    assert again['frames_reused'] == 20
+    assert model.images == 40
+
+
+def test_coarse_to_fine_rounds():
+    rounds = coarse_to_fine(range(20), first_round=4)
+
+    assert rounds[0] == [0, 4, 8, 12, 16]
+    assert sorted(itertools.chain(*rounds)) == list(range(20))
+    assert coarse_to_fine([], first_round=4) == []
+
+
+if __name__ == '__main__':
+    if pytest.main([__file__, '-q']) == 0:
+        print("\n✅ All video analyzer tests passed!")
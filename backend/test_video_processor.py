@@ -0,0 +1,124 @@
+import cv2
+import numpy as np
+import pytest
+
+import video_processor
+from app.models.preprocess import BufferPool
+from video_processor import get_sample_indices, read_sampled_frames, iter_video_frames, shutdown_pools
+
+
+@pytest.fixture(scope='module')
+def clip(make_clip):
+    """MJPG clip whose frames can be told apart by their pixel values"""
+    return make_clip(240)
+
+
+def read(clip, indices, mode):
+    video = cv2.VideoCapture(clip)
+    try:
+        return list(read_sampled_frames(video, indices, mode=mode))
+    finally:
+        video.release()
+
+
+def test_sample_indices():
+    assert get_sample_indices(240, 20) == list(range(0, 240, 12))
+    assert get_sample_indices(5, 20) == [0, 1, 2, 3, 4]
+    assert get_sample_indices(0, 20) == []
+    assert get_sample_indices(240, 0) == []
+
+
+def test_every_mode_matches_sequential_decode(clip):
+    for indices in (get_sample_indices(240, 20), get_sample_indices(240, 4), [3, 4, 5, 200]):
+        expected = read(clip, indices, 'sequential')
+        assert [index for index, _ in expected] == indices
+
+        for mode in ('seek', 'grab', 'auto'):
+            frames = read(clip, indices, mode)
+
+            assert [index for index, _ in frames] == indices, mode
+            assert all(np.array_equal(a, b) for (_, a), (_, b) in zip(expected, frames)), mode
+
+
+class LoosePositionCapture:
+    """
+    Capture that accepts any seek but always lands on the keyframe before
+    it (every 10th frame), like containers without accurate seeking.
+    Until the next read it reports the position it was asked for.
+    """
+
+    def __init__(self, video):
+        self.video = video
+        self.seeks = 0
+        self.requested = None
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            self.seeks += 1
+            self.requested = value
+            value = value // 10 * 10
+        return self.video.set(prop, value)
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_POS_FRAMES and self.requested is not None:
+            return self.requested
+        return self.video.get(prop)
+
+    def read(self, *args):
+        self.requested = None
+        return self.video.read(*args)
+
+    def __getattr__(self, name):
+        return getattr(self.video, name)
+
+
+def test_inaccurate_seek_falls_back_to_sequential(clip):
+    indices = [0, 60, 125, 190]
+    expected = read(clip, indices, 'sequential')
+
+    video = LoosePositionCapture(cv2.VideoCapture(clip))
+    frames = list(read_sampled_frames(video, indices, mode='seek'))
+    video.release()
+
+    # 60 lands fine, 125 doesn't; the rest are decoded from the start
+    assert video.seeks == 4
+    assert [index for index, _ in frames] == indices
+    assert all(np.array_equal(a, b) for (_, a), (_, b) in zip(expected, frames))
+
+
+def decode(clip, max_frames, workers, pool=None):
+    return list(iter_video_frames(clip, max_frames=max_frames, workers=workers, segment_seconds=2, sampling='uniform', pool=pool))
+
+
+def test_parallel_decode_matches_serial(clip):
+    shutdown_pools()
+
+    serial = decode(clip, 60, workers=1)
+    parallel = decode(clip, 60, workers=2)
+
+    assert video_processor._pools  # 5 segments of 12 frames went to the workers
+    assert [frame.index for frame in parallel] == [frame.index for frame in serial] == get_sample_indices(240, 60)
+    assert [frame.timestamp for frame in parallel] == [frame.timestamp for frame in serial]
+    assert all(np.array_equal(a.image, b.image) for a, b in zip(serial, parallel))
+
+    # Worker frames land in pooled buffers like locally decoded ones
+    pool = BufferPool()
+    pooled = decode(clip, 60, workers=2, pool=pool)
+    assert pool.stats()['allocated'] == 60
+    assert all(np.array_equal(a.image, b.image) for a, b in zip(serial, pooled))
+
+    shutdown_pools()
+
+
+def test_sparse_samples_stay_in_process(clip):
+    shutdown_pools()
+
+    frames = decode(clip, 10, workers=2)  # 2 frames per segment
+
+    assert len(frames) == 10
+    assert not video_processor._pools
+
+
+if __name__ == '__main__':
+    if pytest.main([__file__, '-q']) == 0:
+        print("\n✅ All video processor tests passed!")
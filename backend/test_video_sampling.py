@@ -0,0 +1,110 @@
+import cv2
+import numpy as np
+import pytest
+
+import video_processor
+from video_processor import select_distinct_frames, iter_video_frames, frame_signature, adaptive_probe_count
+
+RNG = np.random.default_rng(0)
+
+
+def shot(level, size=(120, 160)):
+    """A static shot: a gradient around one brightness level"""
+
+    ramp = np.linspace(level - 30, level + 30, size[1]).clip(0, 255)
+    return np.repeat(np.tile(ramp, (size[0], 1))[:, :, None], 3, axis=2).astype(np.uint8)
+
+
+def jitter(image):
+    """Same shot with a little sensor noise"""
+
+    noise = RNG.integers(-2, 3, image.shape)
+    return (image.astype(int) + noise).clip(0, 255).astype(np.uint8)
+
+
+def test_static_shots_keep_one_frame_each():
+    levels = [40, 130, 220]
+    frames = [(i, jitter(shot(levels[i // 20]))) for i in range(60)]
+
+    selected = select_distinct_frames(frames, max_frames=20)
+
+    assert [index for index, _, _ in selected] == [0, 20, 40]
+    assert [(scene.number, scene.start, scene.end) for _, _, scene in selected] == [(0, 0, 19), (1, 20, 39), (2, 40, 59)]
+
+
+def test_fast_cuts_spend_budget_on_distinct_scenes():
+    levels = [20, 200] * 15  # 30 alternating two-frame shots
+    frames = [(i, shot(levels[i // 2])) for i in range(60)]
+
+    selected = select_distinct_frames(frames, max_frames=10)
+
+    assert len(selected) == 10
+    assert len({scene.number for _, _, scene in selected}) == 10
+
+
+def test_motion_within_a_scene_is_sampled():
+    frames = []
+    for i in range(40):
+        image = shot(120)
+        cv2.rectangle(image, (i * 3, 40), (i * 3 + 30, 80), (255, 255, 255), -1)
+        frames.append((i, image))
+
+    selected = select_distinct_frames(frames, max_frames=5)
+
+    assert len(selected) == 5
+    assert {scene.number for _, _, scene in selected} == {0}
+    assert selected[0][0] == 0
+
+    # Spread over the motion, not bunched together
+    indices = [index for index, _, _ in selected]
+    assert max(b - a for a, b in zip(indices, indices[1:])) <= 16
+
+
+def test_frame_signature():
+    thumbnail, histogram = frame_signature(shot(128))
+
+    assert thumbnail.shape == (32, 32)
+    assert 0 <= thumbnail.min() <= thumbnail.max() <= 1
+    assert abs(histogram.sum() - 1) < 1e-9
+
+
+def test_adaptive_sends_fewer_frames_for_static_video(tmp_path):
+    path = str(tmp_path / 'shots.avi')
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 25, (160, 120))
+    for level in (40, 130, 220):
+        for _ in range(50):
+            writer.write(jitter(shot(level)))
+    writer.release()
+
+    uniform = list(iter_video_frames(path, max_frames=10, workers=1, sampling='uniform'))
+    adaptive = list(iter_video_frames(path, max_frames=10, workers=1, sampling='adaptive'))
+
+    assert len(uniform) == 10
+    assert all(frame.scene is None for frame in uniform)
+    assert len(adaptive) == 3
+    assert [frame.scene.number for frame in adaptive] == [0, 1, 2]
+
+    # Each pick is the first probe after a cut (probes are 3 frames apart here)
+    for frame, cut in zip(adaptive, (0.0, 2.0, 4.0)):
+        assert cut <= frame.timestamp <= cut + 3 / 25
+
+
+def test_probes_stay_far_enough_apart_to_seek():
+    factor, gap = video_processor.ADAPTIVE_PROBE_FACTOR, video_processor.SEEK_MIN_INTERVAL
+
+    # Long video: the full factor, already far apart
+    assert adaptive_probe_count(20 * factor * gap, 20) == 20 * factor
+
+    # Mid-length: fewer probes, spaced exactly far enough to seek
+    probes = adaptive_probe_count(3600, 20)
+    assert probes == 3600 // gap
+    assert 3600 // probes >= gap
+
+    # Short video or grab mode: the whole video is decoded anyway
+    assert adaptive_probe_count(900, 20) == 20 * factor
+    assert adaptive_probe_count(3600, 20, mode='grab') == 20 * factor
+
+
+if __name__ == '__main__':
+    if pytest.main([__file__, '-q']) == 0:
+        print("\n✅ All video sampling tests passed!")
@@ -0,0 +1,308 @@
+import os
+import random
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+
+from app.utils.metrics import stage
+from cloudinary_config import upload_file_to_cloudinary
+
+# Background Cloudinary uploads
+#
+# Routes hand a file to enqueue_upload() and respond straight away; a few
+# worker threads upload it with exponential-backoff retries. The queue is a
+# SQLite table and the files are moved into a spool folder, so pending
+# uploads survive a restart and any gunicorn worker can pick them up.
+
+UPLOAD_DB = os.getenv('UPLOAD_DB', 'temp/uploads.db')
+UPLOAD_SPOOL_DIR = os.getenv('UPLOAD_SPOOL_DIR', 'temp/upload_spool')
+UPLOAD_WORKERS = int(os.getenv('UPLOAD_WORKERS', 2))
+UPLOAD_MAX_ATTEMPTS = int(os.getenv('UPLOAD_MAX_ATTEMPTS', 6))
+UPLOAD_RETRY_BASE_SECONDS = float(os.getenv('UPLOAD_RETRY_BASE_SECONDS', 2))
+UPLOAD_RETRY_MAX_SECONDS = float(os.getenv('UPLOAD_RETRY_MAX_SECONDS', 300))
+UPLOAD_LEASE_SECONDS = float(os.getenv('UPLOAD_LEASE_SECONDS', 600))  # Reclaim uploads stuck by a crash
+UPLOAD_TTL_SECONDS = int(os.getenv('UPLOAD_TTL_SECONDS', 7 * 24 * 3600))
+UPLOAD_POLL_SECONDS = 1.0
+
+STATUS_PENDING = 'pending'
+STATUS_UPLOADING = 'uploading'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+_uploader = None
+_wakeup = threading.Event()
+_workers = []
+_workers_pid = None
+_lock = threading.Lock()
+_db_ready = False
+
+
+def _default_uploader(file_path, folder):
+    return upload_file_to_cloudinary(file_path, folder=folder, raise_errors=True)
+
+
+def set_uploader(uploader):
+    """
+    Replace the upload function (used by tests)
+
+    uploader(file_path, folder) must return the file's URL or raise
+    """
+
+    global _uploader
+    _uploader = uploader
+
+
+def _connect():
+    """Open a connection to the upload queue database"""
+
+    os.makedirs(os.path.dirname(UPLOAD_DB) or '.', exist_ok=True)
+    conn = sqlite3.connect(UPLOAD_DB, timeout=10)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def init_db():
+    """Create the uploads table if it doesn't exist"""
+
+    global _db_ready
+    if _db_ready:
+        return
+
+    with _connect() as conn:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS uploads (
+                id TEXT PRIMARY KEY,
+                file_path TEXT,
+                folder TEXT,
+                status TEXT,
+                attempts INTEGER DEFAULT 0,
+                next_attempt_at REAL,
+                claimed_at REAL,
+                created_at REAL,
+                finished_at REAL,
+                url TEXT,
+                error TEXT
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_uploads_due ON uploads (status, next_attempt_at)')
+
+    _db_ready = True
+
+
+def _update(upload_id, **fields):
+    """Update columns of one upload row"""
+
+    columns = ', '.join(f"{name} = ?" for name in fields)
+    with _connect() as conn:
+        conn.execute(f"UPDATE uploads SET {columns} WHERE id = ?", (*fields.values(), upload_id))
+
+
+def _backoff(attempts):
+    """Seconds to wait before retry number `attempts` (with jitter)"""
+
+    delay = min(UPLOAD_RETRY_MAX_SECONDS, UPLOAD_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _claim():
+    """
+    Take the next due upload, or None
+
+    Expired claims (a worker died mid-upload) are due again. The UPDATE
+    checks the status it read, so two workers can't claim the same row.
+    """
+
+    now = time.time()
+
+    with _connect() as conn:
+        rows = conn.execute(
+            '''SELECT id, status, claimed_at FROM uploads
+               WHERE (status = ? AND next_attempt_at <= ?) OR (status = ? AND claimed_at < ?)
+               ORDER BY next_attempt_at LIMIT 5''',
+            (STATUS_PENDING, now, STATUS_UPLOADING, now - UPLOAD_LEASE_SECONDS)
+        ).fetchall()
+
+        for row in rows:
+            claimed = conn.execute(
+                "UPDATE uploads SET status = ?, claimed_at = ?, attempts = attempts + 1 "
+                "WHERE id = ? AND status = ? AND claimed_at IS ?",
+                (STATUS_UPLOADING, now, row['id'], row['status'], row['claimed_at'])
+            ).rowcount
+
+            if claimed:
+                return conn.execute("SELECT * FROM uploads WHERE id = ?", (row['id'],)).fetchone()
+
+    return None
+
+
+def _seconds_until_due():
+    """How long a worker can sleep before the next retry is due"""
+
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT MIN(next_attempt_at) FROM uploads WHERE status = ?", (STATUS_PENDING,)
+        ).fetchone()
+
+    if row[0] is None:
+        return UPLOAD_POLL_SECONDS
+    return min(UPLOAD_POLL_SECONDS, max(0, row[0] - time.time()))
+
+
+def _run_upload(row):
+    """Upload one claimed file and record the outcome"""
+
+    uploader = _uploader or _default_uploader
+
+    try:
+        with stage('cloudinary_upload', endpoint='background:upload'):
+            url = uploader(row['file_path'], row['folder'])
+        if not url:
+            raise RuntimeError('Upload returned no URL')
+
+    except Exception as e:
+        if row['attempts'] >= UPLOAD_MAX_ATTEMPTS:
+            print(f"❌ Upload {row['id']} failed after {row['attempts']} attempts: {e}")
+            _update(row['id'], status=STATUS_FAILED, finished_at=time.time(), error=str(e))
+            _remove_spooled(row['file_path'])
+        else:
+            _update(
+                row['id'],
+                status=STATUS_PENDING,
+                next_attempt_at=time.time() + _backoff(row['attempts']),
+                claimed_at=None,
+                error=str(e)
+            )
+        return
+
+    print(f"✅ File uploaded to Cloudinary: {url}")
+    _update(row['id'], status=STATUS_DONE, finished_at=time.time(), url=url, error=None)
+    _remove_spooled(row['file_path'])
+
+
+def _remove_spooled(file_path):
+    if os.path.exists(file_path):
+        os.remove(file_path)
+
+
+def _worker():
+    """Upload due files until the process exits"""
+
+    while True:
+        try:
+            row = _claim()
+            if row is not None:
+                _run_upload(row)
+                continue
+
+            _wakeup.wait(_seconds_until_due())
+            _wakeup.clear()
+
+        except Exception as e:
+            print(f"❌ Upload worker error: {e}")
+            time.sleep(UPLOAD_POLL_SECONDS)
+
+
+def start_workers():
+    """Start the upload threads (again after a fork, e.g. in each gunicorn worker)"""
+
+    global _workers, _workers_pid
+
+    if _workers_pid == os.getpid():
+        return
+
+    with _lock:
+        if _workers_pid == os.getpid():
+            return
+
+        init_db()
+
+        _workers = []
+        for _ in range(UPLOAD_WORKERS):
+            thread = threading.Thread(target=_worker, daemon=True)
+            thread.start()
+            _workers.append(thread)
+
+        _workers_pid = os.getpid()
+
+
+def purge_old_uploads(ttl_seconds=UPLOAD_TTL_SECONDS):
+    """Delete finished uploads older than ttl_seconds"""
+
+    with _connect() as conn:
+        conn.execute(
+            "DELETE FROM uploads WHERE status IN (?, ?) AND finished_at < ?",
+            (STATUS_DONE, STATUS_FAILED, time.time() - ttl_seconds)
+        )
+
+
+def enqueue_upload(file_path, folder='deepfake-uploads'):
+    """
+    Queue a file for upload to Cloudinary
+
+    The file is moved into the spool folder, so the caller must not use
+    (or delete) it afterwards.
+
+    Args:
+        file_path: Local file to upload
+        folder: Cloudinary folder
+
+    Returns:
+        Upload id, for get_upload()
+    """
+
+    start_workers()
+    purge_old_uploads()
+
+    upload_id = uuid.uuid4().hex
+    os.makedirs(UPLOAD_SPOOL_DIR, exist_ok=True)
+    spooled_path = os.path.join(UPLOAD_SPOOL_DIR, f"{upload_id}_{os.path.basename(file_path)}")
+    shutil.move(file_path, spooled_path)
+
+    now = time.time()
+    with _connect() as conn:
+        conn.execute(
+            "INSERT INTO uploads (id, file_path, folder, status, next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (upload_id, spooled_path, folder, STATUS_PENDING, now, now)
+        )
+
+    _wakeup.set()
+    return upload_id
+
+
+def get_upload(upload_id):
+    """
+    Get upload status
+
+    Returns:
+        Dict with status, attempts, url (once done) and the last error,
+        or None if the upload doesn't exist
+    """
+
+    init_db()
+
+    with _connect() as conn:
+        row = conn.execute("SELECT * FROM uploads WHERE id = ?", (upload_id,)).fetchone()
+
+    if row is None:
+        return None
+
+    return {
+        'upload_id': row['id'],
+        'status': row['status'],
+        'attempts': row['attempts'],
+        'next_attempt_at': row['next_attempt_at'] if row['status'] == STATUS_PENDING else None,
+        'created_at': row['created_at'],
+        'finished_at': row['finished_at'],
+        'url': row['url'],
+        'error': row['error']
+    }
+
+
+def get_upload_url(upload_id):
+    """URL of a finished upload, or None (not done yet, failed or unknown)"""
+
+    upload = get_upload(upload_id) if upload_id else None
+    return upload['url'] if upload else None
@@ -0,0 +1,134 @@
+import contextvars
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit
+
+# Run a function over many URLs at once (e.g. /api/analyze-urls)
+#
+# At most BULK_URL_CONCURRENCY calls run at a time across the whole
+# process (all batches share the slots), and at most BULK_URL_PER_HOST
+# of a batch's calls against the same host, so one slow or rate-limited
+# site can't take every slot. URLs waiting on a busy host are skipped
+# over, not waited on. Results come back as they finish.
+
+BULK_URL_MAX = int(os.getenv('BULK_URL_MAX', 500))  # URLs per request
+BULK_URL_CONCURRENCY = int(os.getenv('BULK_URL_CONCURRENCY', 16))
+BULK_URL_PER_HOST = int(os.getenv('BULK_URL_PER_HOST', 4))
+BULK_URL_TIMEOUT = float(os.getenv('BULK_URL_TIMEOUT', 20))  # Seconds per URL
+SLOT_POLL_SECONDS = 0.05  # How often a batch checks for slots freed by other batches
+
+# Held from submit until the call returns (timed out or not)
+_slots = threading.BoundedSemaphore(BULK_URL_CONCURRENCY)
+
+
+def _host(url):
+    return urlsplit(url).netloc.lower()
+
+
+def _release_slot(future):
+    _slots.release()
+
+
+def run_url_batch(urls, func, concurrency=BULK_URL_CONCURRENCY, per_host=BULK_URL_PER_HOST, timeout=BULK_URL_TIMEOUT):
+    """
+    Call func(url) for every URL concurrently
+
+    func should respect the timeout itself where it can (it gets no
+    signal); a call still running at its deadline is reported as timed
+    out, and keeps its slot until it actually returns.
+
+    Args:
+        urls: URLs to process
+        func: Called as func(url) in a worker thread
+        concurrency: Max calls in flight for this batch (the process-wide
+            BULK_URL_CONCURRENCY limit applies as well)
+        per_host: Max calls in flight per host
+        timeout: Seconds allowed per URL
+
+    Yields:
+        (index, url, result, error) in completion order; error is None on
+        success, the exception func raised, or a TimeoutError
+    """
+
+    waiting = deque(enumerate(urls))
+    running = {}  # future -> (index, url, host, deadline)
+    abandoned = {}  # timed out but still running: future -> host
+    per_host_running = defaultdict(int)
+
+    pool = ThreadPoolExecutor(max_workers=max(1, concurrency))
+
+    try:
+        while waiting or running:
+            # Start whatever fits, skipping URLs whose host is at its limit
+            skipped = deque()
+            starved = False
+            while waiting and len(running) + len(abandoned) < concurrency:
+                index, url = waiting.popleft()
+                host = _host(url)
+
+                if per_host_running[host] >= per_host:
+                    skipped.append((index, url))
+                    continue
+
+                # Other batches may hold every slot; only block if there's
+                # nothing of our own to wait for
+                if not _slots.acquire(timeout=0 if running or abandoned else SLOT_POLL_SECONDS):
+                    skipped.append((index, url))
+                    starved = True
+                    break
+
+                # Copy the context so stage metrics keep the request's endpoint
+                future = pool.submit(contextvars.copy_context().run, func, url)
+                future.add_done_callback(_release_slot)
+                running[future] = (index, url, host, time.monotonic() + timeout)
+                per_host_running[host] += 1
+
+            waiting.extendleft(reversed(skipped))
+
+            if not running:
+                # Only abandoned calls (if any) hold our slots; wait for one
+                # to free up, or poll for slots freed elsewhere
+                done, _ = wait(
+                    abandoned,
+                    timeout=SLOT_POLL_SECONDS if starved else None,
+                    return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    per_host_running[abandoned.pop(future)] -= 1
+                continue
+
+            next_deadline = min(deadline for _, _, _, deadline in running.values())
+            wait_seconds = max(0, next_deadline - time.monotonic())
+            done, _ = wait(
+                list(running) + list(abandoned),
+                timeout=min(wait_seconds, SLOT_POLL_SECONDS) if starved else wait_seconds,
+                return_when=FIRST_COMPLETED
+            )
+
+            for future in done:
+                if future in abandoned:
+                    per_host_running[abandoned.pop(future)] -= 1
+                    continue
+
+                index, url, host, _ = running.pop(future)
+                per_host_running[host] -= 1
+
+                try:
+                    yield index, url, future.result(), None
+                except Exception as e:
+                    yield index, url, None, e
+
+            now = time.monotonic()
+            for future, (index, url, host, deadline) in list(running.items()):
+                if deadline <= now:
+                    del running[future]
+                    abandoned[future] = host
+                    yield index, url, None, TimeoutError(f"Timed out after {timeout:g}s")
+
+    finally:
+        # If the caller stops early (e.g. the client disconnected), don't
+        # wait for calls still running
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,295 @@
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import url_handler
+from url_handler import fetch_image
+
+# Disk cache of downloaded images, keyed by normalized URL
+#
+# Each entry keeps the body's hash and the server's ETag / Last-Modified.
+# A repeat request for the URL is sent as a conditional GET; on a 304 the
+# cached body is reused without downloading it again, and its known hash
+# leads straight to any cached prediction. Bodies are stored once per
+# content hash, and entries are evicted by TTL and a total disk budget.
+
+URL_CACHE_DB = os.getenv('URL_CACHE_DB', 'temp/url_cache.db')
+URL_CACHE_DIR = os.getenv('URL_CACHE_DIR', 'temp/url_cache')
+URL_CACHE_TTL_SECONDS = int(os.getenv('URL_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+URL_CACHE_MAX_BYTES = int(os.getenv('URL_CACHE_MAX_BYTES', 512 * 1024 * 1024))  # 512MB
+
+_lock = threading.Lock()
+_db_ready = False
+
+_counters = {
+    'revalidated': 0,  # 304, body reused
+    'changed': 0,  # Cached URL whose body changed
+    'misses': 0,
+    'evictions': 0
+}
+
+
+def normalize_url(url):
+    """
+    Cache key for a URL: lowercase scheme and host, no default port, no
+    fragment, query parameters sorted
+    """
+
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+
+    if parts.port and (scheme, parts.port) not in (('http', 80), ('https', 443)):
+        host = f"{host}:{parts.port}"
+
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+
+    return urlunsplit((scheme, host, parts.path or '/', query, ''))
+
+
+def _connect():
+    """Open the cache index, creating the table on first use"""
+
+    global _db_ready
+
+    os.makedirs(os.path.dirname(URL_CACHE_DB) or '.', exist_ok=True)
+    conn = sqlite3.connect(URL_CACHE_DB, timeout=10)
+    conn.row_factory = sqlite3.Row
+
+    if not _db_ready:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT,
+                body_path TEXT,
+                size_bytes INTEGER,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL,
+                last_used_at REAL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_urls_used ON urls (last_used_at)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_urls_hash ON urls (content_hash)')
+        conn.commit()
+        _db_ready = True
+
+    return conn
+
+
+def _count(name):
+    with _lock:
+        _counters[name] += 1
+
+
+def _link_copy(source, destination):
+    """Hard link source to destination (a full copy if linking isn't possible)"""
+
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+def _reuse_body(body_path):
+    """
+    Link a cached body to a fresh file in the download folder
+
+    Returns:
+        The new path, or None if the body was evicted in the meantime
+    """
+
+    # Read at call time, the download folder can be changed after import
+    os.makedirs(url_handler.DOWNLOAD_DIR, exist_ok=True)
+    path = os.path.join(url_handler.DOWNLOAD_DIR, f"url_{uuid.uuid4().hex}{os.path.splitext(body_path)[1]}")
+
+    try:
+        _link_copy(body_path, path)
+    except FileNotFoundError:
+        return None
+
+    return path
+
+
+def _store_body(path, content_hash):
+    """Keep a copy of a downloaded body in the cache folder (once per content hash)"""
+
+    os.makedirs(URL_CACHE_DIR, exist_ok=True)
+    body_path = os.path.join(URL_CACHE_DIR, content_hash + os.path.splitext(path)[1])
+
+    if not os.path.exists(body_path):
+        temp_path = f"{body_path}.{uuid.uuid4().hex}.tmp"
+        _link_copy(path, temp_path)
+        os.replace(temp_path, body_path)
+
+    return body_path
+
+
+def _remove_unused_body(conn, content_hash, body_path):
+    """Delete a body file once no URL points at it; returns True if deleted"""
+
+    still_used = conn.execute("SELECT 1 FROM urls WHERE content_hash = ? LIMIT 1", (content_hash,)).fetchone()
+
+    if still_used:
+        return False
+    if os.path.exists(body_path):
+        os.remove(body_path)
+    return True
+
+
+def _delete_rows(conn, rows):
+    """Drop cache rows and any body files no other row still uses"""
+
+    conn.executemany("DELETE FROM urls WHERE url = ?", [(row['url'],) for row in rows])
+
+    for row in rows:
+        _remove_unused_body(conn, row['content_hash'], row['body_path'])
+
+    with _lock:
+        _counters['evictions'] += len(rows)
+
+
+def evict(now=None, max_bytes=None):
+    """
+    Remove entries unused for URL_CACHE_TTL_SECONDS, then least recently
+    used ones until the bodies fit in max_bytes (URL_CACHE_MAX_BYTES)
+
+    Returns:
+        Number of entries removed
+    """
+
+    now = now or time.time()
+    max_bytes = URL_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+
+    with _connect() as conn:
+        expired = conn.execute(
+            "SELECT url, content_hash, body_path FROM urls WHERE last_used_at < ?",
+            (now - URL_CACHE_TTL_SECONDS,)
+        ).fetchall()
+        _delete_rows(conn, expired)
+        removed = len(expired)
+
+        # Bodies are shared between URLs with the same content, so count each once
+        total = conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size_bytes) AS size FROM urls GROUP BY content_hash)"
+        ).fetchone()[0]
+
+        if total > max_bytes:
+            for row in conn.execute(
+                "SELECT url, content_hash, body_path, size_bytes FROM urls ORDER BY last_used_at"
+            ).fetchall():
+                if total <= max_bytes:
+                    break
+
+                conn.execute("DELETE FROM urls WHERE url = ?", (row['url'],))
+                if _remove_unused_body(conn, row['content_hash'], row['body_path']):
+                    total -= row['size_bytes']
+                removed += 1
+
+    with _lock:
+        _counters['evictions'] += removed - len(expired)
+
+    return removed
+
+
+def download_cached(url, max_seconds=None):
+    """
+    Download an image through the cache
+
+    Args:
+        url: Image URL
+        max_seconds: Limit on the whole download
+
+    Returns:
+        (path, content_hash): path is a fresh file the caller owns (a hard
+        link to the cached body on a 304), content_hash its SHA-256
+
+    Raises:
+        Whatever url_handler.fetch_image raises
+    """
+
+    key = normalize_url(url)
+
+    with _connect() as conn:
+        entry = conn.execute("SELECT * FROM urls WHERE url = ?", (key,)).fetchone()
+
+    if entry is not None and not os.path.exists(entry['body_path']):
+        entry = None
+
+    headers = {}
+    if entry is not None:
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+
+    fetched = fetch_image(url, max_seconds=max_seconds, headers=headers)
+    now = time.time()
+
+    if fetched['not_modified']:
+        if entry is None:
+            raise ValueError("Unexpected 304 for an uncached URL")
+
+        path = _reuse_body(entry['body_path'])
+
+        if path is not None:
+            with _connect() as conn:
+                conn.execute("UPDATE urls SET fetched_at = ?, last_used_at = ? WHERE url = ?", (now, now, key))
+
+            _count('revalidated')
+            return path, entry['content_hash']
+
+        # Evicted between the lookup and the 304: a miss, fetch it in full
+        entry = None
+        fetched = fetch_image(url, max_seconds=max_seconds)
+        now = time.time()
+
+    _count('changed' if entry is not None else 'misses')
+
+    # Without validators the next request would download it anyway
+    if fetched['etag'] or fetched['last_modified']:
+        body_path = _store_body(fetched['path'], fetched['sha256'])
+
+        with _connect() as conn:
+            conn.execute(
+                '''INSERT OR REPLACE INTO urls
+                   (url, content_hash, body_path, size_bytes, etag, last_modified, fetched_at, last_used_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                (key, fetched['sha256'], body_path, os.path.getsize(body_path),
+                 fetched['etag'], fetched['last_modified'], now, now)
+            )
+
+            # The URL's old body may now be unused
+            if entry is not None and entry['content_hash'] != fetched['sha256']:
+                _remove_unused_body(conn, entry['content_hash'], entry['body_path'])
+
+        evict(now)
+
+    return fetched['path'], fetched['sha256']
+
+
+def get_url_cache_stats():
+    """Revalidation counters and disk usage"""
+
+    with _lock:
+        stats = dict(_counters)
+
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT content_hash) FROM urls"
+        ).fetchone()
+        size = conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size_bytes) AS size FROM urls GROUP BY content_hash)"
+        ).fetchone()[0]
+
+    stats['entries'] = row[0]
+    stats['bodies'] = row[1]
+    stats['disk_bytes'] = size
+    stats['disk_limit_bytes'] = URL_CACHE_MAX_BYTES
+
+    return stats
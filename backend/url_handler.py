@@ -1,51 +1,224 @@
 import requests
+from requests.adapters import HTTPAdapter
 from PIL import Image
-from io import BytesIO
+import hashlib
 import os
+import threading
+import time
+import uuid
+
+# Downloads share one session (kept-alive connections per host) and are
+# streamed to disk, so memory per request stays at one chunk no matter
+# how big the remote file is
+URL_MAX_BYTES = int(os.getenv('URL_MAX_BYTES', 10 * 1024 * 1024))  # 10MB
+URL_CONNECT_TIMEOUT = float(os.getenv('URL_CONNECT_TIMEOUT', 5))
+URL_READ_TIMEOUT = float(os.getenv('URL_READ_TIMEOUT', 10))
+URL_POOL_SIZE = int(os.getenv('URL_POOL_SIZE', 20))  # Connections kept per host
+DOWNLOAD_DIR = 'temp'
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# Formats OpenCV reads directly are saved as downloaded; anything else
+# Pillow understands (GIF, TIFF...) is converted to JPEG
+DIRECT_FORMATS = {'.jpg', '.png', '.webp', '.bmp'}
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+class DownloadError(Exception):
+    """Raised when a URL can't be downloaded as an image"""
+
+
+def get_session():
+    """The shared requests session (a new one after a fork)"""
+
+    global _session, _session_pid
+
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=URL_POOL_SIZE, pool_maxsize=URL_POOL_SIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update(HEADERS)
+
+            _session = session
+            _session_pid = os.getpid()
+
+    return _session
+
+
+def sniff_image_format(header):
+    """
+    Detect an image format from its first bytes (magic numbers)
+
+    Returns:
+        File extension ('.jpg', '.png', '.webp', '.bmp', '.gif', '.tiff') or None
+    """
+
+    if header.startswith(b'\xff\xd8\xff'):
+        return '.jpg'
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return '.png'
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return '.webp'
+    if header.startswith(b'BM'):
+        return '.bmp'
+    if header[:6] in (b'GIF87a', b'GIF89a'):
+        return '.gif'
+    if header[:4] in (b'II*\x00', b'MM\x00*'):
+        return '.tiff'
+    return None
+
+
+def _stream_to_file(response, path, max_bytes, deadline=None):
+    """
+    Write the response body to path, checking the magic bytes of the first
+    chunk and stopping as soon as max_bytes is crossed (or the deadline passes)
+
+    Returns:
+        (detected image format (extension), SHA-256 hex digest of the body)
+    """
+
+    size = 0
+    image_format = None
+    sha256 = hashlib.sha256()
+
+    with open(path, 'wb') as f:
+        for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+            if size == 0:
+                image_format = sniff_image_format(chunk[:16])
+                if image_format is None:
+                    raise DownloadError("URL does not point to a supported image")
+
+            size += len(chunk)
+            if size > max_bytes:
+                raise DownloadError(f"Image too large (max {max_bytes // (1024 * 1024)}MB)")
+
+            if deadline and time.monotonic() > deadline:
+                raise requests.exceptions.Timeout()
+
+            sha256.update(chunk)
+            f.write(chunk)
+
+    if size == 0:
+        raise DownloadError("Empty response")
+
+    return image_format, sha256.hexdigest()
+
+
+def fetch_image(url, save_path=None, max_bytes=URL_MAX_BYTES, timeout=None, max_seconds=None, headers=None):
+    """
+    Download an image, raising on failure (see download_image_from_url)
+
+    headers are sent with the request, e.g. If-None-Match for a revalidation
+
+    Returns:
+        Dict with path, sha256 (of the saved file), etag, last_modified and
+        not_modified (True on a 304, in which case path and sha256 are None)
+
+    Raises:
+        DownloadError, or a requests exception for network errors
+    """
+
+    temp_path = os.path.join(DOWNLOAD_DIR, f"url_{uuid.uuid4().hex}.download")
+    deadline = time.monotonic() + max_seconds if max_seconds else None
+
+    if timeout is None:
+        timeout = (URL_CONNECT_TIMEOUT, URL_READ_TIMEOUT)
+        if max_seconds:
+            timeout = tuple(min(seconds, max_seconds) for seconds in timeout)
+
+    try:
+        os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+
+        with get_session().get(url, headers=headers, timeout=timeout, stream=True) as response:
+            fetched = {
+                'path': None,
+                'sha256': None,
+                'etag': response.headers.get('etag'),
+                'last_modified': response.headers.get('last-modified'),
+                'not_modified': response.status_code == 304
+            }
+
+            if fetched['not_modified']:
+                return fetched
+
+            if response.status_code != 200:
+                raise DownloadError(f"Failed to download: Status {response.status_code}")
+
+            # Reject from the headers before reading the body
+            content_type = response.headers.get('content-type', '')
+            if 'image' not in content_type:
+                raise DownloadError("URL does not point to an image")
+
+            content_length = response.headers.get('content-length')
+            if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+                raise DownloadError(f"Image too large (max {max_bytes // (1024 * 1024)}MB)")
+
+            image_format, sha256 = _stream_to_file(response, temp_path, max_bytes, deadline)
+
+        if image_format in DIRECT_FORMATS:
+            path = save_path or temp_path[:-len('.download')] + image_format
+            os.replace(temp_path, path)
+        else:
+            path = save_path or temp_path[:-len('.download')] + '.jpg'
+            with Image.open(temp_path) as image:
+                image.convert('RGB').save(path, 'JPEG')
+            with open(path, 'rb') as f:
+                sha256 = hashlib.sha256(f.read()).hexdigest()
+
+        fetched['path'] = path
+        fetched['sha256'] = sha256
+        return fetched
+
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def download_image_from_url(url, save_path=None, max_bytes=URL_MAX_BYTES, timeout=None, max_seconds=None):
+    """
+    Download image from URL
+
+    Args:
+        url: Image URL
+        save_path: Where to save it (default: a unique file in DOWNLOAD_DIR)
+        max_bytes: Give up once the body is bigger than this
+        timeout: (connect, read) seconds
+        max_seconds: Limit on the whole download (timeout only bounds each read)
+
+    Returns:
+        (path, None) on success, (None, error message) on failure
+    """
 
-def download_image_from_url(url, save_path='temp/url_image.jpg'):
-    """Download image from URL"""
-    
     try:
         print(f"🔗 Downloading image from URL...")
-        
-        # Set headers to mimic browser
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        # Download
-        response = requests.get(url, headers=headers, timeout=10)
-        
-        if response.status_code != 200:
-            return None, f"Failed to download: Status {response.status_code}"
-        
-        # Check if it's an image
-        content_type = response.headers.get('content-type', '')
-        if 'image' not in content_type:
-            return None, "URL does not point to an image"
-        
-        # Save image
-        image = Image.open(BytesIO(response.content))
-        
-        # Convert to RGB if needed
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        # Save
-        image.save(save_path)
-        
+
+        fetched = fetch_image(url, save_path, max_bytes, timeout, max_seconds)
+
         print(f"✅ Image downloaded successfully!")
-        return save_path, None
-    
-    except requests.exceptions.Timeout:
-        return None, "Request timeout - URL took too long to respond"
-    
-    except requests.exceptions.RequestException as e:
-        return None, f"Network error: {str(e)}"
-    
+        return fetched['path'], None
+
     except Exception as e:
-        return None, f"Error: {str(e)}"
+        return None, describe_error(e)
+
+
+def describe_error(error):
+    """User-facing message for an exception raised by fetch_image"""
+
+    if isinstance(error, DownloadError):
+        return str(error)
+    if isinstance(error, requests.exceptions.Timeout):
+        return "Request timeout - URL took too long to respond"
+    if isinstance(error, requests.exceptions.RequestException):
+        return f"Network error: {str(error)}"
+    return f"Error: {str(error)}"
 
 def validate_url(url):
     """Check if URL is valid"""
@@ -0,0 +1,281 @@
+import os
+import time
+from collections import deque
+import numpy as np
+from video_processor import iter_video_frames, iter_frame_rounds, get_video_info
+from app.models.inference import get_engine
+from app.models.preprocess import FRAME_POOL
+from app.utils.metrics import stage, timed_iter, observe_stage
+from phash_index import PerceptualIndex, phash, find_near_duplicate, add_to_index
+from result_cache import make_key, get_cached, set_cached
+from face_detector import FaceTracker, crop_face, pipeline_version
+
+
+# Early termination: frames are analyzed in coarse-to-fine rounds (see
+# video_processor.coarse_to_fine), and analysis stops after a round once
+# the verdict is settled, i.e. the confidence interval of the mean
+# frame confidence is entirely on one side of VERDICT_THRESHOLD
+EARLY_STOP_ENABLED = os.getenv('EARLY_STOP_ENABLED', 'true').lower() == 'true'
+EARLY_STOP_MIN_FRAMES = int(os.getenv('EARLY_STOP_MIN_FRAMES', 5))
+EARLY_STOP_FIRST_ROUND = int(os.getenv('EARLY_STOP_FIRST_ROUND', 5))  # Raised to EARLY_STOP_MIN_FRAMES if lower
+EARLY_STOP_Z = float(os.getenv('EARLY_STOP_Z', 3.0))  # Interval width in standard errors
+EARLY_STOP_MIN_STD = float(os.getenv('EARLY_STOP_MIN_STD', 5.0))  # Assumed spread when frames agree closely
+
+VERDICT_THRESHOLD = 50  # Mean confidence above this is 'Real'
+
+
+def confidence_bounds(confidences, z=None, min_std=None):
+    """
+    Interval for the mean frame confidence, mean +/- z standard errors
+
+    The sample standard deviation is floored at min_std, so a handful of
+    identical scores doesn't look like certainty
+
+    Returns:
+        (low, high)
+    """
+
+    z = EARLY_STOP_Z if z is None else z
+    min_std = EARLY_STOP_MIN_STD if min_std is None else min_std
+
+    scores = np.asarray(confidences, dtype=np.float64)
+    std = scores.std(ddof=1) if len(scores) > 1 else 0.0
+    margin = z * max(std, min_std) / np.sqrt(len(scores))
+    mean = scores.mean()
+
+    return float(mean - margin), float(mean + margin)
+
+
+def verdict_settled(confidences, min_frames=None):
+    """Whether more frames could still flip the verdict"""
+
+    min_frames = EARLY_STOP_MIN_FRAMES if min_frames is None else min_frames
+    if len(confidences) < max(min_frames, 1):
+        return False
+
+    low, high = confidence_bounds(confidences)
+    return low > VERDICT_THRESHOLD or high <= VERDICT_THRESHOLD
+
+
+def _aggregate(results):
+    """Running verdict over the frames analyzed so far"""
+
+    confidences = [result['confidence'] for result in results]
+    mean = sum(confidences) / len(confidences)
+    low, high = confidence_bounds(confidences)
+
+    return {
+        'prediction': 'Real' if mean > VERDICT_THRESHOLD else 'Fake',
+        'confidence': round(mean, 2),
+        'confidence_interval': [round(low, 2), round(high, 2)]
+    }
+
+
+def iter_video_analysis(video_path, max_frames=20, early_stop=None, content_hash=None):
+    """
+    Run frame-by-frame analysis, yielding each frame's result as soon as
+    its inference is done
+
+    Args:
+        video_path: Path to video file (or a seekable stream)
+        max_frames: Maximum number of frames to analyze
+        early_stop: Stop once the verdict is settled (defaults to EARLY_STOP_ENABLED)
+        content_hash: Hash of the uploaded file; frame results are only
+            reused between analyses of the same upload
+
+    Yields:
+        ('frame', {'frame', 'frames_done', 'frames_total', 'aggregate'})
+        for each frame, in the order they finish, then ('result', the
+        same dict analyze_video_file returns)
+    """
+
+    early_stop = EARLY_STOP_ENABLED if early_stop is None else early_stop
+
+    # Get video info
+    with stage('video_info'):
+        video_info = get_video_info(video_path)
+
+    # Queue each sampled frame for inference as soon as it is decoded;
+    # the engine batches them with frames from other requests. Frames that
+    # look like one already analyzed in this video (static shots, a
+    # repeated scene...) reuse that result instead.
+    #
+    # Reuse never crosses videos: the face crop of a face-swapped copy can
+    # hash within a few bits of the original's. With a content hash the
+    # results are kept for re-analyses of the same upload; without one
+    # (remote streams) they only live for this call.
+    #
+    # The model gets a crop of the largest face when there is one; faces
+    # are tracked from frame to frame so the detector rarely runs
+    engine = get_engine()
+    version = pipeline_version(engine.model_version)
+    namespace = f"frame:{version}:{content_hash}" if content_hash else None
+    local_index = PerceptualIndex()
+    tracker = FaceTracker()
+    timings = {'face_detect': 0.0, 'inference': 0.0}
+    analyzed = []  # (frame, result)
+    frames_planned = None
+    frame_scenes = None
+    stopped_early = False
+
+    # Without early stopping adaptive sampling may pick fewer, but that
+    # isn't known until the last frame
+    frames_expected = min(max_frames, video_info['total_frames']) if video_info else max_frames
+
+    def finish(frame, faces_found, frame_hash, cached, future):
+        """Wait for one frame's prediction and record it"""
+
+        if cached:
+            prediction = cached
+        else:
+            start = time.perf_counter()
+            prediction = future.result()
+            timings['inference'] += time.perf_counter() - start
+
+            if namespace:
+                cache_key = make_key(f"{content_hash}:{frame_hash:016x}", version, 'frame')
+                set_cached(cache_key, prediction)
+                add_to_index(frame_hash, namespace, cache_key)
+            else:
+                local_index.add(frame_hash, prediction)
+
+        # The engine is done with the decoded frame; hand its buffer to the next one
+        FRAME_POOL.release(frame.image)
+
+        result = {
+            'frame_index': frame.index,
+            'timestamp': frame.timestamp,
+            'prediction': prediction['prediction'],
+            'confidence': prediction['confidence'],
+            'faces': faces_found,
+            'scene': frame.scene.number if frame.scene else None,
+            'near_duplicate': cached is not None
+        }
+        analyzed.append((frame._replace(image=None), result))
+
+        return 'frame', {
+            'frame': result,
+            'frames_done': len(analyzed),
+            'frames_total': frames_planned or max(frames_expected, len(analyzed) + len(pending)),
+            'aggregate': _aggregate([result for _, result in analyzed])
+        }
+
+    if early_stop:
+        # A first round smaller than the floor can never settle, and stopping
+        # after it is what skips adaptive sampling's probe pass
+        first_round = max(EARLY_STOP_FIRST_ROUND, EARLY_STOP_MIN_FRAMES)
+        rounds = timed_iter(
+            iter_frame_rounds(video_path, max_frames=max_frames, first_round=first_round, pool=FRAME_POOL),
+            'extract_frames'
+        )
+    else:
+        rounds = [(timed_iter(iter_video_frames(video_path, max_frames=max_frames, pool=FRAME_POOL), 'extract_frames'), None, None)]
+
+    try:
+        for round_frames, frames_planned, frame_scenes in rounds:
+            pending = deque()
+
+            for frame in round_frames:
+                start = time.perf_counter()
+                faces = tracker.update(frame.image)
+                image = crop_face(frame.image, faces[0]) if faces else frame.image
+                timings['face_detect'] += time.perf_counter() - start
+
+                frame_hash = phash(image)
+                if namespace:
+                    match = find_near_duplicate(frame_hash, namespace)
+                    cached = get_cached(match[1]) if match else None
+                else:
+                    matches = local_index.search(frame_hash)
+                    cached = matches[0][2] if matches else None
+
+                pending.append((frame, len(faces), frame_hash, cached, None if cached else engine.submit(image)))
+
+                # Hand out whatever has finished while decoding continues
+                while pending and (pending[0][3] or pending[0][4].done()):
+                    yield finish(*pending.popleft())
+
+            while pending:
+                yield finish(*pending.popleft())
+
+            if early_stop and verdict_settled([result['confidence'] for _, result in analyzed]):
+                stopped_early = len(analyzed) < (frames_planned or 0)
+                break
+
+    finally:
+        if tracker.enabled:
+            observe_stage('face_detect', timings['face_detect'])
+        observe_stage('inference', timings['inference'])
+
+    if not analyzed:
+        yield 'result', None
+        return
+
+    # The first round is analyzed before adaptive sampling has split the
+    # video into scenes
+    for position, (frame, result) in enumerate(analyzed):
+        if frame.scene is None and frame_scenes and frame.index in frame_scenes:
+            analyzed[position] = (frame._replace(scene=frame_scenes[frame.index]), result)
+            result['scene'] = frame_scenes[frame.index].number
+
+    # Rounds jump around the video; report frames in video order
+    analyzed.sort(key=lambda entry: entry[0].index)
+    frame_results = []
+    for number, (_, result) in enumerate(analyzed, start=1):
+        frame_results.append({'frame_number': number, **result})
+
+    # Shots the sampled frames stand for (adaptive sampling)
+    fps = video_info['fps'] if video_info else 0
+    scenes = {}
+    for (frame, _), result in zip(analyzed, frame_results):
+        if frame.scene is None:
+            continue
+        scene = scenes.setdefault(frame.scene.number, {
+            'scene': frame.scene.number,
+            'start': round(frame.scene.start / fps, 3) if fps else None,
+            'end': round(frame.scene.end / fps, 3) if fps else None,
+            'frames': []
+        })
+        scene['frames'].append(result['frame_number'])
+
+    # Calculate overall result
+    overall = _aggregate(frame_results)
+
+    yield 'result', {
+        'video_info': video_info,
+        'frames_analyzed': len(frame_results),
+        'frames_sampled': max(frames_planned or 0, len(frame_results)),
+        'stopped_early': stopped_early,
+        'frames_reused': sum(1 for r in frame_results if r['near_duplicate']),
+        'frames_with_face': sum(1 for r in frame_results if r['faces']),
+        'face_detector_calls': tracker.detector_calls,
+        'frame_results': frame_results,
+        'scenes': list(scenes.values()),
+        'overall_prediction': overall['prediction'],
+        'overall_confidence': overall['confidence'],
+        'confidence_interval': overall['confidence_interval']
+    }
+
+
+def analyze_video_file(video_path, max_frames=20, progress=None, early_stop=None, content_hash=None):
+    """
+    Run frame-by-frame analysis on a saved video
+
+    Args:
+        video_path: Path to video file
+        max_frames: Maximum number of frames to analyze
+        progress: Optional callback(frames_done, frames_total) called after each frame
+        early_stop: Stop once the verdict is settled (defaults to EARLY_STOP_ENABLED)
+        content_hash: Hash of the uploaded file (see iter_video_analysis)
+
+    Returns:
+        Dict with video info, per-frame results and overall verdict,
+        or None if no frames could be read
+    """
+
+    for kind, payload in iter_video_analysis(video_path, max_frames, early_stop, content_hash):
+        if kind == 'result':
+            return payload
+
+        if progress:
+            progress(payload['frames_done'], payload['frames_total'])
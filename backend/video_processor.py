@@ -1,82 +1,716 @@
+import atexit
 import cv2
+import heapq
 import os
+import numpy as np
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image
 
-def extract_frames_from_video(video_path, output_folder='temp/frames', max_frames=30):
+# A shot in the video, as a range of frame indices (numbered from 0)
+Scene = namedtuple('Scene', ['number', 'start', 'end'])
+
+# A decoded frame: index in the video, timestamp in seconds, BGR NumPy array,
+# and (adaptive sampling only) the Scene it was picked to represent
+VideoFrame = namedtuple('VideoFrame', ['index', 'timestamp', 'image', 'scene'], defaults=(None,))
+
+# Sampling modes for extract_frames_from_video
+#   'seek'       - jump straight to each sampled frame (cost scales with max_frames)
+#   'grab'       - grab() past skipped frames without retrieving them
+#   'sequential' - read() every frame (old behaviour, always works)
+#   'auto'       - seek when samples are far apart, grab when they are close
+SAMPLING_MODES = ('auto', 'seek', 'grab', 'sequential')
+
+# Below this many frames between samples, grabbing forward is cheaper than
+# seeking back to the previous keyframe and decoding up to the target
+SEEK_MIN_INTERVAL = 48
+
+# Parallel decoding: videos longer than one segment are split into
+# segments of this many seconds and decoded in VIDEO_WORKERS processes.
+# Each web server worker gets its own process pool, so keep this small.
+# Segments with only a frame or two aren't worth a task (opening the file
+# and seeking costs as much as decoding them), so decoding only goes
+# parallel when segments average PARALLEL_MIN_SEGMENT_FRAMES frames
+VIDEO_WORKERS = int(os.getenv('VIDEO_WORKERS', min(2, os.cpu_count() or 1)))
+SEGMENT_SECONDS = float(os.getenv('VIDEO_SEGMENT_SECONDS', 30))
+PARALLEL_MIN_SEGMENT_FRAMES = int(os.getenv('PARALLEL_MIN_SEGMENT_FRAMES', 8))
+
+# Frame selection
+#   'uniform'  - max_frames evenly spaced frames
+#   'adaptive' - probe up to ADAPTIVE_PROBE_FACTOR times as many evenly
+#                spaced frames (see adaptive_probe_count), split them into
+#                scenes and keep up to max_frames that differ from each
+#                other (see select_distinct_frames)
+#
+# Adaptive is opt-in: on long videos where uniform samples are seeked to,
+# the probe pass decodes up to ADAPTIVE_PROBE_FACTOR times as many frames
+# (about 4x the decode time of a 5 minute clip), and early stopping
+# usually settles before it would run anyway
+VIDEO_SAMPLING = os.getenv('VIDEO_SAMPLING', 'uniform')
+ADAPTIVE_PROBE_FACTOR = int(os.getenv('ADAPTIVE_PROBE_FACTOR', 4))
+SCENE_CUT_THRESHOLD = float(os.getenv('SCENE_CUT_THRESHOLD', 0.3))  # Histogram distance, 0-1
+DUPLICATE_THRESHOLD = float(os.getenv('DUPLICATE_THRESHOLD', 0.02))  # Mean pixel difference, 0-1
+
+_pools = {}
+
+
+def get_sample_indices(total_frames, max_frames):
     """
-    Extract frames from video
+    Pick evenly spaced frame indices to sample
     
     Args:
-        video_path: Path to video file
-        output_folder: Where to save frames
-        max_frames: Maximum number of frames to extract
+        total_frames: Number of frames in the video
+        max_frames: Maximum number of frames to sample
     
     Returns:
-        List of frame paths
+        Sorted list of frame indices
     """
     
-    # Create output folder if doesn't exist
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
+    if total_frames <= 0 or max_frames <= 0:
+        return []
     
-    # Open video
-    video = cv2.VideoCapture(video_path)
+    if total_frames <= max_frames:
+        return list(range(total_frames))
     
-    if not video.isOpened():
-        print("❌ Error: Could not open video")
-        return []
+    frame_interval = total_frames // max_frames
+    return [i * frame_interval for i in range(max_frames)]
+
+
+def adaptive_probe_count(total_frames, max_frames, mode='auto'):
+    """
+    Number of frames adaptive sampling probes
+
+    ADAPTIVE_PROBE_FACTOR per kept frame, but in 'auto' and 'seek' mode
+    no closer together than SEEK_MIN_INTERVAL, since below that auto mode
+    grabs through the whole video instead of seeking. Videos where even
+    max_frames can't be spaced that far apart get grabbed through either
+    way, so they're probed at the full factor.
+    """
+
+    probes = max_frames * ADAPTIVE_PROBE_FACTOR
+
+    if mode in ('grab', 'sequential') or not max_frames or total_frames // max_frames < SEEK_MIN_INTERVAL:
+        return probes
+
+    return max(max_frames, min(probes, total_frames // SEEK_MIN_INTERVAL))
+
+
+def _read_into(read, video, pool, buffer=None):
+    """
+    Call video.read / video.retrieve into a pooled frame buffer (or the
+    given scratch buffer) instead of a freshly allocated one
+    """
     
-    # Get video info
-    total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
-    fps = int(video.get(cv2.CAP_PROP_FPS))
+    if buffer is None and pool is not None:
+        height = int(video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        width = int(video.get(cv2.CAP_PROP_FRAME_WIDTH))
+        if height > 0 and width > 0:
+            buffer = pool.acquire((height, width, 3))
     
-    print(f"📹 Video Info:")
-    print(f"   Total Frames: {total_frames}")
-    print(f"   FPS: {fps}")
+    success, frame = read(buffer) if buffer is not None else read()
     
-    # Calculate frame interval (to get max_frames evenly distributed)
-    if total_frames <= max_frames:
-        frame_interval = 1
-        frames_to_extract = total_frames
-    else:
-        frame_interval = total_frames // max_frames
-        frames_to_extract = max_frames
+    # OpenCV allocates its own array when the buffer doesn't fit
+    if pool is not None and buffer is not None and (not success or frame is not buffer):
+        pool.release(buffer)
     
-    frame_paths = []
-    frame_count = 0
-    extracted_count = 0
+    return success, frame
+
+
+def _read_sequential(video, indices, start=0, pool=None):
+    """Decode every frame from `start` and keep the ones in indices"""
     
-    print(f"⏳ Extracting {frames_to_extract} frames...")
+    wanted = set(indices)
+    last = max(indices)
+    frame_count = start
+    scratch = None  # Skipped frames are all decoded into this one buffer
     
-    while True:
-        success, frame = video.read()
+    while frame_count <= last:
+        if frame_count in wanted:
+            success, frame = _read_into(video.read, video, pool)
+        else:
+            success, frame = _read_into(video.read, video, None, scratch)
+        
+        if not success:
+            break
+        
+        if frame_count in wanted:
+            yield frame_count, frame
+        else:
+            scratch = frame
+        
+        frame_count += 1
+
+
+def _read_grab(video, indices, start=0, pool=None):
+    """Skip unwanted frames with grab() and only retrieve() sampled ones"""
+    
+    wanted = set(indices)
+    last = max(indices)
+    frame_count = start
+    
+    while frame_count <= last:
+        if not video.grab():
+            break
+        
+        if frame_count in wanted:
+            success, frame = _read_into(video.retrieve, video, pool)
+            if success:
+                yield frame_count, frame
+        
+        frame_count += 1
+
+
+def _landed_on(video, index, fps):
+    """
+    Whether the frame just read after seeking is really frame `index`
+    
+    Right after set() the capture mostly echoes the requested position,
+    so this checks where it is once the frame has been decoded: the next
+    frame should be index + 1, and the frame's timestamp should match
+    """
+    
+    if int(video.get(cv2.CAP_PROP_POS_FRAMES)) != index + 1:
+        return False
+    
+    if fps:
+        return abs(video.get(cv2.CAP_PROP_POS_MSEC) - index * 1000 / fps) < 500 / fps
+    
+    return True
+
+
+def _read_seek(video, indices, pool=None):
+    """
+    Seek directly to each sampled frame
+    
+    Falls back to sequential decoding from the start for the remaining
+    frames if a seek lands on a different frame than the one we asked
+    for (some formats can only seek to keyframes, or not at all)
+    """
+    
+    fps = video.get(cv2.CAP_PROP_FPS)
+    
+    for position, index in enumerate(indices):
+        video.set(cv2.CAP_PROP_POS_FRAMES, index)
+        
+        success, frame = _read_into(video.read, video, pool)
         
         if not success:
             break
         
-        # Extract frame at intervals
-        if frame_count % frame_interval == 0 and extracted_count < max_frames:
-            frame_filename = f"frame_{extracted_count:04d}.jpg"
-            frame_path = os.path.join(output_folder, frame_filename)
+        if not _landed_on(video, index, fps):
+            print("⚠️ Video does not support accurate seeking, decoding sequentially")
             
-            # Save frame
-            cv2.imwrite(frame_path, frame)
-            frame_paths.append(frame_path)
+            if pool is not None:
+                pool.release(frame)
             
-            extracted_count += 1
-            print(f"   Extracted frame {extracted_count}/{frames_to_extract}")
+            video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            if int(video.get(cv2.CAP_PROP_POS_FRAMES)) == 0:
+                yield from _read_sequential(video, indices[position:], pool=pool)
+            return
         
-        frame_count += 1
+        yield index, frame
+
+
+def read_sampled_frames(video, indices, mode='auto', start=0, pool=None):
+    """
+    Read the given frame indices from an open cv2.VideoCapture
+    
+    Args:
+        video: Opened cv2.VideoCapture
+        indices: Sorted list of frame indices to read
+        mode: One of SAMPLING_MODES
+        start: Frame index the capture is currently positioned at
+        pool: Optional BufferPool to decode sampled frames into (the
+            caller releases them once done)
+    
+    Returns:
+        Generator of (frame_index, frame) tuples
+    """
+    
+    if mode not in SAMPLING_MODES:
+        raise ValueError(f"Unknown sampling mode: {mode}")
+    
+    if not indices:
+        return iter(())
+    
+    if mode == 'auto':
+        interval = indices[1] - indices[0] if len(indices) > 1 else 0
+        mode = 'seek' if interval >= SEEK_MIN_INTERVAL else 'grab'
+    
+    if mode == 'seek':
+        return _read_seek(video, indices, pool)
+    if mode == 'grab':
+        return _read_grab(video, indices, start, pool)
+    return _read_sequential(video, indices, start, pool)
+
+
+def _thumbnail(image):
+    """32x32 grayscale copy of a frame, all frame_signature looks at"""
+    
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    return cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA)
+
+
+def frame_signature(image):
+    """
+    Cheap summary of a frame for change detection
+
+    Returns:
+        (32x32 grayscale thumbnail scaled to 0-1, 16-bin normalized histogram)
+    """
+    
+    thumbnail = _thumbnail(image)
+    histogram = np.bincount((thumbnail >> 4).ravel(), minlength=16) / thumbnail.size
+    
+    return thumbnail.astype(np.float32) / 255, histogram
+
+
+def select_distinct_frames(frames, max_frames, discard=None, keep=None):
+    """
+    Keep the frames that best cover a video's content
+    
+    A frame starts a new scene when its histogram moves more than
+    SCENE_CUT_THRESHOLD from the previous frame's, and is dropped as a
+    duplicate when it differs from the last kept frame by less than
+    DUPLICATE_THRESHOLD. Beyond max_frames, the kept frame closest to
+    the one before it is dropped, so each scene keeps its first frame
+    for as long as possible and static shots give up frames first.
+    
+    At most max_frames + 1 decoded frames are held at a time.
+    
+    Args:
+        frames: Iterable of (frame_index, frame) in frame order
+        max_frames: Most frames to keep
+        discard: Optional callback(frame) for each frame not kept (e.g.
+            BufferPool.release)
+        keep: Optional set of frame indices that are always kept (they
+            count towards max_frames)
+    
+    Returns:
+        List of (frame_index, frame, Scene), in frame order
+    """
+    
+    kept = []  # [index, frame, thumbnail, scene number, starts scene, difference from previous kept]
+    scenes = []  # [number, start, end]
+    previous_histogram = None
+    
+    for index, frame in frames:
+        thumbnail, histogram = frame_signature(frame)
+        
+        new_scene = previous_histogram is None or np.abs(histogram - previous_histogram).sum() / 2 > SCENE_CUT_THRESHOLD
+        previous_histogram = histogram
+        
+        difference = float(np.abs(thumbnail - kept[-1][2]).mean()) if kept else np.inf
+        
+        if new_scene:
+            scenes.append([len(scenes), index, index])
+        else:
+            scenes[-1][2] = index
+            if difference < DUPLICATE_THRESHOLD and not (keep and index in keep):
+                if discard:
+                    discard(frame)
+                continue
+        
+        kept.append([index, frame, thumbnail, scenes[-1][0], new_scene, difference])
+        
+        if len(kept) > max_frames:
+            # Scene starts outrank any change within a scene
+            redundancy = [
+                np.inf if keep and entry[0] in keep else entry[5] + (1 if entry[4] else 0)
+                for entry in kept
+            ]
+            drop = int(np.argmin(redundancy))
+            dropped = kept.pop(drop)
+            if discard:
+                discard(dropped[1])
+            
+            if drop < len(kept):
+                following = kept[drop]
+                following[4] = following[4] or (dropped[4] and following[3] == dropped[3])
+                following[5] = float(np.abs(following[2] - kept[drop - 1][2]).mean()) if drop > 0 else np.inf
+    
+    return [(entry[0], entry[1], Scene(*scenes[entry[3]])) for entry in kept]
+
+
+def split_into_segments(indices, fps, segment_seconds=None):
+    """
+    Group sampled frame indices into fixed-length time segments
+    
+    Args:
+        indices: Sorted list of frame indices
+        fps: Frames per second of the video
+        segment_seconds: Segment length (defaults to SEGMENT_SECONDS)
+    
+    Returns:
+        List of index lists, one per non-empty segment, in frame order
+    """
+    
+    segment_seconds = segment_seconds or SEGMENT_SECONDS
+    segment_frames = max(1, int(round((fps or 1) * segment_seconds)))
+    
+    segments = []
+    for index in indices:
+        segment = index // segment_frames
+        if segments and segments[-1][0] // segment_frames == segment:
+            segments[-1].append(index)
+        else:
+            segments.append([index])
+    
+    return segments
+
+
+def _decode_segment(video_path, indices, mode):
+    """
+    Worker process: open the video and decode one segment's frames
+    
+    Returns:
+        List of (frame_index, frame) tuples
+    """
+    
+    video = cv2.VideoCapture(video_path)
+    
+    if not video.isOpened():
+        return []
+    
+    try:
+        # Jump to the start of the segment (the first sampled frame); if
+        # the container can't seek accurately, decode from the beginning
+        start = indices[0]
+        video.set(cv2.CAP_PROP_POS_FRAMES, start)
+        success, frame = video.read()
+        
+        if success and _landed_on(video, start, video.get(cv2.CAP_PROP_FPS)):
+            return [(start, frame)] + list(read_sampled_frames(video, indices[1:], mode=mode, start=start + 1))
+        
+        video.release()
+        video = cv2.VideoCapture(video_path)
+        return list(read_sampled_frames(video, indices, mode=mode))
+    
+    finally:
+        video.release()
+
+
+def _get_pool(workers):
+    """Reuse one process pool per worker count"""
+    
+    if workers not in _pools:
+        _pools[workers] = ProcessPoolExecutor(max_workers=workers)
+    return _pools[workers]
+
+
+def shutdown_pools():
+    """Stop the decode processes (runs at exit)"""
+    
+    while _pools:
+        _, executor = _pools.popitem()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(shutdown_pools)
+
+
+def open_capture(source):
+    """
+    Open a cv2.VideoCapture on a file path or a seekable binary stream
+    (e.g. remote_video.RemoteVideoStream)
+    """
+    
+    if isinstance(source, (str, os.PathLike)):
+        return cv2.VideoCapture(source)
+    
+    source.seek(0)
+    return cv2.VideoCapture(source, cv2.CAP_FFMPEG, [])
+
+
+def _read_indices(video_path, video, indices, fps, mode, workers=None, segment_seconds=None, pool=None):
+    """
+    Decode the given frame indices, in parallel worker processes when
+    they span several segments of PARALLEL_MIN_SEGMENT_FRAMES frames or
+    more on average (file paths only)
+    
+    Frames decoded in a worker arrive pickled; with a pool they are
+    copied into pooled buffers, so callers release every frame the same
+    way whichever path decoded it
+    
+    Returns:
+        Generator of (frame_index, frame) tuples, in index order
+    """
+    
+    segments = split_into_segments(indices, fps, segment_seconds)
+    workers = workers or VIDEO_WORKERS
+    
+    parallel = (
+        workers > 1 and len(segments) > 1
+        and len(indices) >= PARALLEL_MIN_SEGMENT_FRAMES * len(segments)
+        and isinstance(video_path, (str, os.PathLike))
+    )
+    
+    if not parallel:
+        return read_sampled_frames(video, indices, mode=mode, pool=pool)
     
     video.release()
     
+    executor = _get_pool(workers)
+    futures = [executor.submit(_decode_segment, video_path, segment, mode) for segment in segments]
+    frames = (frame for future in futures for frame in future.result())
+    
+    if pool is None:
+        return frames
+    
+    return ((frame_index, _copy_into(pool, frame)) for frame_index, frame in frames)
+
+
+def _copy_into(pool, frame):
+    buffer = pool.acquire(frame.shape, frame.dtype)
+    np.copyto(buffer, frame)
+    return buffer
+
+
+def _check_sampling(sampling):
+    sampling = sampling or VIDEO_SAMPLING
+    if sampling not in ('uniform', 'adaptive'):
+        raise ValueError(f"Unknown sampling: {sampling}")
+    return sampling
+
+
+def iter_video_frames(video_path, max_frames=30, mode='auto', workers=None, segment_seconds=None, sampling=None,
+                      pool=None):
+    """
+    Decode sampled frames from a video without touching the disk
+    
+    Dense samples of videos longer than one segment are decoded in
+    parallel worker processes, one segment per task (see _read_indices);
+    frames still come out in order.
+    Streams are always decoded in this process, and only read as far
+    as the last sampled frame
+    
+    Args:
+        video_path: Path to video file, or a seekable binary stream
+        max_frames: Maximum number of frames to sample
+        mode: How to reach the sampled frames (see SAMPLING_MODES)
+        workers: Number of decode processes (defaults to VIDEO_WORKERS, 1 disables)
+        segment_seconds: Segment length (defaults to SEGMENT_SECONDS)
+        sampling: 'uniform' or 'adaptive' (defaults to VIDEO_SAMPLING);
+            adaptive sampling yields its frames once all probes are decoded
+        pool: Optional BufferPool to decode frames into; the caller
+            releases each frame's image once it's done with it
+    
+    Returns:
+        Generator of VideoFrame(index, timestamp, image, scene) tuples
+    """
+    
+    sampling = _check_sampling(sampling)
+    video = open_capture(video_path)
+    
+    if not video.isOpened():
+        print("❌ Error: Could not open video")
+        return
+    
+    try:
+        total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = video.get(cv2.CAP_PROP_FPS)
+        
+        probes = adaptive_probe_count(total_frames, max_frames, mode) if sampling == 'adaptive' else max_frames
+        indices = get_sample_indices(total_frames, probes)
+        frames = _read_indices(video_path, video, indices, fps, mode, workers, segment_seconds, pool)
+        
+        if sampling == 'adaptive':
+            frames = select_distinct_frames(frames, max_frames, discard=pool.release if pool else None)
+        else:
+            frames = ((frame_index, frame, None) for frame_index, frame in frames)
+        
+        for frame_index, frame, scene in frames:
+            timestamp = round(frame_index / fps, 3) if fps else None
+            yield VideoFrame(frame_index, timestamp, frame, scene)
+    
+    finally:
+        video.release()
+
+
+def coarse_to_fine(items, first_round=4):
+    """
+    Split items into rounds that each refine the ones before
+    
+    The first round is at least first_round items spread evenly over
+    the list; each later round adds the items halfway between those
+    already taken. With 20 items: positions 0, 4, 8, 12, 16, then 2,
+    6, 10, 14, 18, then the odd ones.
+    
+    Returns:
+        List of rounds, each a list of items in their original order
+    """
+    
+    items = list(items)
+    
+    stride = 1
+    while stride * 2 * first_round <= len(items):
+        stride *= 2
+    
+    rounds = []
+    taken_stride = None
+    while stride >= 1:
+        rounds.append([
+            item for position, item in enumerate(items)
+            if position % stride == 0 and (taken_stride is None or position % taken_stride != 0)
+        ])
+        taken_stride = stride
+        stride //= 2
+    
+    return [round_items for round_items in rounds if round_items]
+
+
+def _decode_round(video_path, indices, fps, mode, workers, segment_seconds, pool, scenes=None):
+    """Decode one round's frames with a capture of its own (each round starts from the beginning)"""
+    
+    video = open_capture(video_path)
+    
+    try:
+        return [
+            VideoFrame(frame_index, round(frame_index / fps, 3) if fps else None, frame, (scenes or {}).get(frame_index))
+            for frame_index, frame in _read_indices(video_path, video, indices, fps, mode, workers, segment_seconds, pool)
+        ]
+    finally:
+        video.release()
+
+
+def iter_frame_rounds(video_path, max_frames=30, mode='auto', workers=None, segment_seconds=None, sampling=None,
+                      first_round=4, pool=None):
+    """
+    Decode sampled frames in coarse-to-fine rounds (see coarse_to_fine)
+    
+    Each round covers the whole video a little more densely than the
+    last, and is only decoded once the caller asks for it, so a caller
+    that has seen enough can stop iterating.
+    
+    With adaptive sampling the first round is picked uniformly and
+    handed out straight away. Only then are the probes decoded (as
+    thumbnails) to choose the rest of the frames, keeping the first
+    round's (see select_distinct_frames), so stopping after the first
+    round skips the probe pass too.
+    
+    Args:
+        Same as iter_video_frames, plus:
+        first_round: Frames in the first round (at least)
+    
+    Returns:
+        Generator of (list of VideoFrame, number of frames in all rounds,
+        scenes). scenes maps frame index -> Scene with adaptive sampling
+        (None for uniform); it is the same dict every round, and the
+        first round's frames get theirs once the probe pass has run
+    """
+    
+    sampling = _check_sampling(sampling)
+    video = open_capture(video_path)
+    
+    if not video.isOpened():
+        print("❌ Error: Could not open video")
+        return
+    
+    total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = video.get(cv2.CAP_PROP_FPS)
+    video.release()
+    
+    indices = get_sample_indices(total_frames, max_frames)
+    rounds = coarse_to_fine(indices, first_round)
+    
+    if sampling == 'uniform':
+        for round_indices in rounds:
+            yield _decode_round(video_path, round_indices, fps, mode, workers, segment_seconds, pool), len(indices), None
+        return
+    
+    if not rounds:
+        return
+    
+    scenes = {}
+    first = _decode_round(video_path, rounds[0], fps, mode, workers, segment_seconds, pool)
+    
+    # Keep what the probe pass needs before the caller gets (and releases) the frames
+    first_thumbnails = [(frame.index, _thumbnail(frame.image)) for frame in first]
+    yield first, len(indices), scenes
+    
+    kept = set(rounds[0])
+    probes = [
+        index for index in get_sample_indices(total_frames, adaptive_probe_count(total_frames, max_frames, mode))
+        if index not in kept
+    ]
+    
+    video = open_capture(video_path)
+    
+    try:
+        def probe_thumbnails():
+            for frame_index, frame in _read_indices(video_path, video, probes, fps, mode, workers, segment_seconds, pool):
+                thumbnail = _thumbnail(frame)
+                if pool:
+                    pool.release(frame)
+                yield frame_index, thumbnail
+        
+        selected = select_distinct_frames(
+            heapq.merge(first_thumbnails, probe_thumbnails(), key=lambda item: item[0]),
+            max_frames,
+            keep=kept
+        )
+    finally:
+        video.release()
+    
+    scenes.update((frame_index, scene) for frame_index, _, scene in selected)
+    rest = [frame_index for frame_index, _, _ in selected if frame_index not in kept]
+    
+    for round_indices in coarse_to_fine(rest, first_round):
+        yield _decode_round(video_path, round_indices, fps, mode, workers, segment_seconds, pool, scenes), len(selected), scenes
+
+
+def save_frames(frames, output_folder='temp/frames'):
+    """
+    Write frames to disk as JPEGs
+    
+    Args:
+        frames: Iterable of VideoFrame
+        output_folder: Where to save frames
+    
+    Returns:
+        List of frame paths
+    """
+    
+    # Create output folder if doesn't exist
+    os.makedirs(output_folder, exist_ok=True)
+    
+    frame_paths = []
+    
+    for count, frame in enumerate(frames):
+        frame_path = os.path.join(output_folder, f"frame_{count:04d}.jpg")
+        cv2.imwrite(frame_path, frame.image)
+        frame_paths.append(frame_path)
+    
+    return frame_paths
+
+
+def extract_frames_from_video(video_path, output_folder='temp/frames', max_frames=30, mode='auto'):
+    """
+    Extract frames from video and save them to disk
+    
+    Use iter_video_frames() instead when the frames are only needed in memory
+    
+    Args:
+        video_path: Path to video file
+        output_folder: Where to save frames
+        max_frames: Maximum number of frames to extract
+        mode: How to reach the sampled frames (see SAMPLING_MODES)
+    
+    Returns:
+        List of frame paths
+    """
+    
+    print(f"⏳ Extracting up to {max_frames} frames...")
+    
+    frame_paths = save_frames(iter_video_frames(video_path, max_frames, mode), output_folder)
+    
     print(f"✅ Extracted {len(frame_paths)} frames successfully!")
     return frame_paths
 
 def get_video_info(video_path):
-    """Get video metadata"""
+    """Get video metadata (video_path can also be a seekable stream)"""
     
-    video = cv2.VideoCapture(video_path)
+    video = open_capture(video_path)
     
     if not video.isOpened():
         return None
@@ -105,4 +739,4 @@ def cleanup_frames(folder='temp/frames'):
         except Exception as e:
             print(f"Error deleting {filename}: {e}")
     
-    print("✅ Cleaned up extracted frames")
\ No newline at end of file
+    print("✅ Cleaned up extracted frames")